@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web UI响应压缩和流式输出
+根据Accept-Encoding选择brotli（已安装brotli包时）或gzip，普通响应整体压缩，
+流式响应逐块压缩；大的JSON/YAML内容按块生成，不在内存中拼出完整字符串
+"""
+
+import json
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli是可选依赖，未安装时只使用gzip
+    brotli = None
+
+
+# 小于该字节数的响应不压缩
+MIN_COMPRESS_SIZE = 1024
+
+# 流式输出时每块的大致字节数
+CHUNK_SIZE = 64 * 1024
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/x-yaml', 'application/yaml', 'application/javascript',
+    'text/'
+)
+
+
+def parse_accept_encoding(accept_encoding):
+    """解析Accept-Encoding请求头，返回 {编码: q值}"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding):
+    """根据Accept-Encoding请求头选择压缩方式，返回'br'、'gzip'或None"""
+    accepted = parse_accept_encoding(accept_encoding)
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+class _Compressor:
+    """统一brotli和gzip的增量压缩接口"""
+
+    def __init__(self, encoding):
+        if encoding == 'br':
+            self._obj = brotli.Compressor(quality=5)
+            self._compress = self._obj.process
+            self._flush = self._obj.finish
+        else:
+            # wbits=31 输出带gzip头的数据
+            self._obj = zlib.compressobj(6, zlib.DEFLATED, 31)
+            self._compress = self._obj.compress
+            self._flush = self._obj.flush
+
+    def compress(self, data):
+        return self._compress(data)
+
+    def flush(self):
+        return self._flush()
+
+
+def compress_bytes(data, encoding):
+    compressor = _Compressor(encoding)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_chunks(chunks, encoding):
+    """逐块压缩可迭代对象，不缓存完整内容"""
+    compressor = _Compressor(encoding)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_json(payload, chunk_size=CHUNK_SIZE):
+    """把对象编码为JSON并按块产出，避免生成整个JSON字符串"""
+    buffer = []
+    size = 0
+    for piece in json.JSONEncoder(ensure_ascii=False).iterencode(payload):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def compress_response(response, accept_encoding):
+    """按客户端支持的编码压缩响应（在after_request中调用）
+
+    跳过非200响应、已编码的响应、文件直传响应、不可压缩的类型和过小的响应。
+    压缩后ETag改为弱ETag，If-None-Match按弱比较仍能命中。
+    """
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+    if not response.mimetype or not response.mimetype.startswith(COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        # send_file等直传文件的响应由服务器直接发送，不在这里处理
+        if response.direct_passthrough:
+            return response
+        response.response = compress_chunks(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return response
+        response.set_data(compress_bytes(data, encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+精简的容器模型
+在采集时把docker inspect的完整结果解析一次，只保留分组和转换compose需要的字段
+"""
+
+import sys
+
+
+# 各部分需要保留的inspect字段
+STATE_FIELDS = ('Status', 'Running')
+CONFIG_FIELDS = ('Image', 'Env', 'Labels', 'Entrypoint', 'Cmd', 'Healthcheck')
+HOST_CONFIG_FIELDS = ('RestartPolicy', 'NetworkMode', 'ExtraHosts', 'Links', 'Privileged', 'Devices', 'CapAdd')
+ENDPOINT_FIELDS = ('IPAMConfig', 'IPAddress', 'GlobalIPv6Address', 'MacAddress', 'EndpointID')
+MOUNT_FIELDS = ('Type', 'Name', 'Source', 'Destination', 'RW')
+
+
+def _intern(value):
+    """重复出现的短字符串（镜像名、网络名、挂载类型等）只保留一份"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _keep_label(key):
+    """只保留生成compose和分组会用到的标签"""
+    return 'watchtower' in key.lower() or key.startswith('com.docker.compose.')
+
+
+def _project(source, fields):
+    """按字段列表截取字典，缺失的字段不写入"""
+    source = source or {}
+    return {field: source[field] for field in fields if field in source}
+
+
+class ContainerRecord:
+    """单个容器的精简记录
+
+    使用__slots__存储，嵌套部分只保留需要的字段；同时支持container['Config']、
+    container.get('HostConfig', {})等字典式访问，分组和转换代码无需区分记录和原始dict。
+    """
+
+    __slots__ = ('Id', 'Name', 'State', 'Config', 'HostConfig', 'NetworkSettings', 'Mounts')
+
+    def __init__(self, Id, Name, State=None, Config=None, HostConfig=None, NetworkSettings=None, Mounts=None):
+        self.Id = Id
+        self.Name = Name
+        self.State = State or {}
+        self.Config = Config or {}
+        self.HostConfig = HostConfig or {}
+        self.NetworkSettings = NetworkSettings or {}
+        self.Mounts = Mounts or []
+
+    @classmethod
+    def from_inspect(cls, data):
+        """由docker inspect的单个容器结果构造记录"""
+        if isinstance(data, cls):
+            return data
+
+        config = _project(data.get('Config'), CONFIG_FIELDS)
+        config['Image'] = _intern(config.get('Image'))
+        if config.get('Labels'):
+            config['Labels'] = {_intern(k): v for k, v in config['Labels'].items() if _keep_label(k)}
+
+        host_config = _project(data.get('HostConfig'), HOST_CONFIG_FIELDS)
+        host_config['NetworkMode'] = _intern(host_config.get('NetworkMode', ''))
+
+        network_settings = data.get('NetworkSettings') or {}
+        networks = {
+            _intern(name): _project(endpoint, ENDPOINT_FIELDS)
+            for name, endpoint in (network_settings.get('Networks') or {}).items()
+        }
+
+        mounts = []
+        for mount in data.get('Mounts') or []:
+            mount = _project(mount, MOUNT_FIELDS)
+            mount['Type'] = _intern(mount.get('Type'))
+            mounts.append(mount)
+
+        return cls(
+            Id=data['Id'],
+            Name=data['Name'],
+            State=_project(data.get('State'), STATE_FIELDS),
+            Config=config,
+            HostConfig=host_config,
+            NetworkSettings={'Ports': network_settings.get('Ports') or {}, 'Networks': networks},
+            Mounts=mounts
+        )
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def keys(self):
+        return self.__slots__
+
+    def to_dict(self):
+        """转换为普通字典（用于JSON序列化）"""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        for key in self.__slots__:
+            setattr(self, key, state.get(key))
+
+    def __eq__(self, other):
+        if isinstance(other, ContainerRecord):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ContainerRecord(Id={self.Id[:12]!r}, Name={self.Name!r})"
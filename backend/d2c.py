@@ -1,11 +1,30 @@
 #!/usr/bin/env python3
 
+import argparse
 import json
 import subprocess
 import yaml
 import os
 import re
+import time
+import hashlib
+import shutil
+import shlex
+import signal
+import tempfile
+from datetime import datetime
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from container_model import ContainerRecord
+from snapshot_index import MANIFEST_NAME, LATEST_LINK, STAGING_PREFIX, read_manifest
+
+# 运行状态目录（清单指纹等跨运行数据），运行记录写入日志目录
+STATE_DIR = os.getenv('STATE_DIR', '/app/data')
+HISTORY_FILE = os.getenv('HISTORY_FILE', '/app/logs/history.jsonl')
+# 运行记录超过HISTORY_MAX_BYTES时只保留最近的HISTORY_MAX_RECORDS条（且不超过上限的一半），
+# 每分钟执行一次的CRON也不会让文件无限增长
+HISTORY_MAX_RECORDS = 1000
+HISTORY_MAX_BYTES = 2 * 1024 * 1024
 
 
 def load_config():
@@ -17,7 +36,12 @@ def load_config():
         'NAS': 'debian',
         'CRON': 'once',
         'NETWORK': 'true',
-        'TZ': 'Asia/Shanghai'
+        'TZ': 'Asia/Shanghai',
+        'SKIP_UNCHANGED': 'true',
+        'WORKERS': 'auto',
+        'COMMAND_TIMEOUT': '30',
+        'COMMAND_RETRIES': '2',
+        'GROUP_BY': 'network'
     }
     
     # 如果配置文件存在，读取配置文件
@@ -37,7 +61,12 @@ def load_config():
         'NAS': os.getenv('NAS', default_config['NAS']),
         'CRON': os.getenv('CRON', default_config['CRON']),
         'NETWORK': os.getenv('NETWORK', default_config['NETWORK']),
-        'TZ': os.getenv('TZ', default_config['TZ'])
+        'TZ': os.getenv('TZ', default_config['TZ']),
+        'SKIP_UNCHANGED': os.getenv('SKIP_UNCHANGED', default_config['SKIP_UNCHANGED']),
+        'WORKERS': os.getenv('WORKERS', default_config['WORKERS']),
+        'COMMAND_TIMEOUT': os.getenv('COMMAND_TIMEOUT', default_config['COMMAND_TIMEOUT']),
+        'COMMAND_RETRIES': os.getenv('COMMAND_RETRIES', default_config['COMMAND_RETRIES']),
+        'GROUP_BY': os.getenv('GROUP_BY', default_config['GROUP_BY'])
     }
     print("从环境变量加载配置")
     return config
@@ -63,7 +92,17 @@ def ensure_config_file():
             "// NETWORK": "控制bridge网络配置的显示方式: true(显示) 或 false(隐藏)",
             "NETWORK": "true",
             "// TZ": "时区设置,如Asia/Shanghai、Europe/London等",
-            "TZ": "Asia/Shanghai"
+            "TZ": "Asia/Shanghai",
+            "// SKIP_UNCHANGED": "容器和网络清单与上次运行相比没有变化时跳过生成: true(默认) 或 false",
+            "SKIP_UNCHANGED": "true",
+            "// WORKERS": "并行生成compose文件的进程数: auto(默认,按CPU核数) 或具体数字,1表示串行",
+            "WORKERS": "auto",
+            "// COMMAND_TIMEOUT": "每条docker命令的超时秒数,默认30",
+            "COMMAND_TIMEOUT": "30",
+            "// COMMAND_RETRIES": "docker命令超时或失败后的重试次数,默认2,0表示不重试",
+            "COMMAND_RETRIES": "2",
+            "// GROUP_BY": "容器分组方式: network(默认,按网络和链接关系) 或 compose(按com.docker.compose.project标签,无标签的容器按网络分组)",
+            "GROUP_BY": "network"
         }
         
         try:
@@ -74,83 +113,567 @@ def ensure_config_file():
             print(f"创建配置文件失败: {e}")
 
 
-def run_command(command):
+def get_worker_count(config):
+    """根据配置中的WORKERS计算并行进程数，auto或无效值时使用CPU核数"""
+    value = str(config.get('WORKERS', 'auto')).strip().lower()
+    if value.isdigit() and int(value) > 0:
+        return int(value)
+    return os.cpu_count() or 1
+
+
+# docker命令的默认超时（秒）和失败后的重试次数，main()中按配置COMMAND_TIMEOUT/COMMAND_RETRIES设置
+COMMAND_TIMEOUT = 30
+COMMAND_RETRIES = 2
+# 重试前的等待时间按 COMMAND_BACKOFF * 2^n 递增
+COMMAND_BACKOFF = 0.5
+# 这些错误重试也不会成功（对象已被删除等），直接返回
+PERMANENT_ERRORS = ('No such', 'not found')
+
+# 本次运行的docker调用统计，写入manifest和运行记录
+command_stats = {}
+# 只有d2c.py的一次运行（main）期间记录统计；Web UI等长期运行、多线程的进程导入本模块时不记录，
+# 避免skipped列表无限增长和线程间共享计数
+_record_stats = False
+
+
+class CommandTimeoutError(RuntimeError):
+    """docker命令在全部重试后仍然超时（raise_on_timeout=True时抛出）"""
+
+
+def reset_command_stats(record=True):
+    """清空docker调用统计，record为False时之后的调用不再记录"""
+    global _record_stats
+    _record_stats = record
+    command_stats.clear()
+    command_stats.update({
+        'calls': 0,
+        'failures': 0,
+        'timeouts': 0,
+        'retries': 0,
+        'total_time': 0.0,
+        'max_time': 0.0,
+        'skipped': []
+    })
+
+
+reset_command_stats(record=False)
+
+
+def get_command_stats():
+    """返回docker调用统计的副本，时间保留3位小数"""
+    stats = dict(command_stats)
+    stats['total_time'] = round(stats['total_time'], 3)
+    stats['max_time'] = round(stats['max_time'], 3)
+    stats['skipped'] = list(stats['skipped'])
+    return stats
+
+
+def configure_commands(config):
+    """根据配置设置docker命令的超时和重试次数，无效值时保留默认值"""
+    global COMMAND_TIMEOUT, COMMAND_RETRIES
+    try:
+        timeout = float(config.get('COMMAND_TIMEOUT', COMMAND_TIMEOUT))
+        if timeout > 0:
+            COMMAND_TIMEOUT = timeout
+    except (TypeError, ValueError):
+        print(f"无效的COMMAND_TIMEOUT: {config.get('COMMAND_TIMEOUT')}，使用默认值 {COMMAND_TIMEOUT}")
+    try:
+        retries = int(config.get('COMMAND_RETRIES', COMMAND_RETRIES))
+        if retries >= 0:
+            COMMAND_RETRIES = retries
+    except (TypeError, ValueError):
+        print(f"无效的COMMAND_RETRIES: {config.get('COMMAND_RETRIES')}，使用默认值 {COMMAND_RETRIES}")
+
+
+def _run_once(command, timeout):
+    """执行一次命令，返回(returncode, stdout, stderr)，超时时returncode为None"""
+    # 单独的进程组，超时时连同shell启动的docker进程一起结束
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, text=True,
+                               start_new_session=True)
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            process.kill()
+        process.communicate()
+        return None, '', f"超时（{timeout}秒）"
+    return process.returncode, stdout, stderr
+
+
+def _count(key, value=1):
+    if _record_stats:
+        command_stats[key] += value
+
+
+def run_command(command, timeout=None, retries=None, raise_on_timeout=False):
     """执行shell命令并返回输出
     
     当在容器内运行时，确保命令能够访问宿主机的Docker守护进程
     这需要容器启动时挂载了Docker socket (/var/run/docker.sock)
+    
+    每次执行有单独的超时，超时或失败后按退避间隔重试，对象不存在等错误不重试。
+    最终失败时返回None，调用次数、耗时和失败次数记录在command_stats中。
+    raise_on_timeout为True且最后一次执行超时时抛出CommandTimeoutError，供调用方区分超时和其它失败。
     """
     # 检查是否在容器内运行
     in_container = os.path.exists('/.dockerenv')
     
-    # 如果在容器内运行且命令是docker相关，确保使用宿主机的Docker socket
-    if in_container and command.startswith('docker'):
+    # 如果在容器内运行且命令是docker相关，确保使用宿主机的Docker socket（设置了DOCKER_HOST时由docker自行连接）
+    if in_container and command.startswith('docker') and not os.getenv('DOCKER_HOST'):
         # 确保Docker socket已挂载
         if not os.path.exists('/var/run/docker.sock'):
             print("错误: 未找到Docker socket挂载。请确保容器启动时使用了 -v /var/run/docker.sock:/var/run/docker.sock")
             return None
     
-    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, text=True)
-    stdout, stderr = process.communicate()
-    if process.returncode != 0:
-        print(f"执行命令出错: {command}")
-        print(f"错误信息: {stderr}")
+    timeout = COMMAND_TIMEOUT if timeout is None else timeout
+    retries = COMMAND_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        if attempt:
+            _count('retries')
+            time.sleep(COMMAND_BACKOFF * 2 ** (attempt - 1))
+        start = time.perf_counter()
+        returncode, stdout, stderr = _run_once(command, timeout)
+        elapsed = time.perf_counter() - start
+        _count('calls')
+        _count('total_time', elapsed)
+        if _record_stats:
+            command_stats['max_time'] = max(command_stats['max_time'], elapsed)
+        if returncode == 0:
+            return stdout
+        if returncode is None:
+            _count('timeouts')
+        if returncode is not None and any(marker in stderr for marker in PERMANENT_ERRORS):
+            break
+    
+    _count('failures')
+    print(f"执行命令出错: {command}")
+    print(f"错误信息: {stderr}")
+    if returncode is None and raise_on_timeout:
+        raise CommandTimeoutError(command)
+    return None
+
+
+def record_skipped(kind, object_id):
+    """记录获取失败而被跳过的对象"""
+    if _record_stats:
+        command_stats['skipped'].append(f"{kind}:{object_id}")
+    print(f"警告: 无法获取{'容器' if kind == 'container' else '网络'} {object_id} 的信息，已跳过")
+
+
+def get_inventory_fingerprint(config=None):
+    """通过一次容器列表和一次网络列表计算清单指纹，不执行docker inspect
+    
+    指纹覆盖容器ID、名称、创建时间、状态、所连网络，以及网络ID、名称、驱动和创建时间，
+    同时包含影响生成结果的配置项。任一列表获取失败时返回None。
+    """
+    containers_output = run_command("docker ps -a --no-trunc --format '{{.ID}}|{{.Names}}|{{.CreatedAt}}|{{.State}}|{{.Networks}}'")
+    if containers_output is None:
+        return None
+    networks_output = run_command("docker network ls --no-trunc --format '{{.ID}}|{{.Name}}|{{.Driver}}|{{.CreatedAt}}'")
+    if networks_output is None:
+        return None
+    
+    if config is None:
+        config = load_config()
+    
+    digest = hashlib.sha256()
+    digest.update(f"NAS={config.get('NAS')}|NETWORK={config.get('NETWORK')}|GROUP_BY={get_group_mode(config)}\n".encode('utf-8'))
+    for line in sorted(containers_output.strip().splitlines()):
+        digest.update(f"c|{line}\n".encode('utf-8'))
+    for line in sorted(networks_output.strip().splitlines()):
+        digest.update(f"n|{line}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def atomic_write(path, data):
+    """把字节内容原子地写入path
+    
+    先写入同目录下唯一命名的临时文件再替换，调度器和Web UI等多个进程或线程同时写入时
+    不会互相覆盖对方的临时文件，读取方也不会看到写了一半的内容
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_state():
+    """读取上次运行保存的状态"""
+    state_file = os.path.join(STATE_DIR, 'state.json')
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"读取运行状态失败: {e}")
+        return {}
+
+
+def save_state(state):
+    """保存运行状态，供下次运行比较"""
+    state_file = os.path.join(STATE_DIR, 'state.json')
+    try:
+        atomic_write(state_file, json.dumps(state, indent=2, ensure_ascii=False).encode('utf-8'))
+    except Exception as e:
+        print(f"保存运行状态失败: {e}")
+
+
+def trim_history():
+    """运行记录文件超过大小上限时，原子地改写为只包含最近记录的文件"""
+    try:
+        if os.path.getsize(HISTORY_FILE) <= HISTORY_MAX_BYTES:
+            return
+    except OSError:
+        return
+    with open(HISTORY_FILE, 'rb') as f:
+        lines = f.readlines()
+    kept = []
+    size = 0
+    for line in reversed(lines):
+        if len(kept) >= HISTORY_MAX_RECORDS or size + len(line) > HISTORY_MAX_BYTES // 2:
+            break
+        kept.append(line)
+        size += len(line)
+    atomic_write(HISTORY_FILE, b''.join(reversed(kept)))
+
+
+def read_last_history(tail_size=65536):
+    """读取最后一条运行记录，只读取文件末尾，没有记录或无法解析时返回None"""
+    try:
+        with open(HISTORY_FILE, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - tail_size))
+            lines = f.read().splitlines()
+    except OSError:
         return None
-    return stdout
+    for line in reversed(lines):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            return record
+    return None
+
+
+def append_history(record):
+    """追加一条运行记录（JSON Lines），文件过大时只保留最近的记录"""
+    try:
+        history_dir = os.path.dirname(HISTORY_FILE)
+        if history_dir:
+            os.makedirs(history_dir, exist_ok=True)
+        record = {'time': datetime.now().astimezone().isoformat(), **record}
+        with open(HISTORY_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        trim_history()
+    except Exception as e:
+        print(f"写入运行记录失败: {e}")
+
+
+# 投影模式：docker inspect只输出生成compose需要的字段，每个容器一行JSON
+# （GraphDriver、完整State、HostConfig中的大部分字段等不再经过管道和JSON解析）
+INSPECT_TEMPLATE = (
+    '{"Id":{{json .Id}},"Name":{{json .Name}},'
+    '"State":{"Status":{{json .State.Status}},"Running":{{json .State.Running}}},'
+    '"Config":{"Image":{{json .Config.Image}},"Env":{{json .Config.Env}},"Labels":{{json .Config.Labels}},'
+    '"Entrypoint":{{json .Config.Entrypoint}},"Cmd":{{json .Config.Cmd}},"Healthcheck":{{json .Config.Healthcheck}}},'
+    '"HostConfig":{"RestartPolicy":{{json .HostConfig.RestartPolicy}},"NetworkMode":{{json .HostConfig.NetworkMode}},'
+    '"ExtraHosts":{{json .HostConfig.ExtraHosts}},"Links":{{json .HostConfig.Links}},'
+    '"Privileged":{{json .HostConfig.Privileged}},"Devices":{{json .HostConfig.Devices}},"CapAdd":{{json .HostConfig.CapAdd}}},'
+    '"NetworkSettings":{"Ports":{{json .NetworkSettings.Ports}},"Networks":{{json .NetworkSettings.Networks}}},'
+    '"Mounts":{{json .Mounts}}}'
+)
+
+# 每次docker inspect调用传入的容器数量上限，避免命令行过长
+INSPECT_BATCH_SIZE = 100
+
+# 容器ID（完整或短ID）或容器名，来自HTTP请求的值必须先通过校验才能传给docker命令
+CONTAINER_REF_PATTERN = re.compile(r'^[a-zA-Z0-9][a-zA-Z0-9_.-]{0,254}$')
+
+
+def is_valid_container_ref(value):
+    """检查是否为合法的容器ID或容器名，拒绝包含空格、引号和shell元字符的值"""
+    return isinstance(value, str) and bool(CONTAINER_REF_PATTERN.match(value))
+
+
+def _quote_args(values):
+    return ' '.join(shlex.quote(value) for value in values)
+
+
+def _check_stopped_container(container):
+    """已停止的容器可能拿不到完整的网络配置，给出提示"""
+    if not container['State'].get('Running'):
+        if 'Labels' in container['Config']:
+            network_labels = {k: v for k, v in (container['Config']['Labels'] or {}).items() if 'network' in k.lower()}
+            if network_labels:
+                print(f"警告: 容器 {container['Name']} 已停止，但从标签中找到网络配置")
+        else:
+            print(f"警告: 容器 {container['Name']} 已停止，可能无法获取完整的网络配置")
+
+
+def parse_inspect_lines(lines):
+    """逐行解析投影模式的输出（每行一个容器的JSON），逐个生成ContainerRecord"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        container = json.loads(line)
+        _check_stopped_container(container)
+        yield ContainerRecord.from_inspect(container)
+
+
+def _inspect_projected(container_ids):
+    """执行一次投影模式的docker inspect，失败时返回None，超时时抛出CommandTimeoutError"""
+    output = run_command(f"docker inspect --format '{INSPECT_TEMPLATE}' {_quote_args(container_ids)}",
+                         raise_on_timeout=True)
+    if output is None:
+        return None
+    return list(parse_inspect_lines(output.splitlines()))
+
+
+def inspect_containers_projected(container_ids):
+    """按批次执行docker inspect --format，只获取需要的字段
+    
+    某个批次失败时（例如容器在docker ps之后被删除）逐个重新inspect该批次的容器，
+    单个容器失败只跳过该容器，不影响其它容器。
+    超时说明Docker守护进程无响应，此时不再逐个inspect，剩余容器全部跳过，
+    避免每个容器都再等待一轮超时和重试而超过调度器的执行时限。
+    
+    Returns:
+        ContainerRecord列表，投影模式整体不可用（一个容器都取不到）或输出无法解析时返回None
+        （由调用方回退到完整inspect）
+    """
+    containers = []
+    for start in range(0, len(container_ids), INSPECT_BATCH_SIZE):
+        batch = container_ids[start:start + INSPECT_BATCH_SIZE]
+        records = None
+        failed = []
+        done = 0
+        try:
+            records = _inspect_projected(batch)
+            if records is None and len(batch) > 1:
+                print(f"批量inspect失败，逐个inspect {len(batch)} 个容器")
+                records = []
+                for container_id in batch:
+                    single = _inspect_projected([container_id])
+                    if single is None:
+                        failed.append(container_id)
+                    else:
+                        records.extend(single)
+                    done += 1
+                if not records:
+                    return None
+                for container_id in failed:
+                    record_skipped('container', container_id)
+        except CommandTimeoutError:
+            print(f"docker inspect超时，跳过剩余的 {len(container_ids) - start - done} 个容器")
+            containers.extend(records or [])
+            for container_id in failed + container_ids[start + done:]:
+                record_skipped('container', container_id)
+            return containers
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"解析投影inspect输出失败: {e}")
+            return None
+        if records is None:
+            return None
+        containers.extend(records)
+    return containers
+
+
+def inspect_containers_full(container_ids):
+    """逐个执行完整的docker inspect，单个容器失败时跳过，超时时跳过剩余容器"""
+    containers = []
+    for index, container_id in enumerate(container_ids):
+        cmd = f"docker inspect {shlex.quote(container_id)}"
+        try:
+            output = run_command(cmd, raise_on_timeout=True)
+        except CommandTimeoutError:
+            print(f"docker inspect超时，跳过剩余的 {len(container_ids) - index} 个容器")
+            for skipped_id in container_ids[index:]:
+                record_skipped('container', skipped_id)
+            break
+        if not output:
+            record_skipped('container', container_id)
+            continue
+        try:
+            container_info = json.loads(output)
+            # 检查容器的网络配置
+            container = container_info[0]
+            _check_stopped_container(container)
+            # 只保留分组和转换需要的字段，完整的inspect结果随即释放
+            containers.append(ContainerRecord.from_inspect(container))
+        except (ValueError, KeyError, TypeError, IndexError) as e:
+            print(f"解析容器 {container_id} 的inspect输出失败: {e}")
+            record_skipped('container', container_id)
+    return containers
+
+
+def get_container_references(container):
+    """返回容器通过links和network_mode: container:引用的容器（名称或ID）"""
+    host_config = container.get('HostConfig') or {}
+    references = [link.split(':')[0].lstrip('/') for link in host_config.get('Links') or []]
+    network_mode = host_config.get('NetworkMode') or ''
+    if network_mode.startswith('container:'):
+        references.append(network_mode.split(':', 1)[1])
+    return references
+
+
+def inspect_containers(container_ids):
+    """批量inspect指定的容器（ID、短ID或名称），投影模式不可用时逐个完整inspect，结果按Id去重
+    
+    不合法的ID或名称不会传给docker命令，直接跳过
+    """
+    invalid = [cid for cid in container_ids if not is_valid_container_ref(cid)]
+    if invalid:
+        print(f"警告: 忽略无效的容器ID或名称: {invalid}")
+        container_ids = [cid for cid in container_ids if is_valid_container_ref(cid)]
+        if not container_ids:
+            return []
+    containers = inspect_containers_projected(container_ids)
+    if containers is None:
+        containers = inspect_containers_full(container_ids)
+    unique = {}
+    for container in containers:
+        unique.setdefault(container['Id'], container)
+    return list(unique.values())
+
+
+def inspect_selected_containers(container_ids):
+    """只inspect选中的容器，以及它们通过links或network_mode引用、但未被选中的容器
+    
+    选中的容器一次批量inspect，引用的容器再一次批量inspect，耗时只与选中数量有关。
+    
+    Returns:
+        (选中容器的ContainerRecord列表, 被引用容器的ContainerRecord列表)
+    """
+    requested = list(dict.fromkeys(cid for cid in container_ids if cid))
+    if not requested:
+        return [], []
+    selected = inspect_containers(requested)
+    
+    known = set()
+    for container in selected:
+        known.update((container['Id'], container['Id'][:12], container['Name'].lstrip('/')))
+    references = []
+    for container in selected:
+        for reference in get_container_references(container):
+            if reference not in known and reference not in references:
+                references.append(reference)
+    referenced = inspect_containers(references) if references else []
+    return selected, referenced
 
 
 def get_containers():
-    """获取所有运行中的容器信息"""
+    """获取所有容器信息，返回ContainerRecord列表"""
     cmd = "docker ps -a --format '{{.ID}}'"
     output = run_command(cmd)
     if not output:
         return []
     
     container_ids = output.strip().split('\n')
-    containers = []
     
-    for container_id in container_ids:
-        cmd = f"docker inspect {container_id}"
-        output = run_command(cmd)
-        if output:
-            container_info = json.loads(output)
-            # 检查容器的网络配置
-            container = container_info[0]
-            
-            # 如果容器已停止，尝试从容器标签中获取网络信息
-            if not container['State']['Running']:
-                if 'Labels' in container['Config']:
-                    network_labels = {k: v for k, v in container['Config']['Labels'].items() if 'network' in k.lower()}
-                    if network_labels:
-                        print(f"警告: 容器 {container['Name']} 已停止，但从标签中找到网络配置")
-                else:
-                    print(f"警告: 容器 {container['Name']} 已停止，可能无法获取完整的网络配置")
-            
-            containers.append(container)
+    containers = inspect_containers_projected(container_ids)
+    if containers is None:
+        print("投影模式获取容器信息失败，改为逐个完整inspect")
+        containers = inspect_containers_full(container_ids)
     
     return containers
 
 
+NETWORK_CACHE_FILE = 'networks.json'
+
+
+def load_network_cache():
+    """读取跨运行的网络缓存，返回 {'key': [...], 'networks': {...}}，不存在或损坏时返回None"""
+    try:
+        with open(os.path.join(STATE_DIR, NETWORK_CACHE_FILE), 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"读取网络缓存失败: {e}")
+        return None
+    if not isinstance(cache, dict) or not isinstance(cache.get('networks'), dict):
+        return None
+    return cache
+
+
+def save_network_cache(key, networks):
+    """保存网络缓存（唯一命名的临时文件+重命名）"""
+    cache_file = os.path.join(STATE_DIR, NETWORK_CACHE_FILE)
+    try:
+        atomic_write(cache_file, json.dumps({'key': key, 'networks': networks}, ensure_ascii=False).encode('utf-8'))
+    except Exception as e:
+        print(f"保存网络缓存失败: {e}")
+
+
+def inspect_networks(network_ids):
+    """一次docker network inspect获取全部网络，失败时逐个inspect，单个网络失败时跳过"""
+    networks = {}
+    output = run_command(f"docker network inspect {_quote_args(network_ids)}")
+    try:
+        network_infos = json.loads(output) if output else None
+    except ValueError as e:
+        print(f"解析网络inspect输出失败: {e}")
+        network_infos = None
+    
+    if network_infos is None:
+        network_infos = []
+        for network_id in network_ids:
+            output = run_command(f"docker network inspect {shlex.quote(network_id)}")
+            try:
+                network_infos.append(json.loads(output)[0])
+            except (ValueError, TypeError, IndexError) as e:
+                if output:
+                    print(f"解析网络 {network_id} 的inspect输出失败: {e}")
+                record_skipped('network', network_id)
+    
+    for network_info in network_infos:
+        network_name = network_info.get('Name')
+        if not network_name:
+            continue
+        # 包含所有网络信息，包括bridge和host，以便后续处理
+        networks[network_name] = network_info
+        print(f"获取网络信息: {network_name}, 驱动: {network_info.get('Driver', 'unknown')}")
+    return networks
+
+
 def get_networks():
-    """获取所有网络信息"""
-    cmd = "docker network ls --format '{{.ID}}'"
+    """获取所有网络信息
+    
+    先通过一次docker network ls取得网络ID和创建时间，与STATE_DIR中的网络缓存比较，
+    列表相同时直接使用缓存，不执行docker network inspect；否则重新inspect并更新缓存。
+    """
+    cmd = "docker network ls --no-trunc --format '{{.ID}}|{{.CreatedAt}}'"
     output = run_command(cmd)
     if not output:
         return {}
     
-    network_ids = output.strip().split('\n')
-    networks = {}
-    
-    for network_id in network_ids:
-        cmd = f"docker network inspect {network_id}"
-        output = run_command(cmd)
-        if output:
-            network_info = json.loads(output)
-            network_name = network_info[0]['Name']
-            # 包含所有网络信息，包括bridge和host，以便后续处理
-            networks[network_name] = network_info[0]
-            print(f"获取网络信息: {network_name}, 驱动: {network_info[0].get('Driver', 'unknown')}")
-    
+    key = sorted(line.strip() for line in output.strip().split('\n') if line.strip())
+    cache = load_network_cache()
+    if cache and cache.get('key') == key:
+        print(f"网络列表未变化，使用缓存的 {len(cache['networks'])} 个网络")
+        return cache['networks']
+    
+    network_ids = [line.split('|', 1)[0] for line in key]
+    networks = inspect_networks(network_ids)
+    # 有网络获取失败时不写缓存，下次运行重新获取
+    if len(networks) == len(network_ids):
+        save_network_cache(key, networks)
     return networks
 
 
@@ -247,15 +770,71 @@ def group_containers_by_network(containers, networks):
     for container_id in special_network_containers:
         merged_groups.append([container_id])
     
-    return merged_groups
+    # 组内容器按输入顺序排列，避免集合迭代顺序随进程变化导致输出不稳定
+    order = {container['Id']: index for index, container in enumerate(containers)}
+    return [sorted(group, key=lambda cid: order.get(cid, len(order))) for group in merged_groups]
+
+
+COMPOSE_PROJECT_LABEL = 'com.docker.compose.project'
+COMPOSE_SERVICE_LABEL = 'com.docker.compose.service'
+
+
+def get_group_mode(config):
+    """根据配置中的GROUP_BY返回分组方式: network(默认) 或 compose"""
+    mode = str((config or {}).get('GROUP_BY', 'network')).strip().lower()
+    return 'compose' if mode == 'compose' else 'network'
+
+
+def get_compose_project(container):
+    """返回容器的compose项目标签，没有时返回None"""
+    labels = (container.get('Config') or {}).get('Labels') or {}
+    return labels.get(COMPOSE_PROJECT_LABEL) or None
+
+
+def group_containers_by_compose_project(containers, networks):
+    """按com.docker.compose.project标签分组
+    
+    一次遍历把带标签的容器按项目归组（组内按输入顺序），
+    没有标签的容器仍按网络和链接关系分组，排在项目分组之后。
+    """
+    projects = {}
+    unlabeled = []
+    for container in containers:
+        project = get_compose_project(container)
+        if project:
+            projects.setdefault(project, []).append(container['Id'])
+        else:
+            unlabeled.append(container)
+    
+    groups = list(projects.values())
+    if unlabeled:
+        groups.extend(group_containers_by_network(unlabeled, networks))
+    return groups
 
 
-def convert_container_to_service(container):
-    """将容器配置转换为docker-compose服务配置"""
+def group_containers(containers, networks, config=None):
+    """按配置的GROUP_BY选择分组方式"""
+    if get_group_mode(config) == 'compose':
+        return group_containers_by_compose_project(containers, networks)
+    return group_containers_by_network(containers, networks)
+
+
+def convert_container_to_service(container, networks=None, config=None, container_names=None):
+    """将容器配置转换为docker-compose服务配置
+    
+    Args:
+        container: 容器inspect信息
+        networks: 网络信息字典，用于判断网络驱动类型
+        config: 配置字典，为None时调用load_config读取
+        container_names: 容器ID到容器名的映射，用于把network_mode: container:<ID>换成容器名
+    """
     service = {}
+    if networks is None:
+        networks = {}
         
     # 获取配置
-    config = load_config()
+    if config is None:
+        config = load_config()
     nas_env = config['NAS'].lower()
     network_env = config['NETWORK'].lower() == 'true'
     print(f"列出配置信息:1.系统版本是：{nas_env};2.网络环境变量是：{network_env};")
@@ -380,8 +959,10 @@ def convert_container_to_service(container):
     
     if network_mode == 'host':
         service['network_mode'] = 'host'
-    elif network_mode == 'container':
-        linked_container = network_mode.split(':')[1]
+    elif network_mode.startswith('container:'):
+        linked_container = network_mode.split(':', 1)[1]
+        # 目标通常是容器ID，能解析时换成容器名
+        linked_container = (container_names or {}).get(linked_container, linked_container)
         service['network_mode'] = f"container:{linked_container}"
     elif network_mode == 'bridge':
         if network_env:
@@ -649,7 +1230,7 @@ def convert_container_to_service(container):
     return service
 
 
-def generate_compose_file(containers_group, all_containers, networks=None, output_dir=None):
+def generate_compose_file(containers_group, all_containers, networks=None, output_dir=None, manifest=None, group_hash=None):
     """为一组容器生成docker-compose.yaml文件
     
     Args:
@@ -657,6 +1238,9 @@ def generate_compose_file(containers_group, all_containers, networks=None, outpu
         all_containers: 所有容器信息
         networks: 网络信息字典，用于判断网络类型
         output_dir: 输出目录，如果为None则从环境变量获取
+        manifest: 快照清单字典，传入时只追加文件记录，由调用方统一写入；
+                  为None时直接更新输出目录中的manifest.json
+        group_hash: 分组内容哈希，记录到清单中供下次运行复用
     """
     # 如果没有传入networks参数，获取网络信息
     if networks is None:
@@ -665,9 +1249,59 @@ def generate_compose_file(containers_group, all_containers, networks=None, outpu
     if output_dir is None:
         output_dir = os.getenv('OUTPUT_DIR', 'compose')
     
-    # 确保输出目录存在
-    os.makedirs(output_dir, exist_ok=True)
+    rendered = render_compose_group(containers_group, all_containers, networks)
+    file_path, entry = write_compose_file(rendered, output_dir, group_hash=group_hash)
+    
+    # 记录到快照清单
+    if manifest is None:
+        update_manifest(output_dir, [entry])
+    else:
+        manifest['files'].append(entry)
+    return file_path
+
+
+class ComposeDumper(yaml.Dumper):
+    """自定义YAML表示类，确保正确的缩进"""
+    def increase_indent(self, flow=False, indentless=False):
+        return super(ComposeDumper, self).increase_indent(flow, False)
+    
+    def write_line_break(self, data=None):
+        super(ComposeDumper, self).write_line_break(data)
+        if len(self.indents) == 1:
+            super(ComposeDumper, self).write_line_break()
+
+
+def safe_filename(name):
+    """把任意字符串转换为安全的文件名（不含路径分隔符，不以.开头）"""
+    return re.sub(r'[^a-zA-Z0-9_.-]', '_', name).lstrip('.') or '_'
+
+
+def unique_filename(filename, used):
+    """文件名已被本次快照中的其它分组使用时追加-2、-3等后缀，并记录到used"""
+    stem, ext = os.path.splitext(filename)
+    candidate = filename
+    n = 2
+    while candidate in used:
+        candidate = f"{stem}-{n}{ext}"
+        n += 1
+    used.add(candidate)
+    return candidate
+
+
+def render_compose_group(containers_group, all_containers, networks, config=None, container_names=None):
+    """将一组容器转换为compose内容（不写文件，可在子进程中执行）
     
+    Args:
+        containers_group: 容器ID列表
+        all_containers: 容器信息列表，需包含本组的全部容器
+        networks: 网络信息字典
+        config: 配置字典，为None时由convert_container_to_service自行读取
+        container_names: network_mode: container:<ID>目标的ID到容器名映射（目标可以在其它分组），
+            为None时只从all_containers中解析
+    
+    Returns:
+        (文件名, YAML字节内容, compose字典, 本组容器信息列表)
+    """
     compose = {
         'version': '3.8',
         'services': {},
@@ -695,16 +1329,39 @@ def generate_compose_file(containers_group, all_containers, networks=None, outpu
                 # 对于自定义网络，不设置external，让compose自动创建
                 compose['networks'][network] = {}
     
+    # 按compose项目分组时，整组属于同一项目则沿用原项目的服务名和项目名
+    compose_project = None
+    service_labels = {}
+    if config is not None and get_group_mode(config) == 'compose':
+        group_set = set(containers_group)
+        members = [c for c in all_containers if c['Id'] in group_set]
+        projects = {get_compose_project(c) for c in members}
+        if len(projects) == 1 and None not in projects:
+            compose_project = projects.pop()
+            labels = [((c['Config'].get('Labels') or {}).get(COMPOSE_SERVICE_LABEL)) for c in members]
+            # 同一服务有多个副本时服务名会重复，此时仍使用容器名
+            if all(labels) and len(set(labels)) == len(labels):
+                service_labels = {c['Id']: label for c, label in zip(members, labels)}
+    
+    # 有容器使用network_mode: container:<ID>时，把ID解析为容器名
+    group_set = set(containers_group)
+    if container_names is None and any((c['HostConfig'].get('NetworkMode') or '').startswith('container:')
+           for c in all_containers if c['Id'] in group_set):
+        container_names = {c['Id']: c['Name'].lstrip('/') for c in all_containers}
+    
     # 添加服务配置
     for container_id in containers_group:
         for container in all_containers:
             if container['Id'] == container_id:
                 container_name = container['Name'].lstrip('/')
-                service_name = re.sub(r'[^a-zA-Z0-9_]', '_', container_name)
-                compose['services'][service_name] = convert_container_to_service(container)
+                service_name = service_labels.get(container_id) or re.sub(r'[^a-zA-Z0-9_]', '_', container_name)
+                compose['services'][service_name] = convert_container_to_service(container, networks, config, container_names)
     
     # 生成文件名
-    if len(containers_group) == 1:
+    if compose_project:
+        # 标签值由用户填写，可能包含/或..，只保留文件名安全的字符
+        filename = f"{safe_filename(compose_project)}.yaml"
+    elif len(containers_group) == 1:
         for container in all_containers:
             if container['Id'] == containers_group[0]:
                 filename = f"{container['Name'].lstrip('/')}.yaml"
@@ -750,29 +1407,392 @@ def generate_compose_file(containers_group, all_containers, networks=None, outpu
                     filename = f"{prefix}-group.yaml"
                     break
     
-    # 确保输出目录存在
-    os.makedirs(output_dir, exist_ok=True)
+    # 生成YAML文件，使用自定义的Dumper类
+    yaml_content = yaml.dump(compose, Dumper=ComposeDumper, default_flow_style=False, sort_keys=False, allow_unicode=True, indent=2, width=float('inf'))
+    data = yaml_content.encode('utf-8')
     
-    # 自定义YAML表示类，确保正确的缩进
-    class MyDumper(yaml.Dumper):
-        def increase_indent(self, flow=False, indentless=False):
-            return super(MyDumper, self).increase_indent(flow, False)
-        
-        def write_line_break(self, data=None):
-            super(MyDumper, self).write_line_break(data)
-            if len(self.indents) == 1:
-                super(MyDumper, self).write_line_break()
+    group_ids = set(containers_group)
+    group_containers = [c for c in all_containers if c['Id'] in group_ids]
+    return filename, data, compose, group_containers
+
+
+def write_compose_file(rendered, output_dir, group_hash=None):
+    """写入render_compose_group的结果，返回(文件路径, 清单文件记录)"""
+    filename, data, compose, group_containers = rendered
     
-    # 生成YAML文件，使用自定义的Dumper类
-    yaml_content = yaml.dump(compose, Dumper=MyDumper, default_flow_style=False, sort_keys=False, allow_unicode=True, indent=2, width=float('inf'))
+    # 确保输出目录存在
+    os.makedirs(output_dir, exist_ok=True)
     
     # 写入文件
     file_path = os.path.join(output_dir, filename)
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(yaml_content)
+    with open(file_path, 'wb') as f:
+        f.write(data)
     
+    entry = build_manifest_entry(filename, data, compose, group_containers)
+    if group_hash:
+        entry['group_hash'] = group_hash
     print(f"已生成 {file_path}")
-    return file_path
+    return file_path, entry
+
+
+def build_render_task(containers_group, containers_by_id, networks, config):
+    """构造render_groups的任务：本组容器，以及本组network_mode引用的容器名（目标通常在其它分组）"""
+    return (
+        containers_group,
+        [containers_by_id[cid] for cid in containers_group],
+        networks,
+        config,
+        get_network_mode_names(containers_group, containers_by_id)
+    )
+
+
+def _render_group_task(task):
+    """进程池任务：只携带本组容器，避免每个任务都序列化全部容器"""
+    containers_group, group_containers, networks, config, container_names = task
+    return render_compose_group(containers_group, group_containers, networks, config, container_names)
+
+
+def render_groups(tasks, workers=1):
+    """按输入顺序逐个产出各分组的渲染结果
+    
+    workers大于1且任务多于1个时使用进程池并行转换和生成YAML，
+    executor.map保证结果顺序与输入一致，输出与串行模式完全相同。
+    
+    Args:
+        tasks: build_render_task构造的 (容器ID列表, 本组容器信息, 网络信息, 配置, network_mode目标容器名) 元组列表
+        workers: 并行进程数
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield _render_group_task(task)
+        return
+    
+    try:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+    except (OSError, NotImplementedError) as e:
+        print(f"无法创建进程池，改为串行生成: {e}")
+        for task in tasks:
+            yield _render_group_task(task)
+        return
+    
+    with executor:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        for rendered in executor.map(_render_group_task, tasks, chunksize=chunksize):
+            yield rendered
+
+
+def _host_ports(ports):
+    """从compose端口映射中取出宿主机端口，端口范围展开为单个端口"""
+    host_ports = []
+    for mapping in ports or []:
+        parts = str(mapping).split(':')
+        if len(parts) < 2:
+            continue
+        start, _, end = parts[-2].partition('-')
+        try:
+            first = int(start)
+            last = int(end) if end else first
+        except ValueError:
+            continue
+        host_ports.extend(str(port) for port in range(first, min(last, 65535) + 1))
+    return host_ports
+
+
+def _volume_paths(volumes):
+    """从compose卷配置中取出宿主机路径/卷名和容器内路径"""
+    paths = []
+    for volume in volumes or []:
+        parts = str(volume).split(':')
+        paths.extend(part for part in parts[:2] if part)
+    return paths
+
+
+def service_search_fields(service):
+    """清单中记录的可搜索字段：镜像、宿主机端口、卷、网络、环境变量名"""
+    networks = service.get('networks') or []
+    if service.get('network_mode'):
+        networks = list(networks) + [service['network_mode']]
+    return {
+        'image': service.get('image'),
+        'ports': _host_ports(service.get('ports')),
+        'volumes': _volume_paths(service.get('volumes')),
+        'networks': list(networks),
+        'env': list(service.get('environment') or {})
+    }
+
+
+def build_manifest_entry(filename, data, compose, containers):
+    """生成单个compose文件的清单记录
+    
+    Args:
+        filename: 文件名
+        data: 写入的文件内容(bytes)
+        compose: compose配置字典
+        containers: 文件中包含的容器信息列表
+    """
+    # 按container_name找到每个容器对应的服务（服务名可能来自compose标签而不是容器名）
+    services_by_container = {
+        service.get('container_name'): (service_name, service)
+        for service_name, service in compose['services'].items()
+    }
+    entries = []
+    for container in containers:
+        name = container['Name'].lstrip('/')
+        service_name, service = services_by_container.get(name, (re.sub(r'[^a-zA-Z0-9_]', '_', name), {}))
+        entries.append({
+            'id': container['Id'],
+            'name': name,
+            'service': service_name,
+            **service_search_fields(service)
+        })
+    return {
+        'file': filename,
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'size': len(data),
+        'services': list(compose['services']),
+        'containers': entries,
+        'networks': sorted(compose.get('networks', {}))
+    }
+
+
+def new_manifest():
+    """创建空的快照清单"""
+    return {
+        'version': 1,
+        'generated_at': datetime.now().astimezone().isoformat(),
+        'files': [],
+        'timings': {}
+    }
+
+
+def write_manifest(output_dir, manifest):
+    """写入快照清单（先写临时文件再替换，避免读取到写了一半的清单）"""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+    return manifest_path
+
+
+def update_manifest(output_dir, entries):
+    """把文件记录合并到输出目录已有的清单中（同名文件的记录会被替换）"""
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = None
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"读取快照清单失败: {e}，将重新生成")
+    if not manifest:
+        manifest = new_manifest()
+    
+    names = {entry['file'] for entry in entries}
+    manifest['files'] = [entry for entry in manifest.get('files', []) if entry['file'] not in names] + entries
+    return write_manifest(output_dir, manifest)
+
+
+# 超过这个时间（秒）的临时目录视为被强制结束（如调度器超时后SIGKILL）的运行遗留，创建新临时目录前清理
+STAGING_MAX_AGE = 3600
+
+
+def sweep_staging_dirs(parent, max_age=None):
+    """删除parent下超过max_age秒未修改的临时目录和临时latest链接，返回删除的数量"""
+    max_age = STAGING_MAX_AGE if max_age is None else max_age
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(parent))
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.name.startswith(STAGING_PREFIX):
+            continue
+        try:
+            if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+            removed += 1
+            print(f"已清理遗留的临时目录: {entry.path}")
+        except OSError as e:
+            print(f"清理临时目录 {entry.path} 失败: {e}")
+    return removed
+
+
+def create_staging_dir(output_dir):
+    """在输出目录的上级目录中创建临时目录，本次运行的文件先写到这里
+    
+    异常退出时由调用方删除临时目录；进程被强制结束时来不及清理，遗留的旧临时目录在这里清理
+    """
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent, exist_ok=True)
+    sweep_staging_dirs(parent)
+    return tempfile.mkdtemp(prefix=f"{STAGING_PREFIX}{os.path.basename(os.path.abspath(output_dir))}-", dir=parent)
+
+
+def _fsync_path(path):
+    """fsync文件或目录，不支持目录fsync的文件系统上忽略错误"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def publish_snapshot(staging_dir, output_dir):
+    """把临时目录发布为最终快照目录
+    
+    先fsync临时目录中的全部文件和目录本身，再整体rename到输出目录
+    （目标不存在或为调度脚本预先创建的空目录时rename是原子的）。
+    目标目录已有内容时逐个os.replace文件，清单最后替换，然后删除临时目录。
+    """
+    names = sorted(os.listdir(staging_dir), key=lambda name: name == MANIFEST_NAME)
+    for name in names:
+        _fsync_path(os.path.join(staging_dir, name))
+    _fsync_path(staging_dir)
+    
+    output_dir = os.path.abspath(output_dir)
+    try:
+        os.rename(staging_dir, output_dir)
+    except OSError:
+        os.makedirs(output_dir, exist_ok=True)
+        for name in names:
+            os.replace(os.path.join(staging_dir, name), os.path.join(output_dir, name))
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    # 目录权限与普通mkdir创建的目录保持一致（mkdtemp创建的目录为0700）
+    try:
+        os.chmod(output_dir, 0o755)
+    except OSError:
+        pass
+    _fsync_path(os.path.dirname(output_dir))
+    return output_dir
+
+
+def update_latest_link(output_dir):
+    """原子地把上级目录中的latest链接指向刚发布的快照（相对路径，便于挂载到其它位置）"""
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    link_path = os.path.join(parent, LATEST_LINK)
+    tmp_path = os.path.join(parent, f"{STAGING_PREFIX}{LATEST_LINK}-{os.getpid()}")
+    try:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        os.symlink(os.path.basename(os.path.abspath(output_dir)), tmp_path)
+        os.replace(tmp_path, link_path)
+        _fsync_path(parent)
+    except OSError as e:
+        print(f"更新latest链接失败: {e}")
+
+
+def _module_digest():
+    """当前d2c.py源码的哈希，生成逻辑变化后不复用旧文件"""
+    try:
+        with open(os.path.abspath(__file__), 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return ''
+
+
+GENERATOR_DIGEST = _module_digest()
+
+
+def container_service_hash(container):
+    """计算容器中影响compose生成结果的inspect字段的哈希"""
+    config = container.get('Config') or {}
+    host_config = container.get('HostConfig') or {}
+    network_settings = container.get('NetworkSettings') or {}
+    relevant = {
+        'Id': container.get('Id'),
+        'Name': container.get('Name'),
+        'Config': {key: config.get(key) for key in ('Image', 'Env', 'Labels', 'Entrypoint', 'Cmd', 'Healthcheck')},
+        'HostConfig': {key: host_config.get(key) for key in (
+            'RestartPolicy', 'NetworkMode', 'ExtraHosts', 'Links', 'Privileged', 'Devices', 'CapAdd'
+        )},
+        'Ports': network_settings.get('Ports'),
+        'Networks': {
+            name: {key: (settings or {}).get(key) for key in ('IPAMConfig', 'IPAddress', 'GlobalIPv6Address', 'MacAddress')}
+            for name, settings in (network_settings.get('Networks') or {}).items()
+        },
+        'Mounts': [
+            {key: mount.get(key) for key in ('Type', 'Name', 'Source', 'Destination', 'RW')}
+            for mount in container.get('Mounts') or []
+        ]
+    }
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def get_network_mode_names(containers_group, containers_by_id):
+    """返回分组成员通过network_mode: container:<ID>引用的容器ID到容器名的映射，目标容器可以在其它分组"""
+    names = {}
+    for container_id in containers_group:
+        container = containers_by_id.get(container_id) or {}
+        network_mode = (container.get('HostConfig') or {}).get('NetworkMode') or ''
+        if network_mode.startswith('container:'):
+            target = containers_by_id.get(network_mode.split(':', 1)[1])
+            if target:
+                names[target['Id']] = target['Name'].lstrip('/')
+    return names
+
+
+def compute_group_hash(containers_group, container_hashes, containers_by_id, networks, config):
+    """计算分组哈希：成员及顺序、各成员的字段哈希、network_mode目标的容器名、所用网络的驱动以及生成配置"""
+    digest = hashlib.sha256()
+    digest.update(f"{GENERATOR_DIGEST}|NAS={config.get('NAS')}|NETWORK={config.get('NETWORK')}|GROUP_BY={get_group_mode(config)}\n".encode('utf-8'))
+    used_networks = set()
+    for container_id in containers_group:
+        digest.update(f"{container_id}:{container_hashes.get(container_id)}\n".encode('utf-8'))
+        container = containers_by_id.get(container_id) or {}
+        used_networks.update((container.get('NetworkSettings') or {}).get('Networks') or {})
+    # 目标容器改名后生成的network_mode随之变化，不能复用旧文件
+    for target_id, target_name in sorted(get_network_mode_names(containers_group, containers_by_id).items()):
+        digest.update(f"target:{target_id}:{target_name}\n".encode('utf-8'))
+    for network_name in sorted(used_networks):
+        digest.update(f"net:{network_name}:{(networks or {}).get(network_name, {}).get('Driver', '')}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_previous_groups(previous_output_dir):
+    """读取上次输出目录的清单，返回 分组哈希 -> (目录, 文件记录)"""
+    if not previous_output_dir or not os.path.isdir(previous_output_dir):
+        return {}
+    manifest = read_manifest(previous_output_dir)
+    if not manifest:
+        return {}
+    return {
+        entry['group_hash']: (previous_output_dir, entry)
+        for entry in manifest.get('files', [])
+        if entry.get('group_hash')
+    }
+
+
+def reuse_compose_file(previous, output_dir):
+    """复用上次生成的文件内容，返回(文件路径, 清单文件记录)，校验失败时返回None，由调用方重新生成"""
+    previous_dir, entry = previous
+    source_path = os.path.join(previous_dir, entry['file'])
+    try:
+        with open(source_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if hashlib.sha256(data).hexdigest() != entry.get('sha256'):
+        return None
+    
+    os.makedirs(output_dir, exist_ok=True)
+    file_path = os.path.join(output_dir, entry['file'])
+    if os.path.abspath(file_path) != os.path.abspath(source_path):
+        with open(file_path, 'wb') as f:
+            f.write(data)
+    print(f"分组未变化，复用 {file_path}")
+    return file_path, dict(entry)
 
 
 def generate_compose_for_selected_containers(container_ids):
@@ -786,27 +1806,21 @@ def generate_compose_for_selected_containers(container_ids):
     """
     print(f"开始为指定容器生成compose配置: {container_ids}")
     
-    # 获取所有容器信息
-    all_containers = get_containers()
-    if not all_containers:
-        print("未找到Docker容器")
-        return None
-    
-    # 过滤出指定的容器（支持短ID匹配）
-    selected_containers = []
-    for container in all_containers:
-        container_short_id = container['Id'][:12]
-        if container_short_id in container_ids or container['Id'] in container_ids:
-            selected_containers.append(container)
+    # 只inspect选中的容器及其links/network_mode引用的容器，不扫描整台主机
+    selected_containers, referenced_containers = inspect_selected_containers(container_ids)
     
     if not selected_containers:
         print(f"未找到指定的容器: {container_ids}")
         return None
     
     print(f"找到 {len(selected_containers)} 个匹配的容器")
+    container_names = {
+        c['Id']: c['Name'].lstrip('/') for c in selected_containers + referenced_containers
+    }
     
     # 获取网络信息
     networks = get_networks()
+    config = load_config()
     
     # 生成compose配置
     compose = {
@@ -823,7 +1837,7 @@ def generate_compose_for_selected_containers(container_ids):
         service_name = re.sub(r'[^a-zA-Z0-9_]', '_', container_name)
         
         # 生成服务配置
-        service_config = convert_container_to_service(container)
+        service_config = convert_container_to_service(container, networks, config, container_names)
         compose['services'][service_name] = service_config
         
         # 收集使用的网络
@@ -846,12 +1860,96 @@ def generate_compose_for_selected_containers(container_ids):
     return compose
 
 
+def generate_snapshot(staging_dir, output_dir, containers, container_groups, networks, config, state):
+    """复用未变化的分组并并行生成其余分组，文件写入staging_dir
+    
+    Returns:
+        (最终文件路径列表, 清单, 复用/重新生成统计)
+    """
+    manifest = new_manifest()
+    containers_by_id = {container['Id']: container for container in containers}
+    container_hashes = {container['Id']: container_service_hash(container) for container in containers}
+    # 内容哈希与上次清单一致的分组直接复用上次的文件
+    previous_groups = load_previous_groups(state.get('output_dir'))
+    stats = {'groups_reused': 0, 'groups_rebuilt': 0}
+    
+    # 先复用未变化的分组，其余分组交给转换/生成流水线
+    results = [None] * len(container_groups)
+    dirty = []
+    for i, group in enumerate(container_groups):
+        group_hash = compute_group_hash(group, container_hashes, containers_by_id, networks, config)
+        if group_hash in previous_groups:
+            results[i] = reuse_compose_file(previous_groups[group_hash], staging_dir)
+        if results[i]:
+            stats['groups_reused'] += 1
+        else:
+            dirty.append((i, group_hash))
+            stats['groups_rebuilt'] += 1
+    
+    workers = get_worker_count(config)
+    print(f"需要重新生成 {len(dirty)} 个分组，并行进程数: {max(1, min(workers, len(dirty)))}")
+    tasks = [build_render_task(container_groups[i], containers_by_id, networks, config) for i, _ in dirty]
+    # 不同分组可能得到相同的文件名（如同名的compose项目），重名时追加后缀，避免互相覆盖
+    used_names = {result[1]['file'] for result in results if result}
+    # render_groups按输入顺序产出结果，写入顺序与串行模式一致
+    for (i, group_hash), rendered in zip(dirty, render_groups(tasks, workers)):
+        print(f"处理第 {i+1} 组，包含 {len(container_groups[i])} 个容器")
+        filename = unique_filename(rendered[0], used_names)
+        if filename != rendered[0]:
+            print(f"文件名 {rendered[0]} 已被其它分组使用，改为 {filename}")
+            rendered = (filename,) + tuple(rendered[1:])
+        results[i] = write_compose_file(rendered, staging_dir, group_hash=group_hash)
+    
+    # 清单中的文件记录保持分组顺序
+    manifest['files'].extend(entry for _, entry in results)
+    generated_files = [os.path.join(output_dir, entry['file']) for _, entry in results]
+    return generated_files, manifest, stats
+
+
 def main():
     # 确保配置文件存在
     ensure_config_file()
     
+    timings = {}
+    run_start = time.perf_counter()
+    
+    # 获取输出目录，优先使用环境变量中的设置
+    output_dir = os.getenv('OUTPUT_DIR', 'compose')
+    
+    # 预检查：清单与上次运行相同时直接结束，不做inspect也不写任何文件
+    config = load_config()
+    configure_commands(config)
+    reset_command_stats()
+    skip_unchanged = str(config.get('SKIP_UNCHANGED', 'true')).lower() == 'true'
+    force_run = os.getenv('FORCE_RUN', 'false').lower() == 'true'
+    fingerprint = None
+    state = load_state()
+    if skip_unchanged:
+        phase_start = time.perf_counter()
+        fingerprint = get_inventory_fingerprint(config)
+        timings['fingerprint'] = round(time.perf_counter() - phase_start, 3)
+        previous_output = state.get('output_dir')
+        if (not force_run and fingerprint and state.get('fingerprint') == fingerprint
+                and previous_output and os.path.isdir(previous_output)):
+            print(f"容器和网络清单与上次运行相同，跳过本次生成（上次输出: {previous_output}）")
+            # 调度脚本会预先创建输出目录，未使用时删除空目录
+            if os.path.abspath(output_dir) != os.path.abspath(previous_output):
+                try:
+                    os.rmdir(output_dir)
+                except OSError:
+                    pass
+            append_history({
+                'status': 'unchanged',
+                'output_dir': previous_output,
+                'timings': timings,
+                'commands': get_command_stats()
+            })
+            return
+    
     print("开始读取Docker容器信息...")
+    phase_start = time.perf_counter()
     containers = get_containers()
+    timings['containers'] = round(time.perf_counter() - phase_start, 3)
     if not containers:
         print("未找到Docker容器")
         return
@@ -859,28 +1957,218 @@ def main():
     print(f"找到 {len(containers)} 个Docker容器")
     
     print("读取网络信息...")
+    phase_start = time.perf_counter()
     networks = get_networks()
+    timings['networks'] = round(time.perf_counter() - phase_start, 3)
     print(f"找到 {len(networks)} 个自定义网络")
     
     print("根据网络关系对容器进行分组...")
-    container_groups = group_containers_by_network(containers, networks)
+    phase_start = time.perf_counter()
+    container_groups = group_containers(containers, networks, config)
+    timings['grouping'] = round(time.perf_counter() - phase_start, 3)
     print(f"分组完成，共 {len(container_groups)} 个分组")
     
-    # 获取输出目录，优先使用环境变量中的设置
-    output_dir = os.getenv('OUTPUT_DIR', 'compose')
     print(f"输出目录: {output_dir}")
     
     print("生成docker-compose文件...")
-    generated_files = []
-    for i, group in enumerate(container_groups):
-        print(f"处理第 {i+1} 组，包含 {len(group)} 个容器")
-        file_path = generate_compose_file(group, containers, networks, output_dir)
-        generated_files.append(file_path)
+    phase_start = time.perf_counter()
+    # 所有文件先写入临时目录，完成后整体发布，读取方不会看到写了一半的快照
+    staging_dir = create_staging_dir(output_dir)
+    try:
+        generated_files, manifest, stats = generate_snapshot(
+            staging_dir, output_dir, containers, container_groups, networks, config, state
+        )
+        timings['generate'] = round(time.perf_counter() - phase_start, 3)
+        print(f"复用 {stats['groups_reused']} 个分组，重新生成 {stats['groups_rebuilt']} 个分组")
+        timings['total'] = round(time.perf_counter() - run_start, 3)
+        
+        # 写入快照清单，供Web UI直接查询而无需解析YAML
+        manifest['container_count'] = len(containers)
+        manifest['timings'] = timings
+        manifest['stats'] = stats
+        manifest['commands'] = get_command_stats()
+        write_manifest(staging_dir, manifest)
+        
+        publish_snapshot(staging_dir, output_dir)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    # latest链接在快照完整发布后最后更新
+    update_latest_link(output_dir)
+    
+    # 有容器或网络获取失败时不保存清单指纹，下次运行不会因清单未变化而跳过，保证重新获取
+    save_state({
+        'fingerprint': None if manifest['commands']['skipped'] else fingerprint,
+        'output_dir': os.path.abspath(output_dir),
+        'generated_at': manifest['generated_at']
+    })
+    append_history({
+        'status': 'changed',
+        'output_dir': os.path.abspath(output_dir),
+        'files': len(generated_files),
+        'containers': len(containers),
+        'stats': stats,
+        'timings': timings,
+        'commands': manifest['commands']
+    })
     
     print("\n生成完成！生成的文件列表:")
     for file_path in generated_files:
         print(f"- {file_path}")
+    print(f"各阶段耗时(秒): {timings}")
+    commands = manifest['commands']
+    print(f"docker命令: {commands['calls']} 次，总耗时 {commands['total_time']} 秒，"
+          f"最长 {commands['max_time']} 秒，重试 {commands['retries']} 次，失败 {commands['failures']} 次")
+    if commands['skipped']:
+        print(f"已跳过: {', '.join(commands['skipped'])}")
+
+
+DUMP_SUFFIXES = ('.json', '.ndjson', '.jsonl')
+
+
+def iter_json_objects(fp, chunk_size=65536):
+    """流式读取JSON对象，不把整个文件读入内存
+    
+    支持docker inspect输出的JSON数组（包括多个数组首尾相接）以及每行一个对象的NDJSON，
+    逐个产出顶层数组中的对象或顶层对象。
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    while True:
+        # 跳过空白和数组分隔符
+        pos = 0
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n[],':
+            pos += 1
+        buffer = buffer[pos:]
+        if not buffer:
+            if eof:
+                return
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer += chunk
+            continue
+        try:
+            obj, end = decoder.raw_decode(buffer)
+        except ValueError:
+            if eof:
+                raise
+            # 对象尚未读完整，继续读取
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer += chunk
+            continue
+        buffer = buffer[end:]
+        if isinstance(obj, dict):
+            yield obj
+
+
+def load_dump(dump_path):
+    """读取保存的inspect结果，返回(ContainerRecord列表, 网络信息字典)
+    
+    文件中可以同时包含docker inspect（容器）和docker network inspect（网络）的输出，
+    按对象内容区分：有State/Config的是容器，有Driver和IPAM/Scope的是网络。
+    """
+    containers = []
+    networks = {}
+    with open(dump_path, 'r', encoding='utf-8') as f:
+        for obj in iter_json_objects(f):
+            if 'State' in obj or 'Config' in obj:
+                containers.append(ContainerRecord.from_inspect(obj))
+            elif 'Driver' in obj and ('IPAM' in obj or 'Scope' in obj):
+                networks[obj['Name']] = obj
+    return containers, networks
+
+
+def find_dumps(path):
+    """返回要处理的转储文件列表：单个文件或目录下的全部.json/.ndjson/.jsonl文件"""
+    if os.path.isdir(path):
+        return sorted(
+            entry.path for entry in os.scandir(path)
+            if entry.is_file() and entry.name.endswith(DUMP_SUFFIXES)
+        )
+    return [path]
+
+
+def generate_from_dump(dump_path, output_dir, config):
+    """根据一个转储文件生成快照，返回(转储文件, 输出目录, 文件数量)"""
+    containers, networks = load_dump(dump_path)
+    print(f"{dump_path}: {len(containers)} 个容器，{len(networks)} 个网络")
+    if not containers:
+        return dump_path, None, 0
+    
+    container_groups = group_containers(containers, networks, config)
+    staging_dir = create_staging_dir(output_dir)
+    try:
+        generated_files, manifest, stats = generate_snapshot(
+            staging_dir, output_dir, containers, container_groups, networks, config, {}
+        )
+        manifest['container_count'] = len(containers)
+        manifest['source'] = os.path.abspath(dump_path)
+        manifest['stats'] = stats
+        write_manifest(staging_dir, manifest)
+        publish_snapshot(staging_dir, output_dir)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    return dump_path, output_dir, len(generated_files)
+
+
+def _generate_from_dump_task(task):
+    return generate_from_dump(*task)
+
+
+def run_from_dump(path, output_root, workers=None):
+    """离线生成：每个转储文件输出到 output_root/<文件名> 目录，多个转储文件用进程池并行处理
+    
+    文件名（不含扩展名）相同的转储（如a.json和a.ndjson）改用带扩展名的目录名，避免并行写入同一目录
+    """
+    config = load_config()
+    dumps = find_dumps(path)
+    if not dumps:
+        print(f"未找到转储文件: {path}")
+        return []
+    
+    workers = workers or get_worker_count(config)
+    stems = [os.path.splitext(os.path.basename(dump_path))[0] for dump_path in dumps]
+    tasks = []
+    for dump_path, stem in zip(dumps, stems):
+        name = stem if stems.count(stem) == 1 else os.path.basename(dump_path)
+        # 多个转储并行处理时，每个转储内部串行生成，避免嵌套进程池
+        dump_workers = '1' if len(dumps) > 1 else str(workers)
+        tasks.append((dump_path, os.path.join(output_root, name), {**config, 'WORKERS': dump_workers}))
+    
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            results = list(executor.map(_generate_from_dump_task, tasks))
+    else:
+        results = [_generate_from_dump_task(task) for task in tasks]
+    
+    print("\n离线生成完成:")
+    for dump_path, output_dir, count in results:
+        if output_dir:
+            print(f"- {dump_path} -> {output_dir} ({count} 个文件)")
+        else:
+            print(f"- {dump_path}: 未找到容器，已跳过")
+    return results
+
+
+def parse_args(argv=None):
+    """解析命令行参数，不带参数时按原有方式读取本机Docker"""
+    parser = argparse.ArgumentParser(description='根据Docker容器生成docker-compose文件')
+    parser.add_argument('--from-dump', metavar='PATH',
+                        help='从保存的docker inspect输出（JSON或NDJSON文件，或包含这些文件的目录）离线生成')
+    parser.add_argument('--output', metavar='DIR',
+                        help='离线生成的输出根目录，默认使用OUTPUT_DIR环境变量或compose')
+    parser.add_argument('--workers', type=int, help='并行进程数，默认使用配置中的WORKERS')
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.from_dump:
+        run_from_dump(args.from_dump, args.output or os.getenv('OUTPUT_DIR', 'compose'), args.workers)
+    else:
+        main()
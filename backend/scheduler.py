@@ -14,10 +14,12 @@ from croniter import croniter
 from cron_utils import CronUtils
 import pytz
 import signal
-import os
+import threading
+from scheduler_status import STATUS_FILE, HEARTBEAT_INTERVAL, write_status
+from d2c import read_last_history
 
 class D2CScheduler:
-    def __init__(self, config_file='/app/config/config.json'):
+    def __init__(self, config_file='/app/config/config.json', status_file=STATUS_FILE):
         self.config_file = config_file
         self.running = True
         
@@ -25,6 +27,21 @@ class D2CScheduler:
         self.cron_utils = CronUtils()
         self.cron_utils.set_debug(True)
         
+        # 状态文件，供Web界面读取调度器状态
+        self.status_file = status_file
+        self.status = {
+            'pid': os.getpid(),
+            'state': 'starting',
+            'cron': None,
+            'is_6_field': None,
+            'next_run': None,
+            'last_run': None,
+            'started_at': datetime.now().astimezone().isoformat(),
+            'heartbeat': None
+        }
+        self.status_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        
         self.setup_signal_handlers()
         
     def setup_signal_handlers(self):
@@ -36,6 +53,28 @@ class D2CScheduler:
         """信号处理函数"""
         print(f"\n收到信号 {signum}，正在优雅退出...")
         self.running = False
+        self.stop_event.set()
+        
+    def update_status(self, **fields):
+        """更新状态字段并刷新心跳时间，写入失败不影响调度"""
+        with self.status_lock:
+            self.status.update(fields)
+            self.status['heartbeat'] = time.time()
+            try:
+                write_status(self.status, self.status_file)
+            except Exception as e:
+                print(f"写入状态文件失败: {e}")
+                
+    def heartbeat_loop(self):
+        """后台定期刷新心跳，执行任务期间也保持状态文件新鲜"""
+        while not self.stop_event.wait(HEARTBEAT_INTERVAL):
+            self.update_status()
+            
+    def start_heartbeat(self):
+        """启动心跳线程"""
+        thread = threading.Thread(target=self.heartbeat_loop, name='scheduler-heartbeat', daemon=True)
+        thread.start()
+        return thread
         
     def load_config(self):
         """加载配置文件"""
@@ -129,8 +168,19 @@ class D2CScheduler:
             cron = croniter(cron_expr, now)
             return cron.get_next(datetime)
             
+    @staticmethod
+    def parse_time(value):
+        """解析ISO时间，无效时返回None"""
+        try:
+            return datetime.fromisoformat(value).astimezone()
+        except (TypeError, ValueError):
+            return None
+            
     def run_d2c_task(self):
-        """执行D2C任务"""
+        """执行D2C任务，结果记录到状态文件的last_run字段"""
+        started = datetime.now().astimezone()
+        last_run = {'started_at': started.isoformat(), 'finished_at': None, 'success': False, 'status': 'failed', 'message': ''}
+        self.update_status(state='running')
         try:
             # 生成时间戳目录，使用config.json中的时区配置
             import subprocess
@@ -158,23 +208,38 @@ class D2CScheduler:
             
             if result.returncode == 0:
                 print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] D2C任务执行成功")
+                last_run.update(success=True, status='changed', message='执行成功', output_dir=output_dir)
+                # d2c.py在清单未变化时跳过生成，结果以本次运行写入的运行记录为准
+                record = read_last_history()
+                if record and self.parse_time(record.get('time')) and self.parse_time(record['time']) >= started:
+                    last_run['status'] = record.get('status', 'changed')
+                    last_run['output_dir'] = record.get('output_dir', output_dir)
                 if result.stdout:
                     print(f"输出: {result.stdout.strip()}")
             else:
                 print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] D2C任务执行失败")
+                last_run['message'] = (result.stderr or '').strip()[-500:] or f'退出码 {result.returncode}'
                 if result.stderr:
                     print(f"错误: {result.stderr.strip()}")
                     
         except subprocess.TimeoutExpired:
             print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] D2C任务执行超时")
+            last_run['message'] = '执行超时'
         except Exception as e:
             print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] D2C任务执行异常: {e}")
+            last_run['message'] = str(e)
+        
+        last_run['finished_at'] = datetime.now().astimezone().isoformat()
+        self.update_status(state='waiting', last_run=last_run)
             
     def run(self):
         """主运行循环"""
         print("D2C精确调度器启动")
         print(f"配置文件: {self.config_file}")
         
+        self.update_status(state='starting')
+        self.start_heartbeat()
+        
         while self.running:
             try:
                 # 重新加载配置（支持动态更新）
@@ -187,6 +252,8 @@ class D2CScheduler:
                 # 计算下次执行时间
                 next_run = self.calculate_next_run(parsed_cron, is_6_field)
                 print(f"下次执行时间: {next_run.strftime('%Y-%m-%d %H:%M:%S')}")
+                self.update_status(state='waiting', cron=cron_expr, is_6_field=is_6_field,
+                                   next_run=next_run.isoformat(), error=None)
                 
                 # 等待到执行时间
                 while self.running:
@@ -218,9 +285,12 @@ class D2CScheduler:
                 break
             except Exception as e:
                 print(f"调度器运行异常: {e}")
+                self.update_status(state='error', error=str(e), next_run=None)
                 print("等待30秒后重试...")
                 time.sleep(30)
                 
+        self.stop_event.set()
+        self.update_status(state='stopped', next_run=None)
         print("D2C精确调度器已停止")
 
 def main():
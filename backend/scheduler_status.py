@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+调度器状态文件
+scheduler.py定期写入PID、状态、CRON表达式、下次执行时间、最后执行结果和心跳时间，
+Web界面直接读取该文件判断调度器状态，不再调用scheduler_manager.sh status
+"""
+
+import json
+import os
+import time
+
+
+STATUS_FILE = os.getenv('SCHEDULER_STATUS_FILE', '/tmp/d2c_scheduler_status.json')
+
+# 心跳间隔（秒），超过STALE_AFTER秒未更新视为调度器已失去响应
+HEARTBEAT_INTERVAL = 10
+STALE_AFTER = HEARTBEAT_INTERVAL * 3
+
+# 系统CRON任务文件和cron守护进程的PID文件
+SYSTEM_CRON_FILE = '/etc/cron.d/d2c-cron'
+CRON_PID_FILES = ('/var/run/crond.pid', '/run/crond.pid')
+
+
+def write_status(status, path=STATUS_FILE):
+    """原子写入状态文件，读取方不会看到写了一半的内容"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(status, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def pid_alive(pid):
+    """通过信号0检查进程是否存在"""
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_status(path=STATUS_FILE, stale_after=STALE_AFTER, now=None):
+    """读取状态文件
+
+    Returns:
+        状态字典，附加alive字段：进程存在、心跳未过期且未处于stopped状态时为True；
+        文件不存在或无法解析时返回None
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(status, dict):
+        return None
+
+    now = time.time() if now is None else now
+    heartbeat = status.get('heartbeat') or 0
+    status['stale'] = now - heartbeat > stale_after
+    status['alive'] = (
+        status.get('state') != 'stopped'
+        and not status['stale']
+        and pid_alive(status.get('pid'))
+    )
+    return status
+
+
+def _read_pid(path):
+    try:
+        with open(path, 'r') as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def cron_daemon_running():
+    """检查cron守护进程，优先使用PID文件，没有时扫描/proc"""
+    for pid_file in CRON_PID_FILES:
+        pid = _read_pid(pid_file)
+        if pid is not None:
+            return pid_alive(pid)
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return False
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/comm', 'r') as f:
+                if f.read().strip() in ('cron', 'crond'):
+                    return True
+        except OSError:
+            continue
+    return False
+
+
+def system_cron_running():
+    """与scheduler_manager.sh的check_system_cron_status一致：任务文件存在且cron在运行"""
+    return os.path.exists(SYSTEM_CRON_FILE) and cron_daemon_running()
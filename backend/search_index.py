@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compose快照搜索索引
+根据各快照manifest.json中记录的容器名、镜像、宿主机端口、卷、网络和环境变量名建立倒排索引，
+新快照出现时只读取新增或变化的快照清单，不重新扫描YAML文件
+"""
+
+import threading
+
+
+# 可搜索字段 -> 清单中容器记录的字段
+SEARCH_FIELDS = {
+    'name': 'name',
+    'image': 'image',
+    'port': 'ports',
+    'volume': 'volumes',
+    'network': 'networks',
+    'env': 'env'
+}
+
+# 端口只做精确匹配，其它字段支持子串匹配
+EXACT_FIELDS = ('port',)
+
+
+def _values(container, key):
+    value = container.get(key)
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value if v is not None]
+    return [str(value)]
+
+
+class SearchIndex:
+    """基于SnapshotIndex的倒排索引
+
+    _postings: 字段 -> 词(小写) -> {快照名: [(文件, 容器名, 原始值), ...]}
+    每个快照记录清单的mtime和写入过的词，快照变化或删除时只撤销该快照的记录。
+    """
+
+    def __init__(self, snapshot_index):
+        self.snapshot_index = snapshot_index
+        self._lock = threading.Lock()
+        self._postings = {field: {} for field in SEARCH_FIELDS}
+        self._snapshots = {}      # 快照名 -> (目录mtime_ns, [(字段, 词), ...])
+
+    def update(self):
+        """同步快照列表：只读取新增或目录mtime变化的快照清单，移除已删除的快照，返回变化的快照数"""
+        folders = self.snapshot_index.folder_mtimes()
+        with self._lock:
+            removed = [name for name in self._snapshots if name not in folders]
+            pending = [name for name, mtime_ns in folders.items()
+                       if self._snapshots.get(name, (None,))[0] != mtime_ns]
+        if not removed and not pending:
+            return 0
+
+        manifests = {name: self.snapshot_index.manifest(name) for name in pending}
+        with self._lock:
+            for name in removed:
+                self._remove(name)
+            for name, manifest in manifests.items():
+                if name in self._snapshots:
+                    self._remove(name)
+                self._add(name, folders[name], manifest)
+        return len(removed) + len(pending)
+
+    def _add(self, name, mtime_ns, manifest):
+        terms = []
+        for entry in (manifest or {}).get('files', []):
+            for container in entry.get('containers', []):
+                hit = (entry['file'], container.get('name'))
+                for field, key in SEARCH_FIELDS.items():
+                    for value in _values(container, key):
+                        term = value.lower()
+                        self._postings[field].setdefault(term, {}).setdefault(name, []).append(hit + (value,))
+                        terms.append((field, term))
+        self._snapshots[name] = (mtime_ns, terms)
+
+    def _remove(self, name):
+        _, terms = self._snapshots.pop(name)
+        for field, term in set(terms):
+            postings = self._postings[field].get(term)
+            if postings is None:
+                continue
+            postings.pop(name, None)
+            if not postings:
+                del self._postings[field][term]
+
+    def search(self, query, field=None, limit=100):
+        """搜索，结果按快照名倒序（最新的在前）
+
+        Args:
+            query: 搜索词，不区分大小写；端口精确匹配，其它字段按子串匹配
+            field: 只搜索指定字段（name/image/port/volume/network/env），为None时搜索全部字段
+            limit: 最多返回的结果数
+
+        Returns:
+            (结果列表, 匹配总数)
+        """
+        self.update()
+        query = str(query).strip().lower()
+        if not query:
+            return [], 0
+        fields = [field] if field else list(SEARCH_FIELDS)
+        with self._lock:
+            matches = {}
+            for name_field in fields:
+                postings = self._postings.get(name_field, {})
+                if name_field in EXACT_FIELDS:
+                    terms = [query] if query in postings else []
+                else:
+                    terms = [term for term in postings if query in term]
+                for term in terms:
+                    for snapshot, hits in postings[term].items():
+                        matches.setdefault(snapshot, []).append((name_field, hits))
+
+            # 只为返回的前limit条生成结果字典，其余只计数
+            results = []
+            total = 0
+            for snapshot in sorted(matches, reverse=True):
+                snapshot_hits = [(file, container or '', name_field, value)
+                                 for name_field, hits in matches[snapshot]
+                                 for file, container, value in hits]
+                total += len(snapshot_hits)
+                if len(results) >= limit:
+                    continue
+                snapshot_hits.sort()
+                for file, container, name_field, value in snapshot_hits[:limit - len(results)]:
+                    results.append({
+                        'snapshot': snapshot,
+                        'file': file,
+                        'container': container or None,
+                        'field': name_field,
+                        'value': value
+                    })
+            return results, total
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+快照打包下载
+边读文件边生成ZIP或tar.gz数据块，不在磁盘或内存中生成完整的压缩包
+"""
+
+import os
+import tarfile
+import time
+import zipfile
+
+
+# 每次读取源文件的字节数
+READ_SIZE = 64 * 1024
+
+ARCHIVE_FORMATS = {
+    'zip': ('application/zip', '.zip'),
+    'tar.gz': ('application/gzip', '.tar.gz')
+}
+
+
+class _ChunkSink:
+    """只写的文件对象，收集压缩库写入的数据，由生成器取走后清空"""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(files):
+    """按块产出ZIP数据
+
+    Args:
+        files: [(包内文件名, 文件路径), ...]
+    """
+    sink = _ChunkSink()
+    # 输出流不可回退，zipfile使用数据描述符在文件数据之后写入大小和CRC
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for arcname, path in files:
+            stat = os.stat(path)
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime(stat.st_mtime)[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            with open(path, 'rb') as src, archive.open(info, 'w') as dest:
+                for block in iter(lambda: src.read(READ_SIZE), b''):
+                    dest.write(block)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def iter_tar_gz(files):
+    """按块产出tar.gz数据，参数同iter_zip"""
+    sink = _ChunkSink()
+    with tarfile.open(fileobj=sink, mode='w|gz') as archive:
+        for arcname, path in files:
+            info = archive.gettarinfo(path, arcname=arcname)
+            info.uid = info.gid = 0
+            info.uname = info.gname = ''
+            with open(path, 'rb') as src:
+                archive.addfile(info, src)
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def iter_archive(files, archive_format):
+    """按格式（'zip'或'tar.gz'）返回压缩包数据块生成器"""
+    if archive_format == 'zip':
+        return iter_zip(files)
+    return iter_tar_gz(files)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+快照结构化对比
+按服务和字段比较两个快照中的compose文件：清单中sha256相同的文件直接跳过，
+其余文件的解析结果按(路径, mtime, 大小)缓存在LRU中，重复对比最近的快照时不再重复解析YAML
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+import yaml
+
+from snapshot_index import scan_yaml_files
+
+
+class YamlCache:
+    """解析后YAML的LRU缓存，文件mtime或大小变化时重新解析"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items = OrderedDict()   # 路径 -> ((mtime_ns, size), 解析结果)
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path):
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            item = self._items.get(path)
+            if item and item[0] == key:
+                self._items.move_to_end(path)
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+
+        with self._lock:
+            self._items[path] = (key, data)
+            self._items.move_to_end(path)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return data
+
+
+def _file_hashes(folder_path, manifest):
+    """返回 {文件名: sha256}：优先使用清单记录，没有清单时按文件内容计算"""
+    if manifest:
+        return {entry['file']: entry.get('sha256') for entry in manifest.get('files', [])
+                if os.path.exists(os.path.join(folder_path, entry['file']))}
+    hashes = {}
+    for item in scan_yaml_files(folder_path):
+        digest = hashlib.sha256()
+        with open(item['path'], 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+        hashes[item['name']] = digest.hexdigest()
+    return hashes
+
+
+def diff_values(old, new, path=''):
+    """递归比较两个值，返回字段级变化列表 [{'field': 路径, 'from': 旧值, 'to': 新值}]
+
+    字典逐键比较，列表和标量整体比较。
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in list(old) + [k for k in new if k not in old]:
+            field = f"{path}.{key}" if path else str(key)
+            if key not in new:
+                changes.append({'field': field, 'from': old[key], 'to': None})
+            elif key not in old:
+                changes.append({'field': field, 'from': None, 'to': new[key]})
+            else:
+                changes.extend(diff_values(old[key], new[key], field))
+        return changes
+    return [{'field': path, 'from': old, 'to': new}]
+
+
+def _services(cache, folder_path, filenames):
+    """解析指定文件，返回 {服务名: (文件名, 服务配置)} 和 {网络名: 网络配置}"""
+    services = {}
+    networks = {}
+    for filename in filenames:
+        compose = cache.load(os.path.join(folder_path, filename))
+        for name, service in (compose.get('services') or {}).items():
+            services[name] = (filename, service)
+        networks.update(compose.get('networks') or {})
+    return services, networks
+
+
+def diff_snapshots(compose_dir, from_name, to_name, from_manifest=None, to_manifest=None, cache=None):
+    """按服务和字段比较两个快照
+
+    Args:
+        compose_dir: compose根目录
+        from_name, to_name: 快照文件夹名
+        from_manifest, to_manifest: 快照清单，为None时按文件内容计算哈希
+        cache: YamlCache，为None时使用临时缓存
+
+    Returns:
+        dict: files（新增/删除/变化的文件和未变化数量）、services（新增/删除/变化的服务及字段变化）、networks
+    """
+    cache = cache or YamlCache()
+    from_path = os.path.join(compose_dir, from_name)
+    to_path = os.path.join(compose_dir, to_name)
+    from_hashes = _file_hashes(from_path, from_manifest)
+    to_hashes = _file_hashes(to_path, to_manifest)
+
+    # 内容哈希相同的文件（即使改了文件名）里的服务一定没有变化，不需要解析
+    shared = set(from_hashes.values()) & set(to_hashes.values())
+    shared.discard(None)
+    from_changed = sorted(name for name, digest in from_hashes.items() if digest not in shared)
+    to_changed = sorted(name for name, digest in to_hashes.items() if digest not in shared)
+
+    old_services, old_networks = _services(cache, from_path, from_changed)
+    new_services, new_networks = _services(cache, to_path, to_changed)
+
+    services = {'added': [], 'removed': [], 'changed': []}
+    for name in sorted(set(old_services) | set(new_services)):
+        if name not in old_services:
+            services['added'].append({'name': name, 'file': new_services[name][0]})
+        elif name not in new_services:
+            services['removed'].append({'name': name, 'file': old_services[name][0]})
+        else:
+            old_file, old_service = old_services[name]
+            new_file, new_service = new_services[name]
+            changes = diff_values(old_service, new_service)
+            if changes or old_file != new_file:
+                services['changed'].append({
+                    'name': name,
+                    'from_file': old_file,
+                    'to_file': new_file,
+                    'changes': changes
+                })
+
+    # 有清单时按清单中各文件的网络列表判断网络增删，未解析的文件中的网络也计算在内
+    if from_manifest and to_manifest:
+        old_names = {n for entry in from_manifest.get('files', []) for n in entry.get('networks', [])}
+        new_names = {n for entry in to_manifest.get('files', []) for n in entry.get('networks', [])}
+    else:
+        old_names, new_names = set(old_networks), set(new_networks)
+
+    return {
+        'from': from_name,
+        'to': to_name,
+        'files': {
+            'added': sorted(set(to_hashes) - set(from_hashes)),
+            'removed': sorted(set(from_hashes) - set(to_hashes)),
+            'changed': sorted(name for name in set(from_hashes) & set(to_hashes)
+                              if from_hashes[name] != to_hashes[name] or from_hashes[name] is None),
+            'unchanged': sum(1 for name in set(from_hashes) & set(to_hashes)
+                             if from_hashes[name] == to_hashes[name] and from_hashes[name] is not None)
+        },
+        'services': services,
+        'networks': {
+            'added': sorted(new_names - old_names),
+            'removed': sorted(old_names - new_names),
+            'changed': diff_values(
+                {k: v for k, v in old_networks.items() if k in new_networks},
+                {k: v for k, v in new_networks.items() if k in old_networks}
+            )
+        }
+    }
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compose快照目录索引
+使用os.scandir扫描/app/compose，按目录mtime增量刷新，并为列表结果生成ETag
+"""
+
+import os
+import re
+import json
+import bisect
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+YAML_SUFFIXES = ('.yaml', '.yml')
+
+# 每个快照目录中由d2c写入的清单文件
+MANIFEST_NAME = 'manifest.json'
+
+# 指向最新快照目录的符号链接，由d2c在快照发布完成后最后更新
+LATEST_LINK = 'latest'
+
+# d2c写入中的临时目录前缀，发布时整体重命名为最终目录
+STAGING_PREFIX = '.tmp-'
+
+# 定时任务生成的快照目录名格式：YYYY_MM_DD_HH_MM
+SNAPSHOT_NAME_RE = re.compile(r'^(\d{4})_(\d{2})_(\d{2})_(\d{2})_(\d{2})$')
+
+# 最多缓存多少个文件的内容哈希
+CONTENT_HASH_CACHE_SIZE = 4096
+
+# 最多缓存多少个快照的清单（搜索索引会逐个读取全部快照的清单）
+MANIFEST_CACHE_SIZE = 256
+
+
+def _file_entry(dir_entry):
+    """根据DirEntry生成文件信息（复用scandir返回的stat结果）"""
+    stat = dir_entry.stat()
+    return {
+        'name': dir_entry.name,
+        'path': dir_entry.path,
+        'modified': stat.st_mtime,
+        'size': stat.st_size,
+        'type': 'file'
+    }
+
+
+def scan_yaml_files(dir_path):
+    """扫描目录下的yaml文件，按修改时间倒序返回"""
+    files = []
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if entry.name.endswith(YAML_SUFFIXES) and entry.is_file():
+                    files.append(_file_entry(entry))
+    except FileNotFoundError:
+        return []
+    files.sort(key=lambda x: x['modified'], reverse=True)
+    return files
+
+
+def read_manifest(folder_path):
+    """读取快照目录的manifest.json，不存在或损坏时返回None"""
+    try:
+        with open(os.path.join(folder_path, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"读取快照清单失败 {folder_path}: {e}")
+        return None
+    # 容器名 -> 文件记录，便于按容器查找
+    manifest['_containers'] = {
+        container['name']: entry
+        for entry in manifest.get('files', [])
+        for container in entry.get('containers', [])
+    }
+    return manifest
+
+
+def resolve_latest(compose_dir):
+    """读取latest链接，返回最新快照目录名，链接不存在或目标已删除时返回None"""
+    try:
+        target = os.readlink(os.path.join(compose_dir, LATEST_LINK))
+    except OSError:
+        return None
+    name = os.path.basename(os.path.normpath(target))
+    if not name or not os.path.isdir(os.path.join(compose_dir, name)):
+        return None
+    return name
+
+
+class SnapshotIndex:
+    """compose目录的内存索引
+
+    根目录每次刷新时只做一次scandir；子目录仅在其mtime变化（新增/删除/重命名文件）
+    或被显式invalidate时才重新扫描，结果列表和ETag只在内容变化时重建。
+    """
+
+    def __init__(self, compose_dir='/app/compose', min_refresh_interval=1.0):
+        self.compose_dir = compose_dir
+        self.min_refresh_interval = min_refresh_interval
+        self._lock = threading.Lock()
+        self._folders = {}        # 文件夹名 -> (mtime_ns, 文件夹信息或None)
+        self._root_files = []
+        self._listing = None
+        self._etag = None
+        self._names = []          # 含yaml文件的文件夹名，升序
+        self._tree_cache = {}
+        self._manifests = OrderedDict()  # 文件夹名 -> (mtime_ns, manifest或None)
+        self._hashes = OrderedDict()  # 文件路径 -> ((mtime_ns, size), sha256)
+        self._last_refresh = 0.0
+        self._dirty = True
+
+    def invalidate(self, path=None):
+        """标记索引失效，path为具体文件夹/文件时只重新扫描对应文件夹"""
+        with self._lock:
+            self._dirty = True
+            if path:
+                rel = os.path.relpath(os.path.abspath(path), os.path.abspath(self.compose_dir))
+                folder = rel.split(os.sep, 1)[0]
+                self._folders.pop(folder, None)
+
+    def refresh(self, force=False):
+        """增量刷新索引，返回索引内容是否发生变化"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and not self._dirty and now - self._last_refresh < self.min_refresh_interval:
+                return False
+            self._last_refresh = now
+            self._dirty = False
+
+            root_files = []
+            folders = {}
+            changed = self._listing is None
+
+            try:
+                it = os.scandir(self.compose_dir)
+            except FileNotFoundError:
+                it = None
+
+            if it is not None:
+                with it:
+                    for entry in it:
+                        # 跳过latest链接和写入中的临时目录
+                        if entry.name.startswith('.') or entry.is_symlink():
+                            continue
+                        if entry.is_file():
+                            if entry.name.endswith(YAML_SUFFIXES):
+                                root_files.append(_file_entry(entry))
+                        elif entry.is_dir():
+                            mtime_ns = entry.stat().st_mtime_ns
+                            cached = self._folders.get(entry.name)
+                            if cached and cached[0] == mtime_ns:
+                                folders[entry.name] = cached
+                                continue
+                            changed = True
+                            folders[entry.name] = (mtime_ns, self._scan_folder(entry, mtime_ns))
+
+            root_files.sort(key=lambda x: x['modified'], reverse=True)
+            if set(folders) != set(self._folders) or root_files != self._root_files:
+                changed = True
+
+            self._folders = folders
+            self._root_files = root_files
+            # 已删除的快照不再保留清单缓存
+            for name in [name for name in self._manifests if name not in folders]:
+                del self._manifests[name]
+            if changed:
+                self._rebuild()
+            return changed
+
+    def _scan_folder(self, dir_entry, mtime_ns):
+        """扫描单个快照文件夹，没有yaml文件时返回None"""
+        files = scan_yaml_files(dir_entry.path)
+        if not files:
+            return None
+        return {
+            'name': dir_entry.name,
+            'path': dir_entry.path,
+            'modified': mtime_ns / 1e9,
+            'files': files,
+            'type': 'folder'
+        }
+
+    def _rebuild(self):
+        """重建列表结果和ETag"""
+        folder_items = [info for _, info in self._folders.values() if info]
+        folder_items.sort(key=lambda x: x['modified'], reverse=True)
+
+        digest = hashlib.sha1()
+        for item in self._root_files:
+            digest.update(f"{item['name']}|{item['modified']}|{item['size']}\n".encode('utf-8'))
+        for name in sorted(self._folders):
+            mtime_ns, info = self._folders[name]
+            digest.update(f"{name}|{mtime_ns}|{len(info['files']) if info else 0}\n".encode('utf-8'))
+            if info:
+                for item in info['files']:
+                    digest.update(f"{item['name']}|{item['modified']}|{item['size']}\n".encode('utf-8'))
+
+        self._listing = {
+            'root': self._root_files,
+            'folders': {item['name']: item for item in folder_items}
+        }
+        self._names = sorted(item['name'] for item in folder_items)
+        self._tree_cache = {}
+        self._etag = digest.hexdigest()
+
+    def listing(self):
+        """返回(列表数据, ETag)，列表结构与/api/files保持一致"""
+        self.refresh()
+        with self._lock:
+            return self._listing, self._etag
+
+    @staticmethod
+    def _summary(info):
+        """文件夹摘要信息（不含文件列表）"""
+        return {
+            'name': info['name'],
+            'path': info['path'],
+            'modified': info['modified'],
+            'file_count': len(info['files']),
+            'type': 'folder'
+        }
+
+    def page(self, limit=50, cursor=None, prefix=None):
+        """按文件夹名倒序（即时间倒序）分页列出快照文件夹
+
+        Args:
+            limit: 每页数量
+            cursor: 上一页返回的next_cursor，返回名称小于cursor的文件夹
+            prefix: 只列出以prefix开头的文件夹，如 2025_01_03
+
+        Returns:
+            (dict, etag): 包含folders、next_cursor、total，首页额外包含根目录文件
+        """
+        self.refresh()
+        with self._lock:
+            names = self._names
+            lo, hi = 0, len(names)
+            if prefix:
+                lo = bisect.bisect_left(names, prefix)
+                hi = bisect.bisect_left(names, prefix + '\uffff')
+            end = min(hi, bisect.bisect_left(names, cursor)) if cursor else hi
+            start = max(lo, end - limit)
+
+            folders_by_name = self._listing['folders']
+            folders = [self._summary(folders_by_name[name]) for name in reversed(names[start:end])]
+            result = {
+                'folders': folders,
+                'next_cursor': names[start] if start > lo and folders else None,
+                'total': hi - lo
+            }
+            if not cursor and not prefix:
+                result['root'] = self._root_files
+            return result, self._etag
+
+    def folder_mtimes(self):
+        """返回 {快照文件夹名: 目录mtime_ns}，只包含含有yaml文件的文件夹"""
+        self.refresh()
+        with self._lock:
+            return {name: mtime_ns for name, (mtime_ns, info) in self._folders.items() if info}
+
+    def folder(self, name):
+        """返回(文件夹信息, ETag)，文件夹信息含文件列表，不存在时为None"""
+        self.refresh()
+        with self._lock:
+            return self._listing['folders'].get(name), self._etag
+
+    def date_tree(self, year=None, month=None):
+        """按 年→月→日 汇总快照数量
+
+        不传参数时返回年份列表，传year时返回该年的月份，传year和month时返回该月的日期。
+        名称不符合时间戳格式的文件夹不参与汇总。
+        """
+        self.refresh()
+        with self._lock:
+            key = (year, month)
+            if key not in self._tree_cache:
+                counts = {}
+                for name in self._names:
+                    match = SNAPSHOT_NAME_RE.match(name)
+                    if not match:
+                        continue
+                    y, m, d = match.group(1), match.group(2), match.group(3)
+                    if year is None:
+                        node = y
+                    elif y != year:
+                        continue
+                    elif month is None:
+                        node = m
+                    elif m != month:
+                        continue
+                    else:
+                        node = d
+                    counts[node] = counts.get(node, 0) + 1
+                self._tree_cache[key] = [
+                    {'key': node, 'count': counts[node]} for node in sorted(counts, reverse=True)
+                ]
+            return self._tree_cache[key], self._etag
+
+    def manifest(self, name):
+        """读取快照文件夹的清单（按文件夹mtime缓存），没有清单时返回None"""
+        folder_path = os.path.join(self.compose_dir, name)
+        try:
+            mtime_ns = os.stat(folder_path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            hit = self._manifests.get(name)
+            if hit and hit[0] == mtime_ns:
+                self._manifests.move_to_end(name)
+                return hit[1]
+
+        manifest = read_manifest(folder_path)
+        with self._lock:
+            self._manifests[name] = (mtime_ns, manifest)
+            self._manifests.move_to_end(name)
+            while len(self._manifests) > MANIFEST_CACHE_SIZE:
+                self._manifests.popitem(last=False)
+        return manifest
+
+    def content_hash(self, path):
+        """返回文件内容的sha256，按(mtime_ns, 大小)缓存，文件未变化时不重新读取"""
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            hit = self._hashes.get(path)
+            if hit and hit[0] == key:
+                self._hashes.move_to_end(path)
+                return hit[1]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+        value = digest.hexdigest()
+        with self._lock:
+            self._hashes[path] = (key, value)
+            self._hashes.move_to_end(path)
+            while len(self._hashes) > CONTENT_HASH_CACHE_SIZE:
+                self._hashes.popitem(last=False)
+        return value
+
+    def latest(self):
+        """返回最新快照目录名：优先读取latest链接，没有链接时按目录名查找"""
+        name = resolve_latest(self.compose_dir)
+        if name:
+            return name
+        self.refresh()
+        with self._lock:
+            return self._names[-1] if self._names else None
+
+    def latest_manifest(self):
+        """返回(文件夹名, 清单)：最新的带清单的快照，不存在时返回(None, None)
+
+        d2c发布快照后会更新latest链接，此时只需一次readlink；
+        旧版本生成的目录没有链接，回退为按目录名倒序查找。
+        """
+        name = resolve_latest(self.compose_dir)
+        if name:
+            manifest = self.manifest(name)
+            if manifest:
+                return name, manifest
+        self.refresh()
+        with self._lock:
+            names = list(self._names)
+        for name in reversed(names):
+            manifest = self.manifest(name)
+            if manifest:
+                return name, manifest
+        return None, None
+
+    def find_container(self, container_name):
+        """根据最新快照的清单查找容器所在的compose文件路径，找不到时返回None"""
+        name, manifest = self.latest_manifest()
+        if not manifest:
+            return None
+        entry = manifest['_containers'].get(container_name)
+        if not entry:
+            return None
+        return os.path.join(self.compose_dir, name, entry['file'])
@@ -3,11 +3,207 @@
  * 处理前端交互逻辑和API调用
  */
 
+/**
+ * 可变高度的虚拟列表
+ * 只渲染滚动区域可见范围（上下各留一段缓冲）内的行，其余行用占位元素代替；
+ * 行高在渲染后通过ResizeObserver测量并按key缓存，未测量的行使用估计高度
+ */
+class VirtualList {
+    /**
+     * @param {HTMLElement} scrollElement 可滚动的列表容器
+     * @param {Object} options renderRow(row, index) 返回行HTML；rowKey(row, index) 返回行的唯一标识；
+     *     estimateHeight 未测量行的估计高度；overscan 可见范围上下额外渲染的像素；
+     *     onRender(elements) / onUnmount(elements) 行元素插入后 / 移除前的回调
+     */
+    constructor(scrollElement, options) {
+        this.scrollElement = scrollElement;
+        this.renderRow = options.renderRow;
+        this.rowKey = options.rowKey || ((row, index) => index);
+        this.estimateHeight = options.estimateHeight || 48;
+        this.overscan = options.overscan || 600;
+        this.onRender = options.onRender || null;
+        this.onUnmount = options.onUnmount || null;
+        this.rows = [];
+        this.heights = new Map();
+        this.range = null;
+        this.frame = null;
+        this.observer = new ResizeObserver(entries => this.handleResize(entries));
+        this.handleScroll = () => this.schedule();
+        scrollElement.addEventListener('scroll', this.handleScroll, { passive: true });
+    }
+
+    /**
+     * 替换全部行并重新渲染
+     */
+    setRows(rows) {
+        this.rows = rows;
+        this.render(true);
+    }
+
+    /**
+     * 清空列表并显示提示内容（加载中、暂无数据、加载失败等）
+     */
+    clear(html = '') {
+        this.unmount();
+        this.rows = [];
+        this.range = null;
+        this.scrollElement.innerHTML = html;
+    }
+
+    /**
+     * 按当前行数据重新渲染可见的行
+     */
+    refresh() {
+        this.render(true);
+    }
+
+    /**
+     * 只重新渲染一行（行不在可见范围内时不需要处理）
+     */
+    refreshRow(index) {
+        const element = this.scrollElement.querySelector(`:scope > .virtual-row[data-index="${index}"]`);
+        if (!element) return;
+        if (this.onUnmount) this.onUnmount([element]);
+        element.innerHTML = this.renderRow(this.rows[index], index);
+        if (this.onRender) this.onRender([element]);
+    }
+
+    /**
+     * 停止监听滚动和尺寸变化
+     */
+    destroy() {
+        if (this.frame) cancelAnimationFrame(this.frame);
+        this.unmount();
+        this.scrollElement.removeEventListener('scroll', this.handleScroll);
+    }
+
+    schedule() {
+        if (this.frame) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render(false);
+        });
+    }
+
+    heightOf(index) {
+        const height = this.heights.get(this.rowKey(this.rows[index], index));
+        return height === undefined ? this.estimateHeight : height;
+    }
+
+    rowElements() {
+        return Array.from(this.scrollElement.querySelectorAll(':scope > .virtual-row'));
+    }
+
+    unmount() {
+        this.observer.disconnect();
+        if (this.onUnmount) this.onUnmount(this.rowElements());
+    }
+
+    render(force) {
+        const scrollTop = this.scrollElement.scrollTop;
+        const viewTop = scrollTop - this.overscan;
+        const viewBottom = scrollTop + this.scrollElement.clientHeight + this.overscan;
+        const count = this.rows.length;
+
+        // 找出与可见范围相交的行 [start, end)，并计算上下占位高度
+        let index = 0;
+        let top = 0;
+        while (index < count && top + this.heightOf(index) <= viewTop) {
+            top += this.heightOf(index);
+            index++;
+        }
+        const start = index;
+        let offset = top;
+        while (index < count && offset < viewBottom) {
+            offset += this.heightOf(index);
+            index++;
+        }
+        const end = index;
+        let bottom = 0;
+        for (; index < count; index++) {
+            bottom += this.heightOf(index);
+        }
+
+        if (force || !this.range) {
+            this.unmount();
+            this.scrollElement.innerHTML = '<div class="virtual-spacer"></div><div class="virtual-spacer"></div>';
+        }
+        this.scrollElement.firstElementChild.style.height = `${top}px`;
+        this.scrollElement.lastElementChild.style.height = `${bottom}px`;
+
+        // 保留仍在范围内的行元素（避免重复渲染和动画重播），移除范围外的行，补上新进入范围的行
+        const existing = new Map();
+        this.rowElements().forEach(element => {
+            const rowIndex = Number(element.dataset.index);
+            if (rowIndex < start || rowIndex >= end) {
+                this.observer.unobserve(element);
+                if (this.onUnmount) this.onUnmount([element]);
+                element.remove();
+            } else {
+                existing.set(rowIndex, element);
+            }
+        });
+        const added = [];
+        let previous = this.scrollElement.firstElementChild;
+        for (let i = start; i < end; i++) {
+            let element = existing.get(i);
+            if (!element) {
+                element = document.createElement('div');
+                element.className = 'virtual-row';
+                element.dataset.index = i;
+                element.innerHTML = this.renderRow(this.rows[i], i);
+                previous.after(element);
+                this.observer.observe(element);
+                added.push(element);
+            }
+            previous = element;
+        }
+        this.range = [start, end];
+        if (added.length && this.onRender) this.onRender(added);
+    }
+
+    handleResize(entries) {
+        let changed = false;
+        entries.forEach(entry => {
+            const element = entry.target;
+            if (!element.isConnected) return;
+            const index = Number(element.dataset.index);
+            if (index >= this.rows.length) return;
+            const key = this.rowKey(this.rows[index], index);
+            const height = element.offsetHeight;
+            if (this.heights.get(key) !== height) {
+                this.heights.set(key, height);
+                changed = true;
+            }
+        });
+        if (changed) this.schedule();
+    }
+}
+
 class D2CWebUI {
     constructor() {
         this.selectedContainers = new Set();
         this.containerGroups = [];
         this.currentYaml = '';
+        this.fileView = 'list';
+        this.filePageSize = 50;
+        this.settings = null;
+        this.schedulerStatus = null;
+        // 进行中的请求：key -> { signature, controller, promise }
+        this.pendingRequests = new Map();
+        // 容器分组虚拟列表状态
+        this.sortedGroups = [];
+        this.expandedGroups = new Set();
+        this.groupVirtualThreshold = 50;
+        // 文件列表虚拟列表状态
+        this.fileRows = [];
+        this.fileNodes = new Map();
+        this.fileNodeSeq = 0;
+        this.selectedFile = null;
+        // 文件内容缓存：key -> { etag, result, size }，Map按最近使用顺序排列
+        this.contentCache = new Map();
+        this.contentCacheLimit = 50;
+        this.contentCacheMaxChars = 5 * 1024 * 1024;
         
         this.init();
     }
@@ -16,10 +212,162 @@ class D2CWebUI {
      * 初始化应用
      */
     init() {
+        this.containerList = new VirtualList(document.getElementById('containerGroups'), {
+            renderRow: (group, index) => this.renderGroup(group, index),
+            rowKey: group => group.id,
+            estimateHeight: 64,
+            onRender: elements => this.mountGroupLists(elements),
+            onUnmount: elements => this.unmountGroupLists(elements)
+        });
+        this.fileListView = new VirtualList(document.getElementById('fileList'), {
+            renderRow: node => this.renderFileNode(node),
+            rowKey: node => node.id,
+            estimateHeight: 64
+        });
         this.bindEvents();
         this.bindNewButtonEvents();
-        this.loadContainers();
-        this.loadFileList();
+        this.loadBootstrap();
+    }
+
+    /**
+     * 首屏加载：一次请求获取容器、快照、配置和任务状态，失败的部分再单独请求
+     */
+    async loadBootstrap() {
+        try {
+            this.showLoading(true);
+            const result = await this.requestJSON('bootstrap', `/api/bootstrap?limit=${this.filePageSize}`);
+            if (!result.success) {
+                throw new Error(result.error || '加载失败');
+            }
+
+            const data = result.data;
+            this.settings = data.settings;
+            this.schedulerStatus = data.scheduler;
+            if (data.containers) {
+                this.containerGroups = data.containers;
+                this.renderContainerGroups();
+            } else {
+                this.loadContainers();
+            }
+            if (data.snapshots && this.fileView === 'list') {
+                this.renderFileList(data.snapshots);
+            } else {
+                this.loadFileList();
+            }
+        } catch (error) {
+            if (this.isAbortError(error)) return;
+            console.error('首屏加载失败，改为分别请求:', error);
+            this.loadContainers();
+            this.loadFileList();
+        } finally {
+            this.showLoading(false);
+        }
+    }
+
+    /**
+     * 获取配置设置，优先使用首屏加载或上次保存时缓存的结果
+     */
+    async getSettings() {
+        if (this.settings) {
+            return this.settings;
+        }
+        const result = await this.requestJSON('settings', '/api/settings');
+        if (!result.success) {
+            throw new Error(result.error || '加载设置失败');
+        }
+        this.settings = result.settings;
+        return this.settings;
+    }
+
+    /**
+     * 发起请求并登记到进行中请求表，返回解析后的JSON
+     * 同一key下相同的请求（方法、地址和请求体都相同）正在进行时直接复用它的结果；
+     * 请求不同时取消旧请求，只保留最新的，旧请求的调用方收到AbortError
+     * handle用于自定义响应的处理（默认解析JSON），结果由复用同一请求的调用方共享
+     */
+    requestJSON(key, url, options = {}, handle = response => response.json()) {
+        const signature = `${options.method || 'GET'} ${url} ${options.body || ''}`;
+        const pending = this.pendingRequests.get(key);
+        if (pending) {
+            if (pending.signature === signature) {
+                return pending.promise;
+            }
+            pending.controller.abort();
+        }
+        
+        const controller = new AbortController();
+        const promise = fetch(url, { ...options, signal: controller.signal })
+            .then(handle)
+            .finally(() => {
+                const current = this.pendingRequests.get(key);
+                if (current && current.controller === controller) {
+                    this.pendingRequests.delete(key);
+                }
+            });
+        this.pendingRequests.set(key, { signature, controller, promise });
+        return promise;
+    }
+
+    /**
+     * 获取文件内容，结果按ETag缓存在内存中
+     * 再次打开时携带If-None-Match，内容未变化时服务端返回304（不读取文件），直接使用缓存
+     */
+    async fetchContent(cacheKey, requestKey, url) {
+        const cached = this.contentCache.get(cacheKey);
+        const headers = cached ? { 'If-None-Match': cached.etag } : {};
+        // 由这里的缓存负责重新验证，不使用浏览器HTTP缓存，以便拿到304
+        const { status, etag, result } = await this.requestJSON(requestKey, url, { headers, cache: 'no-store' }, async response => ({
+            status: response.status,
+            etag: response.headers.get('ETag'),
+            result: response.status === 304 ? null : await response.json()
+        }));
+        
+        if (status === 304 && cached) {
+            // 移到末尾，保持最近使用的顺序
+            this.contentCache.delete(cacheKey);
+            this.contentCache.set(cacheKey, cached);
+            return cached.result;
+        }
+        this.contentCache.delete(cacheKey);
+        if (result && result.success && etag) {
+            this.contentCache.set(cacheKey, { etag, result, size: result.data.content.length });
+            this.trimContentCache();
+        }
+        return result;
+    }
+
+    /**
+     * 按条数和总字符数限制内容缓存，淘汰最久未使用的条目
+     */
+    trimContentCache() {
+        let total = 0;
+        this.contentCache.forEach(entry => { total += entry.size; });
+        for (const [key, entry] of this.contentCache) {
+            if (this.contentCache.size <= this.contentCacheLimit && total <= this.contentCacheMaxChars) {
+                break;
+            }
+            this.contentCache.delete(key);
+            total -= entry.size;
+        }
+    }
+
+    /**
+     * 删除指定路径（或该路径下所有文件）的内容缓存
+     */
+    evictContent(path) {
+        for (const [key, entry] of this.contentCache) {
+            const filepath = entry.result.data.filepath;
+            if (filepath === path || filepath.startsWith(`${path}/`)) {
+                this.contentCache.delete(key);
+            }
+        }
+    }
+
+    /**
+     * 是否为被取消的请求（已被更新的请求取代，不需要提示错误）
+     */
+    isAbortError(error) {
+        return Boolean(error) && error.name === 'AbortError';
     }
 
     /**
@@ -71,6 +419,7 @@ class D2CWebUI {
         
         // 文件列表相关
         document.getElementById('refreshFilesBtn').addEventListener('click', () => this.loadFileList());
+        document.getElementById('fileViewBtn').addEventListener('click', () => this.toggleFileView());
     }
 
     /**
@@ -202,8 +551,7 @@ class D2CWebUI {
     async loadContainers() {
         try {
             this.showLoading(true);
-            const response = await fetch('/api/containers');
-            const result = await response.json();
+            const result = await this.requestJSON('containers', '/api/containers');
 
             if (result.success) {
                 this.containerGroups = result.data;
@@ -213,6 +561,7 @@ class D2CWebUI {
                 throw new Error(result.error || '加载失败');
             }
         } catch (error) {
+            if (this.isAbortError(error)) return;
             console.error('加载容器失败:', error);
             this.showNotification(`加载容器失败: ${error.message}`, 'error');
         } finally {
@@ -221,23 +570,22 @@ class D2CWebUI {
     }
 
     /**
-     * 渲染容器分组
+     * 渲染容器分组（虚拟列表，只渲染可见范围内的分组）
      */
     renderContainerGroups() {
-        const container = document.getElementById('containerGroups');
-        
         if (this.containerGroups.length === 0) {
-            container.innerHTML = `
+            this.sortedGroups = [];
+            this.containerList.clear(`
                 <div class="loading">
                     <i class="fas fa-exclamation-circle"></i>
                     <div>未找到运行中的容器</div>
                 </div>
-            `;
+            `);
             return;
         }
 
         // 对每个分组内的容器按名称排序（英文首字母排序）
-        const sortedGroups = this.containerGroups.map(group => ({
+        this.sortedGroups = this.containerGroups.map(group => ({
             ...group,
             containers: [...group.containers].sort((a, b) => {
                 const nameA = a.name.toLowerCase();
@@ -246,18 +594,28 @@ class D2CWebUI {
             })
         }));
 
-        container.innerHTML = sortedGroups.map((group, index) => {
-            // 计算分组状态
-            const runningCount = group.containers.filter(c => c.status === 'running').length;
-            const stoppedCount = group.containers.length - runningCount;
-            const groupStatus = runningCount > 0 ? 'running' : 'stopped';
-            const statusIcon = groupStatus === 'running' ? 
-                '<span class="group-status-icon running">R</span>' : 
-                '<span class="group-status-icon stopped">S</span>';
-            
-            return `
+        // 默认只展开第一个分组
+        this.expandedGroups = new Set([this.sortedGroups[0].id]);
+        this.containerList.setRows(this.sortedGroups);
+        this.updateSelectionInfo();
+    }
+
+    /**
+     * 渲染单个分组；容器较多的分组在onRender时改用虚拟列表渲染组内容器
+     */
+    renderGroup(group, index) {
+        // 计算分组状态
+        const runningCount = group.containers.filter(c => c.status === 'running').length;
+        const groupStatus = runningCount > 0 ? 'running' : 'stopped';
+        const statusIcon = groupStatus === 'running' ? 
+            '<span class="group-status-icon running">R</span>' : 
+            '<span class="group-status-icon stopped">S</span>';
+        const expanded = this.expandedGroups.has(group.id);
+        const inline = expanded && group.containers.length <= this.groupVirtualThreshold;
+        
+        return `
             <div class="container-group">
-                <div class="group-header ${index === 0 ? 'expanded' : ''}" onclick="app.toggleGroup('${group.id}')">
+                <div class="group-header ${expanded ? 'expanded' : ''}" onclick="app.toggleGroup('${group.id}')">
                     <div class="group-title">
                         ${statusIcon}
                         <span class="group-badge">${group.count}</span>
@@ -265,58 +623,87 @@ class D2CWebUI {
                         <span>${group.name}</span>
                     </div>
                     <div class="group-actions">
-                        <i class="fas fa-chevron-right group-toggle"></i>
+                        <i class="fas fa-chevron-right group-toggle" style="transform: rotate(${expanded ? 90 : 0}deg)"></i>
                     </div>
                 </div>
-                <div class="group-containers" style="display: ${index === 0 ? 'block' : 'none'}">
-                    ${group.containers.map((container, containerIndex) => {
-                        const statusClass = container.status === 'running' ? 'running' : 'stopped';
-                        const statusIcon = container.status === 'running' ? 
-                            '<span class="container-status-badge running">R</span>' : 
-                            '<span class="container-status-badge stopped">S</span>';
-                        
-                        return `
-                        <div class="container-item ${index === 0 && containerIndex === 0 ? 'focused' : ''}" data-id="${container.id}" onclick="app.toggleContainer('${container.id}')">
-                            <div class="container-checkbox ${this.selectedContainers.has(container.id) ? 'checked' : ''}"></div>
-                            <div class="container-info">
-                                <div class="container-name-row">
-                                    <i class="fas fa-box container-icon" style="color: #3498db;"></i>
-                                    <span class="container-name" title="${container.name}">${container.name.length > 14 ? container.name.substring(0, 14) + '...' : container.name}</span>
-                                    <span class="container-status ${container.status.toLowerCase()}" title="${container.status}">${container.status}</span>
-                                </div>
-                                <div class="container-details-row">
-                                    <span class="container-image" title="${container.image}"><i class="fas fa-layer-group" style="color: #e74c3c;"></i> ${container.image}</span>
-                                    <span class="container-network" title="${container.network_mode}"><i class="fas fa-network-wired" style="color: #27ae60;"></i> ${container.network_mode}</span>
-                                </div>
-                            </div>
-                        </div>
-                        `;
-                    }).join('')}
+                <div class="group-containers" data-group="${group.id}" style="display: ${expanded ? 'block' : 'none'}">
+                    ${inline ? group.containers.map((container, containerIndex) => this.renderContainerItem(container, index === 0 && containerIndex === 0)).join('') : ''}
                 </div>
             </div>
-            `;
-        }).join('');
+        `;
+    }
 
-        this.updateSelectionInfo();
+    /**
+     * 渲染单个容器
+     */
+    renderContainerItem(container, focused = false) {
+        const selected = this.selectedContainers.has(container.id);
+        
+        return `
+            <div class="container-item ${focused ? 'focused' : ''} ${selected ? 'selected' : ''}" data-id="${container.id}" onclick="app.toggleContainer('${container.id}')">
+                <div class="container-checkbox ${selected ? 'checked' : ''}"></div>
+                <div class="container-info">
+                    <div class="container-name-row">
+                        <i class="fas fa-box container-icon" style="color: #3498db;"></i>
+                        <span class="container-name" title="${container.name}">${container.name.length > 14 ? container.name.substring(0, 14) + '...' : container.name}</span>
+                        <span class="container-status ${container.status.toLowerCase()}" title="${container.status}">${container.status}</span>
+                    </div>
+                    <div class="container-details-row">
+                        <span class="container-image" title="${container.image}"><i class="fas fa-layer-group" style="color: #e74c3c;"></i> ${container.image}</span>
+                        <span class="container-network" title="${container.network_mode}"><i class="fas fa-network-wired" style="color: #27ae60;"></i> ${container.network_mode}</span>
+                    </div>
+                </div>
+            </div>
+        `;
+    }
+
+    /**
+     * 分组行插入页面后，为展开且容器较多的分组创建组内虚拟列表
+     */
+    mountGroupLists(elements) {
+        elements.forEach(element => {
+            const box = element.querySelector('.group-containers');
+            const group = this.sortedGroups[Number(element.dataset.index)];
+            if (!box || !group || !this.expandedGroups.has(group.id)
+                || group.containers.length <= this.groupVirtualThreshold) {
+                return;
+            }
+            box.virtualList = new VirtualList(box, {
+                renderRow: container => this.renderContainerItem(container),
+                rowKey: container => container.id,
+                estimateHeight: 72,
+                overscan: 300
+            });
+            box.virtualList.setRows(group.containers);
+        });
+    }
+
+    /**
+     * 分组行移除前销毁组内虚拟列表
+     */
+    unmountGroupLists(elements) {
+        elements.forEach(element => {
+            const box = element.querySelector('.group-containers');
+            if (box && box.virtualList) {
+                box.virtualList.destroy();
+                box.virtualList = null;
+            }
+        });
     }
 
     /**
      * 切换分组展开/折叠状态
      */
     toggleGroup(groupId) {
-        const groupHeader = document.querySelector(`[onclick="app.toggleGroup('${groupId}')"]`);
-        const groupContainers = groupHeader.nextElementSibling;
-        const toggle = groupHeader.querySelector('.group-toggle');
+        const index = this.sortedGroups.findIndex(group => group.id === groupId);
+        if (index === -1) return;
         
-        if (groupContainers.style.display === 'none') {
-            groupContainers.style.display = 'block';
-            groupHeader.classList.add('expanded');
-            toggle.style.transform = 'rotate(90deg)';
+        if (this.expandedGroups.has(groupId)) {
+            this.expandedGroups.delete(groupId);
         } else {
-            groupContainers.style.display = 'none';
-            groupHeader.classList.remove('expanded');
-            toggle.style.transform = 'rotate(0deg)';
+            this.expandedGroups.add(groupId);
         }
+        this.containerList.refreshRow(index);
     }
 
     /**
@@ -340,8 +727,7 @@ class D2CWebUI {
      */
     async loadContainerComposeFile(containerId) {
         try {
-            const response = await fetch(`/api/compose-file/${containerId}`);
-            const result = await response.json();
+            const result = await this.fetchContent(`container:${containerId}`, 'compose-file', `/api/compose-file/${containerId}`);
             
             if (result.success) {
                 // 加载对应的compose文件内容
@@ -409,6 +795,17 @@ class D2CWebUI {
         saveBtn.disabled = !yamlEditor.value.trim();
     }
 
+    /**
+     * 读取/api/compose的响应：成功时服务端只返回YAML文本，出错时返回JSON
+     */
+    async readComposeResponse(response) {
+        const contentType = response.headers.get('Content-Type') || '';
+        if (contentType.includes('yaml')) {
+            return { success: true, data: { yaml: await response.text() } };
+        }
+        return response.json();
+    }
+
     /**
      * 生成Compose文件
      */
@@ -426,11 +823,12 @@ class D2CWebUI {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({
-                    container_ids: Array.from(this.selectedContainers)
+                    container_ids: Array.from(this.selectedContainers),
+                    format: 'yaml'
                 })
             });
 
-            const result = await response.json();
+            const result = await this.readComposeResponse(response);
 
             if (result.success) {
                 this.currentYaml = result.data.yaml;
@@ -496,6 +894,7 @@ class D2CWebUI {
 
             if (result.success) {
                 this.showNotification(`文件保存成功: ${result.path}`, 'success');
+                this.evictContent(result.path);
                 this.loadFileList();
             } else {
                 throw new Error(result.error || '保存失败');
@@ -620,156 +1019,344 @@ class D2CWebUI {
      * 全部展开分组
      */
     expandAllGroups() {
-        document.querySelectorAll('.group-header').forEach(header => {
-            const groupContainers = header.nextElementSibling;
-            const toggle = header.querySelector('.group-toggle');
-            
-            groupContainers.style.display = 'block';
-            header.classList.add('expanded');
-            toggle.style.transform = 'rotate(90deg)';
-        });
+        this.sortedGroups.forEach(group => this.expandedGroups.add(group.id));
+        this.containerList.refresh();
     }
 
     /**
      * 全部收缩分组
      */
     collapseAllGroups() {
-        document.querySelectorAll('.group-header').forEach(header => {
-            const groupContainers = header.nextElementSibling;
-            const toggle = header.querySelector('.group-toggle');
-            
-            groupContainers.style.display = 'none';
-            header.classList.remove('expanded');
-            toggle.style.transform = 'rotate(0deg)';
-        });
+        this.expandedGroups.clear();
+        this.containerList.refresh();
     }
 
     /**
-     * 加载文件列表
+     * 加载文件列表（分页加载文件夹，文件夹内的文件在展开时按需加载）
      */
     async loadFileList() {
         try {
-            const response = await fetch('/api/files');
-            const result = await response.json();
-            
-            if (result.success) {
-                this.renderFileList(result.data);
-            } else {
-                throw new Error(result.error || '加载文件列表失败');
+            if (this.fileView === 'tree') {
+                await this.loadDateTree();
+                return;
             }
+            const data = await this.fetchSnapshotPage();
+            this.renderFileList(data);
         } catch (error) {
+            if (this.isAbortError(error)) return;
             console.error('加载文件列表失败:', error);
-            document.getElementById('fileList').innerHTML = `
+            this.fileListView.clear(`
                 <div class="loading">
                     <i class="fas fa-exclamation-triangle"></i>
                     加载失败
                 </div>
-            `;
+            `);
         }
     }
 
     /**
-     * 渲染文件列表
+     * 获取一页快照文件夹
+     * 列表首页使用同一个请求key，切换视图或重复刷新时取消尚未完成的旧请求
      */
-    renderFileList(data) {
-        const fileList = document.getElementById('fileList');
-        if (!data || (!data.root.length && !Object.keys(data.folders).length)) {
-            fileList.innerHTML = '<div class="text-center text-muted p-3">暂无文件</div>';
+    async fetchSnapshotPage(cursor = null, prefix = null) {
+        const params = new URLSearchParams({ limit: this.filePageSize });
+        if (cursor) params.set('cursor', cursor);
+        if (prefix) params.set('prefix', prefix);
+
+        const key = cursor || prefix ? `snapshots:${prefix || ''}:${cursor || ''}` : 'file-list';
+        const result = await this.requestJSON(key, `/api/snapshots?${params}`);
+        if (!result.success) {
+            throw new Error(result.error || '加载文件列表失败');
+        }
+        return result.data;
+    }
+
+    /**
+     * 创建文件列表节点（根目录、快照文件夹、日期、加载更多）
+     * 节点记录展开和加载状态，行被虚拟列表移出页面后重新渲染时状态不丢失
+     */
+    createFileNode(type, props = {}) {
+        const node = { id: ++this.fileNodeSeq, type, expanded: false, loaded: false, children: [], files: [], ...props };
+        this.fileNodes.set(node.id, node);
+        return node;
+    }
+
+    /**
+     * 由一页快照数据创建文件夹节点和“加载更多”节点
+     */
+    createFolderNodes(data, prefix = null) {
+        const nodes = data.folders.map(folder => this.createFileNode('folder', { folder }));
+        if (data.next_cursor) {
+            nodes.push(this.createFileNode('more', { cursor: data.next_cursor, prefix }));
+        }
+        return nodes;
+    }
+
+    /**
+     * 替换文件列表的全部顶层节点
+     */
+    setFileRows(rows, emptyHtml = '<div class="text-center text-muted p-3">暂无文件</div>') {
+        this.fileNodes.clear();
+        rows.forEach(node => this.fileNodes.set(node.id, node));
+        this.fileRows = rows;
+        if (!rows.length) {
+            this.fileListView.clear(emptyHtml);
             return;
         }
+        this.fileListView.setRows(rows);
+    }
 
-        let html = '';
+    /**
+     * 渲染文件列表首页
+     */
+    renderFileList(data) {
+        const rows = [];
+        const rootFiles = data.root || [];
         
-        // 渲染根目录文件
-        if (data.root.length > 0) {
-            html += '<div class="folder-section">';
-            html += '<div class="folder-header" onclick="app.toggleFolder(this)">';
-            html += '<i class="fas fa-folder folder-icon"></i>';
-            html += '<span class="folder-name">根目录</span>';
-            html += '<i class="fas fa-chevron-down toggle-icon"></i>';
-            html += '</div>';
-            html += '<div class="folder-content collapsed" style="max-height: 0;">';
-            
-            data.root.forEach(file => {
-                const modifiedDate = new Date(file.modified * 1000).toLocaleString('zh-CN');
-                const fileSize = this.formatFileSize(file.size);
-                
-                html += `
-                    <div class="file-item" onclick="app.loadFile('${file.path.replace(/'/g, "\\'").replace(/"/g, '\\"')}', this)">
-                        <i class="fas fa-file-code file-icon"></i>
-                        <div class="file-info">
-                            <div class="file-name">${file.name}</div>
-                            <div class="file-date">${modifiedDate} • ${fileSize}</div>
-                        </div>
-                        <button class="btn btn-sm btn-outline-danger delete-btn" onclick="event.stopPropagation(); app.deleteFile('${file.path.replace(/'/g, "\\'").replace(/"/g, '\\"')}', event)">
-                            <i class="fas fa-trash"></i>
-                        </button>
-                    </div>
-                `;
-            });
-            
-            html += '</div></div>';
+        // 根目录文件
+        if (rootFiles.length > 0) {
+            rows.push(this.createFileNode('root', { files: rootFiles, loaded: true }));
         }
         
-        // 渲染文件夹（按修改时间排序）
-        const sortedFolders = Object.values(data.folders).sort((a, b) => b.modified - a.modified);
+        // 文件夹（服务端已按时间倒序排列）
+        rows.push(...this.createFolderNodes(data));
+        this.setFileRows(rows);
+    }
+
+    /**
+     * 转义用于内联onclick参数的字符串
+     */
+    escapeAttr(value) {
+        return value.replace(/'/g, "\\'").replace(/"/g, '\\"');
+    }
+
+    /**
+     * 渲染单个文件
+     */
+    renderFileItem(file) {
+        const modifiedDate = new Date(file.modified * 1000).toLocaleString('zh-CN');
+        const fileSize = this.formatFileSize(file.size);
+        const path = this.escapeAttr(file.path);
+        const selected = file.path === this.selectedFile ? 'selected' : '';
         
-        sortedFolders.forEach(folder => {
-            html += '<div class="folder-section">';
-            html += '<div class="folder-header" onclick="app.toggleFolder(this)">';
-            html += '<i class="fas fa-folder folder-icon"></i>';
-            html += `<span class="folder-name">${folder.name}</span>`;
-            html += '<div class="folder-actions">';
-            html += `<button class="btn btn-sm btn-outline-danger" onclick="event.stopPropagation(); app.deleteFile('${folder.path.replace(/'/g, "\\'").replace(/"/g, '\\"')}', event)" title="删除文件夹">`;
-            html += '<i class="fas fa-trash"></i>';
-            html += '</button>';
-            html += '<i class="fas fa-chevron-down toggle-icon"></i>';
-            html += '</div>';
-            html += '</div>';
-            html += '<div class="folder-content collapsed" style="max-height: 0;">';
-            
-            folder.files.forEach(file => {
-                const modifiedDate = new Date(file.modified * 1000).toLocaleString('zh-CN');
-                const fileSize = this.formatFileSize(file.size);
-                
-                html += `
-                    <div class="file-item" onclick="app.loadFile('${file.path.replace(/'/g, "\\'").replace(/"/g, '\\"')}', this)">
-                        <i class="fas fa-file-code file-icon"></i>
-                        <div class="file-info">
-                            <div class="file-name">${file.name}</div>
-                            <div class="file-date">${modifiedDate} • ${fileSize}</div>
-                        </div>
-                        <button class="btn btn-sm btn-outline-danger delete-btn" onclick="event.stopPropagation(); app.deleteFile('${file.path.replace(/'/g, "\\'").replace(/"/g, '\\"')}', event)">
-                            <i class="fas fa-trash"></i>
-                        </button>
-                    </div>
-                `;
-            });
-            
-            html += '</div></div>';
-        });
+        return `
+            <div class="file-item ${selected}" onclick="app.loadFile('${path}', this)">
+                <i class="fas fa-file-code file-icon"></i>
+                <div class="file-info">
+                    <div class="file-name">${file.name}</div>
+                    <div class="file-date">${modifiedDate} • ${fileSize}</div>
+                </div>
+                <button class="btn btn-sm btn-outline-danger delete-btn" onclick="event.stopPropagation(); app.deleteFile('${path}', event)">
+                    <i class="fas fa-trash"></i>
+                </button>
+            </div>
+        `;
+    }
+
+    /**
+     * 渲染文件列表节点，已展开的节点连同子节点一起渲染
+     */
+    renderFileNode(node) {
+        if (node.type === 'more') {
+            return `
+                <div class="load-more">
+                    <button class="btn btn-sm btn-outline-secondary w-100" onclick="app.loadMoreFolders(${node.id}, this)">
+                        加载更多
+                    </button>
+                </div>
+            `;
+        }
+
+        let header;
+        if (node.type === 'root') {
+            header = '<i class="fas fa-folder folder-icon"></i><span class="folder-name">根目录</span>';
+        } else if (node.type === 'date') {
+            header = `<i class="fas fa-calendar-alt folder-icon"></i><span class="folder-name">${node.label}</span><span class="folder-count">${node.count}</span>`;
+        } else {
+            const folder = node.folder;
+            header = '<i class="fas fa-folder folder-icon"></i>';
+            header += `<span class="folder-name">${folder.name}</span>`;
+            header += `<span class="folder-count">${folder.file_count}</span>`;
+            header += '<div class="folder-actions">';
+            header += `<button class="btn btn-sm btn-outline-danger" onclick="event.stopPropagation(); app.deleteFile('${this.escapeAttr(folder.path)}', event)" title="删除文件夹">`;
+            header += '<i class="fas fa-trash"></i>';
+            header += '</button>';
+        }
+        const toggle = `<i class="fas fa-chevron-down toggle-icon" style="transform: rotate(${node.expanded ? 180 : 0}deg)"></i>`;
+        
+        let html = `<div class="folder-section ${node.type === 'date' ? 'date-node' : ''}">`;
+        html += `<div class="folder-header" onclick="app.toggleFileNode(${node.id}, this)">`;
+        html += header + toggle + (node.type === 'folder' ? '</div>' : '');
+        html += '</div>';
+        html += node.expanded
+            ? `<div class="folder-content" style="max-height: none;">${this.renderFileChildren(node)}</div>`
+            : '<div class="folder-content collapsed" style="max-height: 0;"></div>';
+        html += '</div>';
+        return html;
+    }
+
+    /**
+     * 渲染节点的子内容（文件或下一层节点）
+     */
+    renderFileChildren(node) {
+        if (node.type === 'date') {
+            return node.children.map(child => this.renderFileNode(child)).join('')
+                || '<div class="folder-placeholder">暂无文件</div>';
+        }
+        return node.files.map(file => this.renderFileItem(file)).join('');
+    }
 
-        fileList.innerHTML = html;
+    /**
+     * 加载节点的子内容：快照文件夹加载文件，日期节点加载下一层（年→月→日→快照文件夹）
+     */
+    async loadFileNode(node) {
+        if (node.type === 'folder') {
+            const name = node.folder.name;
+            const result = await this.requestJSON(`folder:${name}`, `/api/snapshots/${encodeURIComponent(name)}/files`);
+            if (!result.success) {
+                throw new Error(result.error || '加载文件失败');
+            }
+            node.files = result.data;
+        } else if (node.type === 'date') {
+            const { year, month, day } = node.params;
+            if (day) {
+                const prefix = `${year}_${month}_${day}`;
+                node.children = this.createFolderNodes(await this.fetchSnapshotPage(null, prefix), prefix);
+            } else if (month) {
+                const days = await this.fetchDateNodes({ year, month });
+                node.children = days.map(item => this.createDateNode(item, { year, month, day: item.key }, `${item.key}日`));
+            } else {
+                const months = await this.fetchDateNodes({ year });
+                node.children = months.map(item => this.createDateNode(item, { year, month: item.key }, `${item.key}月`));
+            }
+            node.children.forEach(child => { child.parent = node; });
+        }
+        node.loaded = true;
     }
 
     /**
-     * 切换文件夹展开/收缩状态
+     * 展开/收缩文件列表节点，首次展开时加载子内容
      */
-    toggleFolder(headerElement) {
+    async toggleFileNode(nodeId, headerElement) {
+        const node = this.fileNodes.get(nodeId);
+        if (!node) return;
+        const expand = !node.expanded;
+        
+        if (expand && !node.loaded) {
+            try {
+                await this.loadFileNode(node);
+            } catch (error) {
+                if (this.isAbortError(error)) return;
+                console.error('加载文件夹失败:', error);
+                this.showNotification(`加载文件夹失败: ${error.message}`, 'error');
+                return;
+            }
+        }
+        
+        node.expanded = expand;
+        if (expand) {
+            headerElement.nextElementSibling.innerHTML = this.renderFileChildren(node);
+        }
+        this.setFolderExpanded(headerElement, expand);
+    }
+
+    /**
+     * 加载下一页文件夹，替换“加载更多”节点
+     */
+    async loadMoreFolders(nodeId, button) {
+        const node = this.fileNodes.get(nodeId);
+        if (!node) return;
+        button.disabled = true;
+        try {
+            const data = await this.fetchSnapshotPage(node.cursor, node.prefix);
+            const nodes = this.createFolderNodes(data, node.prefix);
+            const parent = node.parent;
+            const siblings = parent ? parent.children : this.fileRows;
+            siblings.splice(siblings.indexOf(node), 1, ...nodes);
+            this.fileNodes.delete(node.id);
+            
+            if (parent) {
+                nodes.forEach(child => { child.parent = parent; });
+                const content = button.closest('.folder-content');
+                if (content) content.innerHTML = this.renderFileChildren(parent);
+            } else {
+                this.fileListView.setRows(this.fileRows);
+            }
+        } catch (error) {
+            if (this.isAbortError(error)) return;
+            console.error('加载更多文件夹失败:', error);
+            this.showNotification(`加载失败: ${error.message}`, 'error');
+            button.disabled = false;
+        }
+    }
+
+    /**
+     * 设置文件夹展开状态（展开动画结束后取消高度限制，以便嵌套内容继续展开）
+     */
+    setFolderExpanded(headerElement, expand) {
         const content = headerElement.nextElementSibling;
         const toggleIcon = headerElement.querySelector('.toggle-icon');
         
-        if (content.classList.contains('collapsed')) {
+        if (expand) {
             content.classList.remove('collapsed');
             content.style.maxHeight = content.scrollHeight + 'px';
             toggleIcon.style.transform = 'rotate(180deg)';
+            setTimeout(() => {
+                if (!content.classList.contains('collapsed')) {
+                    content.style.maxHeight = 'none';
+                }
+            }, 300);
         } else {
+            content.style.maxHeight = content.scrollHeight + 'px';
+            content.offsetHeight; // 强制重排，使收缩动画生效
             content.classList.add('collapsed');
             content.style.maxHeight = '0';
             toggleIcon.style.transform = 'rotate(0deg)';
         }
     }
 
+    /**
+     * 切换文件列表视图（列表 / 按日期）
+     */
+    toggleFileView() {
+        this.fileView = this.fileView === 'tree' ? 'list' : 'tree';
+        const button = document.getElementById('fileViewBtn');
+        if (button) {
+            button.innerHTML = this.fileView === 'tree'
+                ? '<i class="fas fa-list"></i> 按列表'
+                : '<i class="fas fa-calendar-alt"></i> 按日期';
+        }
+        this.loadFileList();
+    }
+
+    /**
+     * 获取日期层级节点（年 / 月 / 日）
+     */
+    async fetchDateNodes(params = {}) {
+        const query = new URLSearchParams(params);
+        const key = Object.keys(params).length ? `date-tree:${query}` : 'file-list';
+        const result = await this.requestJSON(key, `/api/snapshots/tree?${query}`);
+        if (!result.success) {
+            throw new Error(result.error || '加载日期列表失败');
+        }
+        return result.data;
+    }
+
+    /**
+     * 加载按日期浏览的顶层（年份）
+     */
+    async loadDateTree() {
+        const years = await this.fetchDateNodes();
+        this.setFileRows(years.map(item => this.createDateNode(item, { year: item.key }, `${item.key}年`)));
+    }
+
+    /**
+     * 创建日期节点
+     */
+    createDateNode(item, params, label) {
+        return this.createFileNode('date', { params, label, count: item.count });
+    }
+
     /**
      * 格式化文件大小
      */
@@ -820,21 +1407,14 @@ class D2CWebUI {
     async openSettings() {
         try {
             // 加载当前设置
-            const response = await fetch('/api/settings');
-            const result = await response.json();
+            const settings = await this.getSettings();
+            document.getElementById('nasInput').value = settings.NAS || 'debian';
+            document.getElementById('networkInput').value = settings.NETWORK || 'true';
+            document.getElementById('tzInput').value = settings.TZ || 'Asia/Shanghai';
             
-            if (result.success) {
-                const settings = result.settings;
-                document.getElementById('nasInput').value = settings.NAS || 'debian';
-                document.getElementById('networkInput').value = settings.NETWORK || 'true';
-                document.getElementById('tzInput').value = settings.TZ || 'Asia/Shanghai';
-                
-                // 显示模态框
-                const modal = new bootstrap.Modal(document.getElementById('settingsModal'));
-                modal.show();
-            } else {
-                throw new Error(result.error || '加载设置失败');
-            }
+            // 显示模态框
+            const modal = new bootstrap.Modal(document.getElementById('settingsModal'));
+            modal.show();
         } catch (error) {
             console.error('加载设置失败:', error);
             this.showNotification(`加载设置失败: ${error.message}`, 'error');
@@ -863,6 +1443,7 @@ class D2CWebUI {
             const result = await response.json();
             
             if (result.success) {
+                this.settings = { ...this.settings, ...settings };
                 this.showNotification('设置保存成功', 'success');
                 // 关闭模态框
                 const modal = bootstrap.Modal.getInstance(document.getElementById('settingsModal'));
@@ -893,10 +1474,10 @@ class D2CWebUI {
                 headers: {
                     'Content-Type': 'application/json'
                 },
-                body: JSON.stringify({ container_ids: selectedContainers })
+                body: JSON.stringify({ container_ids: selectedContainers, format: 'yaml' })
             });
             
-            const result = await response.json();
+            const result = await this.readComposeResponse(response);
             
             if (result.success) {
                 this.showYamlEditor(result.data.yaml);
@@ -946,6 +1527,7 @@ class D2CWebUI {
             if (result.success) {
                 console.log('删除成功，重新加载文件列表');
                 this.showNotification('文件删除成功', 'success');
+                this.evictContent(filePath);
                 this.loadFileList(); // 重新加载文件列表
             } else {
                 throw new Error(result.error || '删除失败');
@@ -964,6 +1546,7 @@ class D2CWebUI {
     async loadFile(filePath, targetElement = null) {
         try {
             // 先更新UI状态，避免闪烁
+            this.selectedFile = filePath;
             document.querySelectorAll('.file-item').forEach(item => {
                 item.classList.remove('selected');
             });
@@ -985,15 +1568,9 @@ class D2CWebUI {
             filenameInput.value = '加载中...';
             filenameInput.disabled = true;
             
-            const response = await fetch('/api/file-content', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({ file_path: filePath })
-            });
-            
-            const result = await response.json();
+            // 快速连续点击不同文件时取消上一个文件的请求，只显示最后点击的文件
+            const result = await this.fetchContent(`file:${filePath}`, 'file-content',
+                `/api/file-content?path=${encodeURIComponent(filePath)}`);
             
             if (result.success) {
                 // 平滑更新内容
@@ -1006,6 +1583,7 @@ class D2CWebUI {
                 throw new Error(result.error || '加载文件失败');
             }
         } catch (error) {
+            if (this.isAbortError(error)) return;
             console.error('加载文件失败:', error);
             this.showNotification(`加载文件失败: ${error.message}`, 'error');
             
@@ -1014,6 +1592,9 @@ class D2CWebUI {
                 targetElement.classList.remove('selected');
             }
         } finally {
+            // 已被后来点击的文件取代时由最新的请求恢复编辑器状态
+            if (this.selectedFile !== filePath) return;
+            
             // 恢复编辑器状态
             const editor = document.getElementById('yamlEditor');
             const filenameInput = document.getElementById('filenameInput');
@@ -1030,6 +1611,8 @@ class D2CWebUI {
      * 启动定时任务
      */
     async startScheduler() {
+        // 任务状态即将变化，不再使用首屏加载的状态
+        this.schedulerStatus = null;
         try {
             this.showLoading(true);
             const response = await fetch('/api/scheduler/start', {
@@ -1072,6 +1655,8 @@ class D2CWebUI {
      * 停止定时任务
      */
     async stopScheduler() {
+        // 任务状态即将变化，不再使用首屏加载的状态
+        this.schedulerStatus = null;
         try {
             this.showLoading(true);
             
@@ -1168,11 +1753,9 @@ class D2CWebUI {
     async refreshSchedulerStatus() {
         try {
             // 获取当前设置
-            const settingsResponse = await fetch('/api/settings');
-            const settingsResult = await settingsResponse.json();
+            const settings = await this.getSettings().catch(() => null);
             
-            if (settingsResult.success) {
-                const settings = settingsResult.settings;
+            if (settings) {
                 const currentCron = settings.CRON || '*/5 * * * *';
                 
                 document.getElementById('schedulerCron').textContent = currentCron;
@@ -1191,12 +1774,15 @@ class D2CWebUI {
                 }
             }
             
-            // 获取任务状态
-            const statusResponse = await fetch('/api/scheduler/status');
-            const statusResult = await statusResponse.json();
+            // 获取任务状态（首次打开时直接使用首屏加载的结果）
+            let status = this.schedulerStatus;
+            this.schedulerStatus = null;
+            if (!status) {
+                const statusResult = await this.requestJSON('scheduler-status', '/api/scheduler/status');
+                status = statusResult.success ? statusResult.status : null;
+            }
             
-            if (statusResult.success) {
-                const status = statusResult.status;
+            if (status) {
                 const statusElement = document.getElementById('schedulerCurrentStatus');
                 
                 if (status.running) {
@@ -1221,10 +1807,16 @@ class D2CWebUI {
                 
                 // 更新最后执行时间
                 if (status.last_run) {
-                    document.getElementById('schedulerLastRun').textContent = new Date(status.last_run).toLocaleString();
+                    const runStatus = {unchanged: '（清单未变化，已跳过）', failed: '（失败）'}[status.last_run_status] || '';
+                    document.getElementById('schedulerLastRun').textContent = new Date(status.last_run).toLocaleString() + runStatus;
                 } else {
                     document.getElementById('schedulerLastRun').textContent = '从未执行';
                 }
+                
+                // Python调度器在状态文件中记录了实际的下次执行时间（支持秒级），优先使用
+                if (status.next_run) {
+                    document.getElementById('schedulerNextRun').textContent = new Date(status.next_run).toLocaleString();
+                }
             }
         } catch (error) {
             console.error('刷新任务状态失败:', error);
@@ -1331,8 +1923,7 @@ class D2CWebUI {
      */
     async refreshLogs() {
         try {
-            const response = await fetch('/api/scheduler/logs');
-            const result = await response.json();
+            const result = await this.requestJSON('scheduler-logs', '/api/scheduler/logs');
             
             const logContainer = document.getElementById('logContainer');
             
@@ -1444,16 +2035,13 @@ class D2CWebUI {
             this.showLoading(true);
             
             // 获取当前设置
-            const settingsResponse = await fetch('/api/settings');
-            const settingsResult = await settingsResponse.json();
-            
-            if (!settingsResult.success) {
+            const currentSettings = await this.getSettings().catch(() => {
                 throw new Error('获取当前设置失败');
-            }
+            });
             
             // 更新CRON设置
             const settings = {
-                ...settingsResult.settings,
+                ...currentSettings,
                 CRON: newCron
             };
             
@@ -1472,6 +2060,7 @@ class D2CWebUI {
                 if (result.message) {
                     message = result.message;
                 }
+                this.settings = settings;
                 this.showNotification(message, 'success');
                 this.refreshSchedulerStatus();
                 cronInput.value = ''; // 清空输入框
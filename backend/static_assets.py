@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+静态资源构建
+把static目录下的资源（含vendor目录中的Bootstrap、Font Awesome）压缩、按内容哈希重命名并预压缩，
+输出到static/dist，同时写入 原路径 -> 带哈希路径 的manifest.json。
+带哈希的文件内容不会变化，Web UI以immutable长缓存发送，重复打开页面不再请求静态资源。
+
+用法: python3 static_assets.py [--vendor] [--static 静态目录]
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+import threading
+import urllib.request
+
+try:
+    import brotli
+except ImportError:  # brotli是可选依赖，未安装时只生成.gz
+    brotli = None
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIRNAME = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# 离线部署需要的第三方资源: (下载地址, static下的保存路径)
+BOOTSTRAP_CDN = 'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist'
+FONTAWESOME_CDN = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0'
+FONTAWESOME_FONTS = ('fa-brands-400', 'fa-regular-400', 'fa-solid-900', 'fa-v4compatibility')
+VENDOR_ASSETS = [
+    (f'{BOOTSTRAP_CDN}/css/bootstrap.min.css', 'vendor/bootstrap/css/bootstrap.min.css'),
+    (f'{BOOTSTRAP_CDN}/js/bootstrap.bundle.min.js', 'vendor/bootstrap/js/bootstrap.bundle.min.js'),
+    (f'{FONTAWESOME_CDN}/css/all.min.css', 'vendor/fontawesome/css/all.min.css'),
+] + [
+    (f'{FONTAWESOME_CDN}/webfonts/{font}{ext}', f'vendor/fontawesome/webfonts/{font}{ext}')
+    for font in FONTAWESOME_FONTS for ext in ('.woff2', '.ttf')
+]
+
+# 生成预压缩版本的文件类型（woff2、png等本身已压缩）
+PRECOMPRESS_SUFFIXES = ('.css', '.js', '.svg', '.json', '.txt', '.ttf', '.map')
+
+HASH_LENGTH = 10
+
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+# 这些字符或关键字之后的 / 是正则表达式字面量的开始，而不是除号
+_REGEX_PREFIX_CHARS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_PREFIX_WORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete', 'throw')
+
+
+# ---------------------------------------------------------------------------
+# 压缩
+# ---------------------------------------------------------------------------
+
+def _skip_string(source, i, out):
+    """复制以source[i]为引号的字符串字面量，返回结束引号之后的位置"""
+    quote = source[i]
+    start = i
+    i += 1
+    while i < len(source) and source[i] != quote:
+        if source[i] == '\\':
+            i += 1
+        elif source[i] == '\n':
+            break
+        i += 1
+    out.append(source[start:i + 1])
+    return i + 1
+
+
+def _skip_regex(source, i, out):
+    """复制正则表达式字面量（不含标志），返回结束 / 之后的位置"""
+    start = i
+    i += 1
+    in_class = False
+    while i < len(source) and source[i] != '\n':
+        char = source[i]
+        if char == '\\':
+            i += 1
+        elif char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            break
+        i += 1
+    out.append(source[start:i + 1])
+    return i + 1
+
+
+def _scan_template(source, i, out):
+    """复制模板字符串，${...}中的表达式按代码处理，返回结束反引号之后的位置"""
+    start = i
+    i += 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '`':
+            out.append(source[start:i + 1])
+            return i + 1
+        if source.startswith('${', i):
+            out.append(source[start:i + 2])
+            i = _scan_code(source, i + 2, out, in_template=True)
+            start = i
+            continue
+        i += 1
+    out.append(source[start:])
+    return i
+
+
+def _regex_allowed(out):
+    """根据已输出的内容判断下一个 / 是否为正则表达式字面量"""
+    text = ''.join(out[-4:]).rstrip()
+    if not text:
+        return True
+    if text[-1] in _REGEX_PREFIX_CHARS:
+        return True
+    match = re.search(r'[A-Za-z_$][\w$]*$', text)
+    return bool(match) and match.group(0) in _REGEX_PREFIX_WORDS
+
+
+def _scan_code(source, i, out, in_template=False):
+    """处理JS代码：去掉注释和缩进，合并空白，字符串、模板字符串和正则表达式原样保留"""
+    depth = 0
+    length = len(source)
+    while i < length:
+        char = source[i]
+        if char in '"\'':
+            i = _skip_string(source, i, out)
+        elif char == '`':
+            i = _scan_template(source, i, out)
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = length if end == -1 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = length if end == -1 else end + 2
+            # 保留注释中的换行，避免影响自动分号插入
+            out.append('\n' if '\n' in source[i:end] else ' ')
+            i = end
+        elif char == '/' and _regex_allowed(out):
+            i = _skip_regex(source, i, out)
+        elif char.isspace():
+            end = i
+            while end < length and source[end].isspace():
+                end += 1
+            # 换行只保留一个，行首缩进和行尾空白全部去掉
+            if '\n' in source[i:end]:
+                while out and out[-1] in (' ', '\n'):
+                    out.pop()
+                out.append('\n')
+            elif out and out[-1] not in (' ', '\n'):
+                out.append(' ')
+            i = end
+        else:
+            if in_template:
+                if char == '{':
+                    depth += 1
+                elif char == '}':
+                    if depth == 0:
+                        out.append('}')
+                        return i + 1
+                    depth -= 1
+            out.append(char)
+            i += 1
+    return i
+
+
+def minify_js(source):
+    """保守地压缩JS：删除注释、缩进和空行，保留换行以免改变自动分号插入的结果"""
+    out = []
+    _scan_code(source, 0, out)
+    return ''.join(out).strip('\n ') + '\n'
+
+
+def minify_css(source):
+    """压缩CSS：删除注释，合并空白，去掉 { } ; , 两侧的空白和 } 前多余的分号"""
+    out = []
+    i = 0
+    length = len(source)
+    while i < length:
+        char = source[i]
+        if char in '"\'':
+            i = _skip_string(source, i, out)
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+        elif char.isspace():
+            while i < length and source[i].isspace():
+                i += 1
+            if out and out[-1] not in '{};, ':
+                out.append(' ')
+        elif char in '{};,':
+            while out and out[-1] == ' ':
+                out.pop()
+            if char == '}' and out and out[-1] == ';':
+                out.pop()
+            out.append(char)
+            i += 1
+        else:
+            out.append(char)
+            i += 1
+    return ''.join(out).strip()
+
+
+# ---------------------------------------------------------------------------
+# 构建
+# ---------------------------------------------------------------------------
+
+def fingerprint_name(rel_path, data):
+    """在扩展名前插入内容哈希: css/style.css -> css/style.<hash>.css"""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    root, ext = os.path.splitext(rel_path)
+    return f'{root}.{digest}{ext}'
+
+
+def _source_files(static_dir):
+    """列出static目录下的资源文件（相对路径，使用 / 分隔），跳过dist目录"""
+    files = []
+    for root, dirs, names in os.walk(static_dir):
+        rel_root = os.path.relpath(root, static_dir)
+        if rel_root == '.':
+            dirs[:] = [d for d in dirs if d != DIST_DIRNAME]
+            rel_root = ''
+        dirs.sort()
+        for name in sorted(names):
+            if not name.startswith('.'):
+                files.append(os.path.join(rel_root, name).replace(os.sep, '/'))
+    return files
+
+
+def _rewrite_css_urls(css, rel_path, manifest):
+    """把CSS中指向本地资源的url()改为带哈希的文件（相对于输出后CSS的位置）"""
+    css_dir = os.path.dirname(rel_path)
+    out_dir = os.path.dirname(manifest.get(rel_path, rel_path))
+
+    def replace(match):
+        url = match.group(2).strip()
+        if url.startswith(('data:', 'http:', 'https:', '//', '#', '/')):
+            return match.group(0)
+        # 保留 ?v=... 或 #iefix 之类的后缀
+        split = re.search(r'[?#]', url)
+        path, suffix = (url[:split.start()], url[split.start():]) if split else (url, '')
+        target = os.path.normpath(os.path.join(css_dir, path)).replace(os.sep, '/')
+        if target not in manifest:
+            return match.group(0)
+        new_url = os.path.relpath(manifest[target], out_dir or '.').replace(os.sep, '/')
+        return f'url({match.group(1)}{new_url}{suffix}{match.group(1)})'
+
+    return _CSS_URL.sub(replace, css)
+
+
+def _write_variants(path, data):
+    """写入文件及其预压缩版本（只在压缩后更小时保留）"""
+    with open(path, 'wb') as f:
+        f.write(data)
+    if not path.endswith(PRECOMPRESS_SUFFIXES):
+        return
+    # mtime=0 使相同内容的构建结果完全一致
+    gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz_data) < len(data):
+        with open(path + '.gz', 'wb') as f:
+            f.write(gz_data)
+    if brotli is not None:
+        br_data = brotli.compress(data, quality=11)
+        if len(br_data) < len(data):
+            with open(path + '.br', 'wb') as f:
+                f.write(br_data)
+
+
+def build(static_dir=STATIC_DIR):
+    """构建static/dist并返回manifest {原路径: 带哈希路径}
+
+    先处理非CSS文件，CSS中的url()引用改写为带哈希的文件后再计算CSS自身的哈希。
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    tmp_dir = dist_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    files = _source_files(static_dir)
+    manifest = {}
+    ordered = [f for f in files if not f.endswith('.css')] + [f for f in files if f.endswith('.css')]
+    for rel_path in ordered:
+        with open(os.path.join(static_dir, rel_path), 'rb') as f:
+            data = f.read()
+        if rel_path.endswith('.css'):
+            css = data.decode('utf-8')
+            if not rel_path.endswith('.min.css'):
+                css = minify_css(css)
+            data = _rewrite_css_urls(css, rel_path, manifest).encode('utf-8')
+        elif rel_path.endswith('.js') and not rel_path.endswith('.min.js'):
+            data = minify_js(data.decode('utf-8')).encode('utf-8')
+
+        hashed = fingerprint_name(rel_path, data)
+        manifest[rel_path] = hashed
+        target = os.path.join(tmp_dir, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        _write_variants(target, data)
+
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    # 整体替换旧的输出目录，构建失败时保留上一次的结果
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    os.rename(tmp_dir, dist_dir)
+    return manifest
+
+
+def download_vendor_assets(static_dir=STATIC_DIR, timeout=30):
+    """下载VENDOR_ASSETS中尚不存在的第三方资源，返回下载失败的地址列表"""
+    failed = []
+    for url, rel_path in VENDOR_ASSETS:
+        target = os.path.join(static_dir, rel_path)
+        if os.path.exists(target):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                data = response.read()
+        except Exception as e:
+            print(f"下载失败 {url}: {e}")
+            failed.append(url)
+            continue
+        with open(target + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(target + '.tmp', target)
+        print(f"已下载 {rel_path} ({len(data)} 字节)")
+    return failed
+
+
+# ---------------------------------------------------------------------------
+# 运行时
+# ---------------------------------------------------------------------------
+
+class AssetManifest:
+    """读取static/dist/manifest.json，文件修改后自动重新加载；未构建时所有查询返回None"""
+
+    def __init__(self, static_dir=STATIC_DIR):
+        self.dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+        self._path = os.path.join(self.dist_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._entries = {}
+
+    def _load(self):
+        try:
+            mtime = os.stat(self._path).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime != self._mtime:
+                entries = {}
+                if mtime is not None:
+                    try:
+                        with open(self._path, 'r', encoding='utf-8') as f:
+                            entries = json.load(f)
+                    except (OSError, ValueError):
+                        entries = {}
+                self._entries = entries
+                self._mtime = mtime
+            return self._entries
+
+    def lookup(self, rel_path):
+        """返回带哈希的相对路径，未构建或不在清单中时返回None"""
+        return self._load().get(rel_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='构建带内容哈希和预压缩的Web UI静态资源')
+    parser.add_argument('--static', default=STATIC_DIR, help='静态资源目录')
+    parser.add_argument('--vendor', action='store_true', help='先下载缺少的Bootstrap和Font Awesome文件')
+    args = parser.parse_args(argv)
+
+    if args.vendor:
+        failed = download_vendor_assets(args.static)
+        if failed:
+            print(f"{len(failed)} 个第三方资源下载失败，页面将回退到CDN地址")
+    manifest = build(args.static)
+    print(f"已生成 {len(manifest)} 个静态资源到 {os.path.join(args.static, DIST_DIRNAME)}")
+    if brotli is None:
+        print("未安装brotli，只生成.gz预压缩文件")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
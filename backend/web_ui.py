@@ -5,23 +5,57 @@ D2C Web UI - Docker to Compose 图形化界面
 """
 
 import os
+import re
 import json
 import yaml
-from flask import Flask, render_template, request, jsonify, send_from_directory
-from d2c import get_containers, get_networks, convert_container_to_service, group_containers_by_network, generate_compose_for_selected_containers, generate_compose_file
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, send_file, url_for, abort
+from werkzeug.security import safe_join
+from d2c import get_containers, get_networks, convert_container_to_service, group_containers, generate_compose_for_selected_containers, generate_compose_file, load_config, inspect_containers
 import subprocess
 from datetime import datetime, timedelta
 import pytz
 import glob
-from d2c import ensure_config_file
+import mimetypes
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from d2c import ensure_config_file, ComposeDumper, is_valid_container_ref, read_last_history
 from cron_utils import CronUtils
+from snapshot_index import SnapshotIndex
+from search_index import SearchIndex, SEARCH_FIELDS
+from snapshot_diff import YamlCache, diff_snapshots
+from compression import compress_response, iter_json, parse_accept_encoding
+from snapshot_archive import ARCHIVE_FORMATS, iter_archive
+from static_assets import AssetManifest
+from scheduler_status import read_status, system_cron_running
 
 app = Flask(__name__)
 
+# compose快照目录索引
+snapshot_index = SnapshotIndex('/app/compose')
+search_index = SearchIndex(snapshot_index)
+yaml_cache = YamlCache()
+
 # 配置静态文件路径
 app.static_folder = 'static'
 app.template_folder = 'templates'
 
+# static_assets.py构建的带哈希静态资源，内容不会变化，浏览器可以长期缓存
+asset_manifest = AssetManifest()
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# 快照分页参数（cursor为快照文件夹名，prefix为其前缀，year/month为数字）会拼入ETag，只允许文件夹名中的字符
+SNAPSHOT_PARAM_RE = re.compile(r'^[A-Za-z0-9_.-]{1,128}$')
+
+def invalid_snapshot_params(*values):
+    """返回第一个不合法的快照分页参数，全部合法（或未提供）时返回None"""
+    for value in values:
+        if value is not None and not SNAPSHOT_PARAM_RE.match(value):
+            return value
+    return None
+
+# 首屏数据（/api/bootstrap）并发获取使用的线程池
+bootstrap_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='bootstrap')
+
 def get_timezone_from_config():
     """从配置文件获取时区设置"""
     try:
@@ -57,6 +91,7 @@ def ensure_compose_files_exist():
         # 设置环境变量并执行d2c.py
         env = os.environ.copy()
         env['CRON'] = 'once'
+        env['FORCE_RUN'] = 'true'
         
         result = subprocess.run(
             ['python3', '/app/d2c.py'],
@@ -83,6 +118,12 @@ def find_compose_file_for_container(container_name):
     
     print(f"查找容器 {container_name} 对应的compose文件...")
     
+    # 优先从最新快照的清单中查找，无需打开YAML文件
+    manifest_match = snapshot_index.find_container(container_name)
+    if manifest_match and os.path.exists(manifest_match):
+        print(f"从快照清单中找到: {manifest_match}")
+        return manifest_match
+    
     # 首先尝试直接匹配文件名
     direct_match = os.path.join(compose_dir, f"{container_name}.yaml")
     if os.path.exists(direct_match):
@@ -108,12 +149,12 @@ def find_compose_file_for_container(container_name):
     print(f"未找到容器 {container_name} 对应的compose文件")
     return None
 
-def get_container_groups():
-    """获取容器分组信息"""
+def get_container_groups(config=None):
+    """获取容器分组信息，config为None时读取配置文件"""
     try:
         containers = get_containers()
         networks = get_networks()
-        groups = group_containers_by_network(containers, networks)
+        groups = group_containers(containers, networks, config or load_config())
         
         result = []
         for i, group in enumerate(groups):
@@ -162,6 +203,41 @@ def generate_compose_for_containers(container_ids):
     """为指定容器生成compose配置"""
     return generate_compose_for_selected_containers(container_ids)
 
+@app.template_global()
+def asset_url(path, cdn=None):
+    """返回静态资源地址
+
+    已构建时返回带哈希的/assets地址，否则返回static下的原文件；
+    本地没有的第三方资源（未执行 static_assets.py --vendor）回退到CDN地址。
+    """
+    hashed = asset_manifest.lookup(path)
+    if hashed:
+        return url_for('static_asset', filename=hashed)
+    if cdn and not os.path.isfile(os.path.join(app.static_folder, path)):
+        return cdn
+    return url_for('static', filename=path)
+
+@app.route('/assets/<path:filename>')
+def static_asset(filename):
+    """发送带哈希的静态资源，客户端支持时直接发送预压缩的.br/.gz文件"""
+    path = safe_join(asset_manifest.dist_dir, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    
+    accepted = parse_accept_encoding(request.headers.get('Accept-Encoding'))
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accepted.get(encoding, 0) > 0 and os.path.isfile(path + suffix):
+            mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            response = send_file(path + suffix, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_file(path, max_age=ASSET_MAX_AGE)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
 @app.route('/')
 def index():
     """主页面"""
@@ -176,18 +252,49 @@ def api_containers():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/bootstrap')
+def api_bootstrap():
+    """首屏数据：容器分组、第一页快照、配置和任务状态，一次请求返回
+
+    配置只读取一次并用于容器分组，其余三项在线程池中并发获取；
+    某一项失败时该项为null并在errors中说明，不影响其他项。
+    """
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    data = {}
+    errors = {}
+    
+    try:
+        data['settings'] = get_settings()
+    except Exception as e:
+        data['settings'] = None
+        errors['settings'] = str(e)
+    
+    futures = {
+        'containers': bootstrap_executor.submit(get_container_groups, data['settings']),
+        'snapshots': bootstrap_executor.submit(lambda: snapshot_index.page(limit=limit)[0]),
+        'scheduler': bootstrap_executor.submit(get_scheduler_status)
+    }
+    for key, future in futures.items():
+        try:
+            data[key] = future.result()
+        except Exception as e:
+            data[key] = None
+            errors[key] = str(e)
+    
+    return jsonify({'success': True, 'data': data, 'errors': errors})
+
 @app.route('/api/compose-file/<container_id>')
 def api_get_compose_file(container_id):
     """获取容器对应的compose文件内容"""
+    if not is_valid_container_ref(container_id):
+        return jsonify({
+            'success': False,
+            'error': '无效的容器ID'
+        }), 400
+    
     try:
-        # 根据容器ID查找对应的compose文件
-        containers = get_containers()
-        container = None
-        
-        for c in containers:
-            if c['Id'].startswith(container_id) or c['Id'][:12] == container_id:
-                container = c
-                break
+        # 只inspect请求的容器，不扫描整台主机
+        container = next((c for c in inspect_containers([container_id]) if c['Id'].startswith(container_id)), None)
         
         if not container:
             return jsonify({
@@ -195,7 +302,8 @@ def api_get_compose_file(container_id):
                 'error': '容器未找到'
             }), 404
         
-        container_name = container['Names'][0].lstrip('/')
+        # inspect结果中容器名在Name字段（docker ps的列表格式才是Names）
+        container_name = container['Name'].lstrip('/')
         compose_file = find_compose_file_for_container(container_name)
         
         if not compose_file:
@@ -204,17 +312,7 @@ def api_get_compose_file(container_id):
                 'error': '未找到对应的compose文件'
             }), 404
         
-        with open(compose_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'content': content,
-                'filename': os.path.basename(compose_file),
-                'filepath': compose_file
-            }
-        })
+        return file_content_response(compose_file)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -223,30 +321,31 @@ def api_get_compose_file(container_id):
 
 @app.route('/api/compose', methods=['POST'])
 def api_compose():
-    """生成compose文件API"""
+    """生成compose文件API
+    
+    请求体中format为yaml（或查询参数?format=yaml）时只返回YAML文本，不再附带JSON转义的内容和config字典
+    """
     try:
         data = request.get_json()
         container_ids = data.get('container_ids', [])
+        yaml_only = (data.get('format') or request.args.get('format')) == 'yaml'
         
         if not container_ids:
             return jsonify({'success': False, 'error': '请选择至少一个容器'})
         
+        # 容器ID会传给docker命令，拒绝不合法的值
+        if not isinstance(container_ids, list) or not all(is_valid_container_ref(cid) for cid in container_ids):
+            return jsonify({'success': False, 'error': '无效的容器ID'}), 400
+        
         compose_config = generate_compose_for_selected_containers(container_ids)
         if compose_config is None:
             return jsonify({'success': False, 'error': '未找到指定的容器'})
         
         # 使用与d2c.py相同的自定义YAML Dumper类来确保正确的缩进
-        class MyDumper(yaml.Dumper):
-            def increase_indent(self, flow=False, indentless=False):
-                return super(MyDumper, self).increase_indent(flow, False)
-            
-            def write_line_break(self, data=None):
-                super(MyDumper, self).write_line_break(data)
-                if len(self.indents) == 1:
-                    super(MyDumper, self).write_line_break()
+        yaml_content = yaml.dump(compose_config, Dumper=ComposeDumper, default_flow_style=False, sort_keys=False, allow_unicode=True, indent=2, width=float('inf'))
         
-        # 转换为YAML格式，使用自定义的Dumper类
-        yaml_content = yaml.dump(compose_config, Dumper=MyDumper, default_flow_style=False, sort_keys=False, allow_unicode=True, indent=2, width=float('inf'))
+        if yaml_only:
+            return Response(yaml_content, mimetype='application/x-yaml')
         
         return jsonify({
             'success': True, 
@@ -279,6 +378,7 @@ def api_save_compose():
         file_path = os.path.join(output_dir, filename)
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
+        snapshot_index.invalidate(file_path)
         
         return jsonify({
             'success': True, 
@@ -288,77 +388,245 @@ def api_save_compose():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def conditional_json(payload, etag):
+    """返回带ETag的JSON响应，客户端缓存仍有效时返回304"""
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def streamed_json(payload, etag):
+    """与conditional_json相同，但JSON按块编码输出，不在内存中生成完整的响应体"""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    response = Response(iter_json(payload), mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.after_request
+def compress(response):
+    """按Accept-Encoding压缩JSON/YAML/文本响应"""
+    return compress_response(response, request.headers.get('Accept-Encoding'))
+
 @app.route('/api/files')
 def api_files():
     """获取compose目录下的文件夹结构"""
     try:
-        compose_dir = '/app/compose'
-        result = {
-            'root': [],
-            'folders': {}
-        }
+        data, etag = snapshot_index.listing()
+        # 列表未变化时返回304，否则分块输出
+        return streamed_json({'success': True, 'data': data}, etag)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/snapshots')
+def api_snapshots():
+    """分页获取快照文件夹列表（按时间倒序，不含文件明细）"""
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        cursor = request.args.get('cursor') or None
+        prefix = request.args.get('prefix') or None
+        invalid = invalid_snapshot_params(cursor, prefix)
+        if invalid is not None:
+            return jsonify({
+                'success': False,
+                'error': f'无效的参数: {invalid}'
+            }), 400
+        data, etag = snapshot_index.page(limit=limit, cursor=cursor, prefix=prefix)
+        return conditional_json({'success': True, 'data': data}, f"{etag}-{limit}-{cursor}-{prefix}")
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/snapshots/tree')
+def api_snapshots_tree():
+    """按 年→月→日 获取快照数量汇总"""
+    try:
+        year = request.args.get('year') or None
+        month = request.args.get('month') or None
+        invalid = invalid_snapshot_params(year, month)
+        if invalid is not None:
+            return jsonify({
+                'success': False,
+                'error': f'无效的参数: {invalid}'
+            }), 400
+        nodes, etag = snapshot_index.date_tree(year=year, month=month)
+        return conditional_json({'success': True, 'data': nodes}, f"{etag}-{year}-{month}")
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/snapshots/<name>/files')
+def api_snapshot_files(name):
+    """获取单个快照文件夹内的文件列表"""
+    try:
+        folder, etag = snapshot_index.folder(name)
+        if not folder:
+            return jsonify({
+                'success': False,
+                'error': '文件夹不存在'
+            }), 404
+        files = folder['files']
+        manifest = snapshot_index.manifest(name)
+        if manifest:
+            # 附带清单中记录的服务列表
+            services = {entry['file']: entry.get('services', []) for entry in manifest.get('files', [])}
+            files = [{**item, 'services': services.get(item['name'], [])} for item in files]
+        return conditional_json({'success': True, 'data': files}, f"{etag}-{name}")
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/snapshots/<name>/archive', methods=['GET', 'POST'])
+def api_snapshot_archive(name):
+    """把快照文件夹打包为ZIP或tar.gz边生成边下载
+
+    format: zip(默认) 或 tar.gz；files: 要打包的文件名（查询参数可重复或用逗号分隔，POST时为JSON数组），
+    不指定时打包整个快照（含manifest.json）
+    """
+    try:
+        body = (request.get_json(silent=True) or {}) if request.method == 'POST' else {}
+        archive_format = body.get('format') or request.args.get('format') or 'zip'
+        if archive_format not in ARCHIVE_FORMATS:
+            return jsonify({
+                'success': False,
+                'error': f"不支持的格式: {archive_format}，可选: {', '.join(ARCHIVE_FORMATS)}"
+            }), 400
         
-        if os.path.exists(compose_dir):
-            # 获取根目录下的文件
-            for item in os.listdir(compose_dir):
-                item_path = os.path.join(compose_dir, item)
-                if os.path.isfile(item_path) and item.endswith(('.yaml', '.yml')):
-                    stat = os.stat(item_path)
-                    result['root'].append({
-                        'name': item,
-                        'path': item_path,
-                        'modified': stat.st_mtime,
-                        'size': stat.st_size,
-                        'type': 'file'
-                    })
-                elif os.path.isdir(item_path):
-                    # 处理子文件夹
-                    folder_files = []
-                    for subitem in os.listdir(item_path):
-                        if subitem.endswith(('.yaml', '.yml')):
-                            subitem_path = os.path.join(item_path, subitem)
-                            if os.path.isfile(subitem_path):
-                                stat = os.stat(subitem_path)
-                                folder_files.append({
-                                    'name': subitem,
-                                    'path': subitem_path,
-                                    'modified': stat.st_mtime,
-                                    'size': stat.st_size,
-                                    'type': 'file'
-                                })
-                    
-                    if folder_files:
-                        # 按修改时间倒序排列文件夹内的文件
-                        folder_files.sort(key=lambda x: x['modified'], reverse=True)
-                        # 获取文件夹的最新修改时间
-                        folder_stat = os.stat(item_path)
-                        result['folders'][item] = {
-                            'name': item,
-                            'path': item_path,
-                            'modified': folder_stat.st_mtime,
-                            'files': folder_files,
-                            'type': 'folder'
-                        }
-        
-        # 按修改时间倒序排列根目录文件
-        result['root'].sort(key=lambda x: x['modified'], reverse=True)
+        folder, _ = snapshot_index.folder(name)
+        if not folder:
+            return jsonify({
+                'success': False,
+                'error': '文件夹不存在'
+            }), 404
+        
+        # 只允许打包索引中列出的文件，防止路径穿越
+        available = {item['name']: item['path'] for item in folder['files']}
+        manifest_path = os.path.join(folder['path'], 'manifest.json')
+        if os.path.isfile(manifest_path):
+            available['manifest.json'] = manifest_path
+        
+        selected = body.get('files') or request.args.getlist('files')
+        if isinstance(selected, str):
+            selected = [selected]
+        selected = [part for value in selected for part in str(value).split(',') if part]
+        if selected:
+            missing = [filename for filename in selected if filename not in available]
+            if missing:
+                return jsonify({
+                    'success': False,
+                    'error': f"文件不存在: {', '.join(missing)}"
+                }), 404
+            names = list(dict.fromkeys(selected))
+        else:
+            names = sorted(available)
         
+        files = [(f"{name}/{filename}", available[filename]) for filename in names]
+        mimetype, suffix = ARCHIVE_FORMATS[archive_format]
+        response = Response(iter_archive(files, archive_format), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename="{name}{suffix}"'
+        return response
+    except Exception as e:
         return jsonify({
-            'success': True,
-            'data': result
-        })
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/search')
+def api_search():
+    """在所有快照中按容器名、镜像、宿主机端口、卷、网络或环境变量名搜索"""
+    try:
+        query = (request.args.get('q') or '').strip()
+        field = request.args.get('field') or None
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        if not query:
+            return jsonify({'success': False, 'error': '请输入搜索内容'}), 400
+        if field and field not in SEARCH_FIELDS:
+            return jsonify({
+                'success': False,
+                'error': f"不支持的字段: {field}，可选: {', '.join(SEARCH_FIELDS)}"
+            }), 400
+        results, total = search_index.search(query, field=field, limit=limit)
+        return jsonify({'success': True, 'data': {'results': results, 'total': total}})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/diff')
+def api_diff():
+    """按服务和字段对比两个快照"""
+    try:
+        from_name = request.args.get('from') or ''
+        to_name = request.args.get('to') or ''
+        if not from_name or not to_name:
+            return jsonify({'success': False, 'error': '请指定from和to两个快照'}), 400
+        from_folder, etag = snapshot_index.folder(from_name)
+        to_folder, _ = snapshot_index.folder(to_name)
+        missing = [name for name, folder in ((from_name, from_folder), (to_name, to_folder)) if not folder]
+        if missing:
+            return jsonify({
+                'success': False,
+                'error': f"快照不存在: {', '.join(missing)}"
+            }), 404
+        data = diff_snapshots(
+            snapshot_index.compose_dir, from_name, to_name,
+            snapshot_index.manifest(from_name), snapshot_index.manifest(to_name), yaml_cache
+        )
+        return conditional_json({'success': True, 'data': data}, f"{etag}-diff-{from_name}-{to_name}")
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/file-content', methods=['POST'])
+def file_content_response(file_path):
+    """返回文件内容，ETag由文件路径和内容哈希生成
+
+    客户端携带的If-None-Match仍匹配时返回304，不读取文件内容（内容哈希按mtime和大小缓存）。
+    快照文件可能被同一分钟内的保存覆盖，因此使用no-cache要求客户端每次重新验证。
+    """
+    digest = snapshot_index.content_hash(file_path)
+    etag = hashlib.sha256(f"{file_path}\0{digest}".encode('utf-8')).hexdigest()[:32]
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        response = jsonify({
+            'success': True,
+            'data': {
+                'content': content,
+                'filename': os.path.basename(file_path),
+                'filepath': file_path
+            }
+        })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/file-content', methods=['GET', 'POST'])
 def api_file_content():
-    """获取文件内容"""
+    """获取文件内容（GET时通过path参数传入路径，可使用If-None-Match重新验证）"""
     try:
-        data = request.get_json()
-        file_path = data.get('file_path', '')
+        if request.method == 'GET':
+            file_path = request.args.get('path', '')
+        else:
+            data = request.get_json()
+            file_path = data.get('file_path', '')
         
         if not file_path or not os.path.exists(file_path):
             return jsonify({
@@ -369,23 +637,13 @@ def api_file_content():
         # 安全检查：确保文件在compose目录下
         compose_dir = os.path.abspath("/app/compose")
         abs_file_path = os.path.abspath(file_path)
-        if not abs_file_path.startswith(compose_dir):
+        if not abs_file_path.startswith(compose_dir + os.sep):
             return jsonify({
                 'success': False,
                 'error': '无权访问该文件'
             }), 403
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'content': content,
-                'filename': os.path.basename(file_path),
-                'filepath': file_path
-            }
-        })
+        return file_content_response(file_path)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -421,6 +679,7 @@ def api_delete_file():
         elif os.path.isdir(file_path):
             import shutil
             shutil.rmtree(file_path)
+        snapshot_index.invalidate(file_path)
         
         return jsonify({
             'success': True,
@@ -440,17 +699,15 @@ def api_generate_all_compose():
         import d2c
         import yaml
         
-        # 获取所有容器
-        containers = d2c.get_containers()
-        if not containers:
+        # 只列出容器ID，由generate_compose_for_selected_containers统一inspect，避免整机inspect两遍
+        output = d2c.run_command("docker ps -a --no-trunc --format '{{.ID}}'")
+        container_ids = output.split() if output else []
+        if not container_ids:
             return jsonify({
                 'success': False,
                 'error': '未找到任何容器'
             }), 404
         
-        # 获取所有容器ID
-        container_ids = [container['Id'] for container in containers]
-        
         # 生成compose配置
         compose_config = d2c.generate_compose_for_selected_containers(container_ids)
         
@@ -468,21 +725,10 @@ def api_generate_all_compose():
         filename = 'all-containers-compose.yaml'
         file_path = os.path.join(output_dir, filename)
         
-        # 使用与d2c.py相同的自定义YAML Dumper类
-        class MyDumper(yaml.Dumper):
-            def increase_indent(self, flow=False, indentless=False):
-                return super(MyDumper, self).increase_indent(flow, False)
-            
-            def write_line_break(self, data=None):
-                super(MyDumper, self).write_line_break(data)
-                if len(self.indents) == 1:
-                    super(MyDumper, self).write_line_break()
-        
-        # 转换为YAML格式并保存
-        yaml_content = yaml.dump(compose_config, Dumper=MyDumper, default_flow_style=False, sort_keys=False, allow_unicode=True, indent=2, width=float('inf'))
-        
+        # 使用与d2c.py相同的自定义YAML Dumper类，直接写入文件，不生成完整的YAML字符串
         with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(yaml_content)
+            yaml.dump(compose_config, f, Dumper=ComposeDumper, default_flow_style=False, sort_keys=False, allow_unicode=True, indent=2, width=float('inf'))
+        snapshot_index.invalidate(file_path)
         
         return jsonify({
             'success': True,
@@ -496,31 +742,40 @@ def api_generate_all_compose():
             'error': f'生成失败: {str(e)}'
         }), 500
 
+def get_settings():
+    """读取配置设置，配置文件中的值覆盖默认值"""
+    config_file = '/app/config/config.json'
+    
+    # 默认设置
+    default_settings = {
+        'NAS': 'debian',
+        'CRON': 'once',
+        'NETWORK': 'true',
+        'TZ': 'Asia/Shanghai',
+        'SKIP_UNCHANGED': 'true',
+        'WORKERS': 'auto',
+        'COMMAND_TIMEOUT': '30',
+        'COMMAND_RETRIES': '2',
+        'GROUP_BY': 'network'
+    }
+    
+    # 优先从配置文件读取设置
+    if os.path.exists(config_file):
+        with open(config_file, 'r', encoding='utf-8') as f:
+            saved_config = json.load(f)
+            # 只提取非注释字段（不以//开头的字段）
+            saved_settings = {k: v for k, v in saved_config.items() if not k.startswith('//')}
+            default_settings.update(saved_settings)
+    
+    return default_settings
+
 @app.route('/api/settings', methods=['GET'])
 def api_get_settings():
     """获取配置设置"""
     try:
-        config_file = '/app/config/config.json'
-        
-        # 默认设置
-        default_settings = {
-            'NAS': 'debian',
-            'CRON': 'once',
-            'NETWORK': 'true',
-            'TZ': 'Asia/Shanghai'
-        }
-        
-        # 优先从配置文件读取设置
-        if os.path.exists(config_file):
-            with open(config_file, 'r', encoding='utf-8') as f:
-                saved_config = json.load(f)
-                # 只提取非注释字段（不以//开头的字段）
-                saved_settings = {k: v for k, v in saved_config.items() if not k.startswith('//')}
-                default_settings.update(saved_settings)
-        
         return jsonify({
             'success': True,
-            'settings': default_settings
+            'settings': get_settings()
         })
     except Exception as e:
         return jsonify({
@@ -536,7 +791,17 @@ def api_save_settings():
         settings = data.get('settings', {})
         
         config_file = '/app/config/config.json'
-        cron_expr = settings.get('CRON', 'once')
+        
+        # 读取现有配置，未提交的字段保留原值
+        existing_config = {}
+        if os.path.exists(config_file):
+            try:
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    existing_config = json.load(f)
+            except Exception as e:
+                print(f"读取现有配置失败: {e}")
+        
+        cron_expr = settings.get('CRON', existing_config.get('CRON', 'once'))
         
         # 初始化CRON工具
         cron_utils = CronUtils()
@@ -575,15 +840,20 @@ def api_save_settings():
         config_with_comments = {
             "// 配置说明": "以下是D2C的配置选项",
             "// NAS": "指定NAS系统类型: debian(默认,生成完整配置) 或 zos(极空间系统,不生成command和entrypoint)",
-            "NAS": settings.get('NAS', 'debian'),
+            "NAS": settings.get('NAS', existing_config.get('NAS', 'debian')),
             "// CRON": "定时执行配置,使用标准cron表达式,如'0 2 * * *'(每天凌晨2点),'once'(执行一次后退出)。支持6位格式(秒 分 时 日 月 周)",
             "CRON": cron_expr,
             "// NETWORK": "控制bridge网络配置的显示方式: true(显示) 或 false(隐藏)",
-            "NETWORK": settings.get('NETWORK', 'true'),
+            "NETWORK": settings.get('NETWORK', existing_config.get('NETWORK', 'true')),
             "// TZ": "时区设置,如Asia/Shanghai、Europe/London等",
-            "TZ": settings.get('TZ', 'Asia/Shanghai')
+            "TZ": settings.get('TZ', existing_config.get('TZ', 'Asia/Shanghai'))
         }
         
+        # 保留其它配置项（如SKIP_UNCHANGED）及其说明
+        for key, value in {**existing_config, **settings}.items():
+            if key not in config_with_comments:
+                config_with_comments[key] = settings.get(key, value)
+        
         # 保存设置到配置文件
         with open(config_file, 'w', encoding='utf-8') as f:
             json.dump(config_with_comments, f, indent=2, ensure_ascii=False)
@@ -591,17 +861,9 @@ def api_save_settings():
         # 如果检测到6位CRON且当前有调度器在运行，重启调度器以应用新配置
         if is_6_field_cron:
             try:
-                # 检查当前调度器状态
-                status_result = subprocess.run(
-                    ['/app/scheduler_manager.sh', 'status'],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-                
-                # 如果调度器正在运行，重启以应用新的6位CRON配置
-                if ('正在运行' in status_result.stdout or 
-                    '调度器正在运行' in status_result.stdout):
+                # 从状态文件检查当前调度器状态，如果正在运行，重启以应用新的6位CRON配置
+                python_status = read_status()
+                if (python_status and python_status['alive']) or system_cron_running():
                     
                     # 重启调度器
                     restart_result = subprocess.run(
@@ -799,6 +1061,8 @@ def api_run_once():
         env = os.environ.copy()
         env['CRON'] = 'once'
         env['OUTPUT_DIR'] = output_dir
+        # 手动执行时始终生成，不因清单未变化而跳过
+        env['FORCE_RUN'] = 'true'
         
         result = subprocess.run(
             ['python3', '/app/d2c.py'],
@@ -809,6 +1073,8 @@ def api_run_once():
             cwd='/app'
         )
         
+        snapshot_index.invalidate(output_dir)
+        
         if result.returncode == 0:
             return jsonify({
                 'success': True,
@@ -832,71 +1098,89 @@ def api_run_once():
             'error': str(e)
         }), 500
 
+def parse_iso_time(value):
+    """解析ISO时间，不带时区的按本地时间处理，无效时返回None"""
+    try:
+        return datetime.fromisoformat(value).astimezone()
+    except (TypeError, ValueError):
+        return None
+
+def get_scheduler_status():
+    """获取任务状态：是否运行、调度器类型和最后执行时间
+    
+    Python调度器的状态来自scheduler.py写入的状态文件（心跳过期或进程不存在视为未运行），
+    系统CRON检查任务文件和cron进程，均不启动子进程
+    """
+    scheduler = read_status()
+    python_running = bool(scheduler and scheduler['alive'])
+    system_cron = system_cron_running()
+    is_running = python_running or system_cron
+    
+    # 确定调度器类型
+    if python_running and system_cron:
+        scheduler_type = 'both'  # 不应该发生，但以防万一
+    elif python_running:
+        scheduler_type = 'python'
+    elif system_cron:
+        scheduler_type = 'system_cron'
+    else:
+        scheduler_type = 'none'
+    
+    # 尝试获取最后执行时间（从日志文件或其他方式）
+    last_run = None
+    try:
+        # 优先使用最新快照清单中记录的生成时间
+        _, latest_manifest = snapshot_index.latest_manifest()
+        if latest_manifest:
+            last_run = latest_manifest.get('generated_at')
+        
+        # 没有清单时检查最新的compose文件夹时间戳（latest链接或索引中最新的文件夹）
+        if not last_run:
+            latest_folder = snapshot_index.latest()
+            if latest_folder:
+                # 解析时间戳格式：2025_01_03_16_42
+                try:
+                    time_parts = latest_folder.split('_')
+                    if len(time_parts) == 5:
+                        year, month, day, hour, minute = map(int, time_parts)
+                        last_run = datetime(year, month, day, hour, minute).isoformat()
+                except:
+                    pass
+    except:
+        pass
+    
+    # 清单未变化时d2c.py跳过生成、不写快照，快照时间可能比实际最后一次执行早很多：
+    # 在快照时间、调度器记录的最后一次执行和最后一条运行记录中取最新的
+    candidates = [(last_run, 'changed' if last_run else None)]
+    if scheduler and scheduler.get('last_run'):
+        scheduler_run = scheduler['last_run']
+        candidates.append((scheduler_run.get('finished_at'), scheduler_run.get('status')))
+    history = read_last_history()
+    if history:
+        candidates.append((history.get('time'), history.get('status')))
+    last_run, last_run_status = None, None
+    newest = None
+    for value, status in candidates:
+        parsed = parse_iso_time(value)
+        if parsed and (newest is None or parsed > newest):
+            newest, last_run, last_run_status = parsed, value, status
+    
+    return {
+        'running': is_running,
+        'scheduler_type': scheduler_type,
+        'last_run': last_run,
+        'last_run_status': last_run_status,
+        'next_run': scheduler.get('next_run') if python_running else None,
+        'scheduler': scheduler
+    }
+
 @app.route('/api/scheduler/status', methods=['GET'])
 def api_get_scheduler_status():
     """获取任务状态"""
     try:
-        # 使用scheduler_manager.sh获取状态
-        result = subprocess.run(
-            ['/app/scheduler_manager.sh', 'status'],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        
-        # 解析状态输出 - 检查中文和英文的运行状态
-        output_lower = result.stdout.lower() if result.returncode == 0 else ''
-        is_running = False
-        
-        if result.returncode == 0:
-            # 检查Python调度器状态
-            python_running = 'Python调度器: 运行中' in result.stdout or 'python调度器正在运行' in result.stdout
-            # 检查系统CRON状态 - 注意大小写
-            system_cron_running = '系统CRON: 运行中' in result.stdout or '系统cron正在运行' in result.stdout
-            # 只要有一个调度器在运行就认为任务状态为运行中
-            is_running = python_running or system_cron_running or 'running' in output_lower or '正在运行' in result.stdout
-            
-            # 确定调度器类型
-            scheduler_type = 'unknown'
-            if python_running and system_cron_running:
-                scheduler_type = 'both'  # 不应该发生，但以防万一
-            elif python_running:
-                scheduler_type = 'python'
-            elif system_cron_running:
-                scheduler_type = 'system_cron'
-        else:
-            scheduler_type = 'none'
-        
-        # 尝试获取最后执行时间（从日志文件或其他方式）
-        last_run = None
-        try:
-            # 检查最新的compose文件夹时间戳
-            compose_dir = '/app/compose'
-            if os.path.exists(compose_dir):
-                folders = [f for f in os.listdir(compose_dir) if os.path.isdir(os.path.join(compose_dir, f))]
-                if folders:
-                    # 按文件夹名称排序（时间戳格式）
-                    folders.sort(reverse=True)
-                    latest_folder = folders[0]
-                    # 解析时间戳格式：2025_01_03_16_42
-                    try:
-                        time_parts = latest_folder.split('_')
-                        if len(time_parts) == 5:
-                            year, month, day, hour, minute = map(int, time_parts)
-                            last_run = datetime(year, month, day, hour, minute).isoformat()
-                    except:
-                        pass
-        except:
-            pass
-        
         return jsonify({
             'success': True,
-            'status': {
-                'running': is_running,
-                'scheduler_type': scheduler_type,
-                'last_run': last_run,
-                'output': result.stdout
-            }
+            'status': get_scheduler_status()
         })
     except Exception as e:
         return jsonify({
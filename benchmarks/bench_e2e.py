@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端基准测试
+启动模拟Docker服务（fake_docker.py）和docker命令行替身，在可配置的请求延迟下：
+  - 完整执行d2c.main()，统计总耗时、各阶段耗时和Docker API请求数
+  - 用多个线程并发请求Web UI接口，统计延迟分位数
+
+用法:
+    python benchmarks/bench_e2e.py --containers 500 --latency 0.005 --jitter 0.002
+    python benchmarks/bench_e2e.py --containers 500 --web /api/containers --web-requests 50 --concurrency 4
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_docker import FakeDockerServer, default_networks
+from synthetic import make_inventory
+
+
+def run_d2c(server, work_dir, config):
+    """在模拟环境中执行一次d2c.main()，返回(耗时, 清单, API请求数)"""
+    import d2c
+    output_dir = os.path.join(work_dir, 'compose', time.strftime('%Y_%m_%d_%H_%M_%S'))
+    env = {
+        **server.environ(),
+        'OUTPUT_DIR': output_dir,
+        'FORCE_RUN': 'true'
+    }
+    requests_before = server.requests
+    original = os.environ.copy()
+    os.environ.update(env)
+    # 不读写/app/config，使用基准测试自己的配置
+    saved = d2c.ensure_config_file, d2c.load_config, d2c.STATE_DIR, d2c.HISTORY_FILE
+    d2c.ensure_config_file = lambda: None
+    d2c.load_config = lambda: dict(config)
+    d2c.STATE_DIR = os.path.join(work_dir, 'data')
+    d2c.HISTORY_FILE = os.path.join(work_dir, 'history.jsonl')
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            d2c.main()
+        elapsed = time.perf_counter() - start
+    finally:
+        d2c.ensure_config_file, d2c.load_config, d2c.STATE_DIR, d2c.HISTORY_FILE = saved
+        os.environ.clear()
+        os.environ.update(original)
+    with open(os.path.join(output_dir, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    return elapsed, manifest, server.requests - requests_before
+
+
+def load_web(server, path, total, concurrency):
+    """并发请求Web UI接口，返回每个请求的耗时列表"""
+    original = os.environ.copy()
+    os.environ.update(server.environ())
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            import web_ui
+        client = web_ui.app.test_client()
+        latencies = []
+        lock = threading.Lock()
+        counter = iter(range(total))
+
+        def worker():
+            while True:
+                with lock:
+                    if next(counter, None) is None:
+                        return
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    response = client.get(path)
+                elapsed = time.perf_counter() - start
+                if response.status_code != 200:
+                    raise RuntimeError(f'{path} 返回 {response.status_code}')
+                with lock:
+                    latencies.append(elapsed)
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies
+    finally:
+        os.environ.clear()
+        os.environ.update(original)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端基准测试')
+    parser.add_argument('--containers', type=int, default=200, help='合成清单的容器数量')
+    parser.add_argument('--latency', type=float, default=0.002, help='每个Docker API请求的延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.001, help='延迟抖动（秒）')
+    parser.add_argument('--runs', type=int, default=3, help='d2c.main()执行次数')
+    parser.add_argument('--workers', default='1', help='d2c的WORKERS配置')
+    parser.add_argument('--web', metavar='PATH', help='压测的Web UI接口，如 /api/containers')
+    parser.add_argument('--web-requests', type=int, default=20, help='Web接口请求总数')
+    parser.add_argument('--concurrency', type=int, default=4, help='Web接口并发数')
+    args = parser.parse_args()
+
+    containers, networks = make_inventory(args.containers, full=True)
+    config = {'NAS': 'debian', 'NETWORK': 'true', 'SKIP_UNCHANGED': 'false', 'WORKERS': args.workers, 'TZ': 'UTC'}
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        socket_path = os.path.join(work_dir, 'docker.sock')
+        with FakeDockerServer(socket_path, containers, default_networks() + list(networks.values()),
+                              latency=args.latency, jitter=args.jitter, seed=1) as server:
+            print(f"模拟Docker: {len(containers)} 个容器，{len(server.networks)} 个网络，"
+                  f"延迟 {args.latency * 1000:.1f}±{args.jitter * 1000:.1f} ms")
+
+            totals = []
+            for i in range(args.runs):
+                elapsed, manifest, requests = run_d2c(server, work_dir, config)
+                totals.append(elapsed)
+                timings = ', '.join(f"{k}={v:.3f}" for k, v in manifest['timings'].items())
+                print(f"d2c.main() 第{i + 1}次: {elapsed:.3f}s，API请求 {requests} 次，"
+                      f"文件 {len(manifest['files'])} 个 ({timings})")
+            print(f"d2c.main() 中位数 {statistics.median(totals):.3f}s")
+
+            if args.web:
+                latencies = load_web(server, args.web, args.web_requests, args.concurrency)
+                print(f"{args.web}: {len(latencies)} 个请求，并发 {args.concurrency}，"
+                      f"p50 {percentile(latencies, 50) * 1000:.1f} ms，"
+                      f"p95 {percentile(latencies, 95) * 1000:.1f} ms，"
+                      f"最大 {max(latencies) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+容器模型内存基准测试
+对比保留完整docker inspect字典与ContainerRecord精简记录时常驻内存的大小
+
+用法:
+    python benchmarks/bench_memory.py --containers 5000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from container_model import ContainerRecord
+from synthetic import make_inventory
+
+
+def measure(build):
+    """返回build()结果常驻的内存字节数和构建过程中的峰值"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='容器模型内存基准测试')
+    parser.add_argument('--containers', type=int, default=5000, help='容器数量')
+    args = parser.parse_args()
+
+    containers, _ = make_inventory(args.containers, full=True)
+    # 模拟逐个容器执行docker inspect得到的JSON文本
+    payloads = [json.dumps([container]) for container in containers]
+    del containers
+    payload_bytes = sum(len(p) for p in payloads)
+    print(f"容器: {args.containers}，inspect输出合计 {payload_bytes / 1024 / 1024:.1f} MiB")
+
+    raw, raw_current, raw_peak = measure(lambda: [json.loads(p)[0] for p in payloads])
+    del raw
+    records, rec_current, rec_peak = measure(
+        lambda: [ContainerRecord.from_inspect(json.loads(p)[0]) for p in payloads]
+    )
+
+    print(f"完整inspect字典  常驻 {raw_current / 1024 / 1024:8.1f} MiB  峰值 {raw_peak / 1024 / 1024:8.1f} MiB")
+    print(f"ContainerRecord  常驻 {rec_current / 1024 / 1024:8.1f} MiB  峰值 {rec_peak / 1024 / 1024:8.1f} MiB")
+    print(f"常驻内存减少 {(1 - rec_current / raw_current) * 100:.1f}%，"
+          f"每个容器 {raw_current / args.containers / 1024:.1f} KiB -> {rec_current / args.containers / 1024:.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并行生成基准测试
+对比串行与进程池模式下 转换→生成YAML→写文件 的耗时，并校验两种模式输出完全一致
+
+用法:
+    python benchmarks/bench_parallel.py --containers 2000 --workers 1 2 4 8
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import d2c
+from synthetic import make_inventory
+
+
+def run_pipeline(container_groups, containers_by_id, networks, config, workers, output_dir):
+    """执行一次生成流水线，返回(耗时, {文件名: sha256})"""
+    tasks = [d2c.build_render_task(group, containers_by_id, networks, config) for group in container_groups]
+    digests = {}
+    start = time.perf_counter()
+    # d2c在转换过程中会逐个容器打印日志，基准测试时丢弃
+    with contextlib.redirect_stdout(io.StringIO()):
+        for rendered in d2c.render_groups(tasks, workers):
+            file_path, entry = d2c.write_compose_file(rendered, output_dir)
+            digests[entry['file']] = entry['sha256']
+    return time.perf_counter() - start, digests
+
+
+def main():
+    parser = argparse.ArgumentParser(description='并行生成基准测试')
+    parser.add_argument('--containers', type=int, default=2000, help='容器数量')
+    parser.add_argument('--networks', type=int, default=None, help='自定义网络数量')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1], help='要对比的进程数')
+    parser.add_argument('--repeat', type=int, default=3, help='每种配置重复次数，取最小值')
+    args = parser.parse_args()
+
+    containers, networks = make_inventory(args.containers, args.networks)
+    config = {'NAS': 'debian', 'NETWORK': 'true'}
+    with contextlib.redirect_stdout(io.StringIO()):
+        container_groups = d2c.group_containers_by_network(containers, networks)
+    containers_by_id = {container['Id']: container for container in containers}
+    print(f"容器: {len(containers)}，网络: {len(networks)}，分组: {len(container_groups)}，CPU: {os.cpu_count()}")
+
+    baseline = None
+    baseline_digest = None
+    for workers in sorted(set(args.workers)):
+        best = None
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as output_dir:
+                elapsed, digests = run_pipeline(container_groups, containers_by_id, networks, config, workers, output_dir)
+            best = elapsed if best is None else min(best, elapsed)
+        combined = hashlib.sha256(repr(sorted(digests.items())).encode('utf-8')).hexdigest()
+        if baseline is None:
+            baseline, baseline_digest = best, combined
+        identical = '一致' if combined == baseline_digest else '不一致!'
+        print(f"workers={workers:<3} 耗时 {best:8.3f}s  加速比 {baseline / best:5.2f}x  输出与串行{identical}")
+        if combined != baseline_digest:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
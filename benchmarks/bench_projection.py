@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+投影inspect基准测试
+对比完整docker inspect输出与INSPECT_TEMPLATE投影输出的字节数和JSON解析耗时
+
+用法:
+    python benchmarks/bench_projection.py --containers 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from container_model import ContainerRecord
+from synthetic import make_inventory
+
+
+def project(container):
+    """按d2c.INSPECT_TEMPLATE的结构截取字段（与docker按模板输出的内容一致）"""
+    config = container['Config']
+    host_config = container['HostConfig']
+    return {
+        'Id': container['Id'],
+        'Name': container['Name'],
+        'State': {'Status': container['State']['Status'], 'Running': container['State']['Running']},
+        'Config': {key: config.get(key) for key in ('Image', 'Env', 'Labels', 'Entrypoint', 'Cmd', 'Healthcheck')},
+        'HostConfig': {key: host_config.get(key) for key in (
+            'RestartPolicy', 'NetworkMode', 'ExtraHosts', 'Links', 'Privileged', 'Devices', 'CapAdd'
+        )},
+        'NetworkSettings': {
+            'Ports': container['NetworkSettings']['Ports'],
+            'Networks': container['NetworkSettings']['Networks']
+        },
+        'Mounts': container['Mounts']
+    }
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='投影inspect基准测试')
+    parser.add_argument('--containers', type=int, default=2000, help='容器数量')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最小值')
+    args = parser.parse_args()
+
+    containers, _ = make_inventory(args.containers, full=True)
+    # 完整模式：每个容器一次docker inspect，输出为JSON数组
+    full_payloads = [json.dumps([container], indent=4) for container in containers]
+    # 投影模式：一次调用，每个容器一行JSON
+    projected_payload = '\n'.join(json.dumps(project(container)) for container in containers) + '\n'
+
+    full_bytes = sum(len(p.encode('utf-8')) for p in full_payloads)
+    projected_bytes = len(projected_payload.encode('utf-8'))
+
+    full_time = best_of(args.repeat, lambda: [
+        ContainerRecord.from_inspect(json.loads(p)[0]) for p in full_payloads
+    ])
+    projected_time = best_of(args.repeat, lambda: [
+        ContainerRecord.from_inspect(json.loads(line)) for line in projected_payload.splitlines() if line
+    ])
+
+    print(f"容器: {args.containers}")
+    print(f"完整inspect  {full_bytes / 1024 / 1024:8.2f} MiB  解析 {full_time * 1000:8.1f} ms")
+    print(f"投影inspect  {projected_bytes / 1024 / 1024:8.2f} MiB  解析 {projected_time * 1000:8.1f} ms")
+    print(f"字节减少 {(1 - projected_bytes / full_bytes) * 100:.1f}%，解析耗时减少 {(1 - projected_time / full_time) * 100:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+d2c热点路径基准测试
+在多个规模的合成清单上分别测量 分组 / 转换 / YAML生成 / 写文件 各阶段的耗时和峰值内存，
+结果可保存为JSON，并与之前保存的结果对比以发现性能回退
+
+用法:
+    python benchmarks/bench_suite.py                                  # 默认规模 100 1000 5000
+    python benchmarks/bench_suite.py --scales 500 2000 --save base.json
+    python benchmarks/bench_suite.py --compare base.json --threshold 0.15
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import yaml
+import d2c
+from container_model import ContainerRecord
+from synthetic import make_inventory
+
+
+CONFIG = {'NAS': 'debian', 'NETWORK': 'true'}
+PHASES = ('model', 'group', 'convert', 'emit', 'write')
+
+
+def build_phases(raw_containers, networks, output_dir):
+    """返回按顺序执行的(阶段名, 函数)列表，每个阶段使用上一阶段的结果"""
+    state = {}
+
+    def model():
+        state['containers'] = [ContainerRecord.from_inspect(c) for c in raw_containers]
+
+    def group():
+        state['groups'] = d2c.group_containers_by_network(state['containers'], networks)
+
+    def convert():
+        by_id = {c['Id']: c for c in state['containers']}
+        state['services'] = [
+            [d2c.convert_container_to_service(by_id[cid], networks, CONFIG) for cid in group]
+            for group in state['groups']
+        ]
+
+    def emit():
+        state['yaml'] = [
+            yaml.dump({'version': '3.8', 'services': {str(i): s for i, s in enumerate(services)}},
+                      Dumper=d2c.ComposeDumper, default_flow_style=False, sort_keys=False,
+                      allow_unicode=True, indent=2, width=float('inf')).encode('utf-8')
+            for services in state['services']
+        ]
+
+    def write():
+        for i, data in enumerate(state['yaml']):
+            with open(os.path.join(output_dir, f'{i}.yaml'), 'wb') as f:
+                f.write(data)
+
+    return [('model', model), ('group', group), ('convert', convert), ('emit', emit), ('write', write)]
+
+
+def run_once(raw_containers, networks, trace_memory):
+    """执行一遍所有阶段，返回 {阶段: {'time': 秒, 'peak': 字节或None}}"""
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, func in build_phases(raw_containers, networks, output_dir):
+            if trace_memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            # d2c转换时会逐个容器打印日志，基准测试时丢弃
+            with contextlib.redirect_stdout(io.StringIO()):
+                func()
+            elapsed = time.perf_counter() - start
+            peak = None
+            if trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            results[name] = {'time': elapsed, 'peak': peak}
+    return results
+
+
+def bench_scale(container_count, repeat):
+    """在一个规模上测量：计时取repeat次最小值，峰值内存单独用tracemalloc跑一遍"""
+    raw_containers, networks = make_inventory(container_count, full=True)
+    best = {}
+    for _ in range(repeat):
+        for name, result in run_once(raw_containers, networks, trace_memory=False).items():
+            best[name] = min(best.get(name, result['time']), result['time'])
+    memory = run_once(raw_containers, networks, trace_memory=True)
+    return {name: {'time': best[name], 'peak': memory[name]['peak']} for name in PHASES}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_results(results):
+    print(f"{'规模':>8} {'阶段':<8} {'耗时(ms)':>12} {'峰值内存(MiB)':>14}")
+    for scale, phases in results.items():
+        for name in PHASES:
+            phase = phases[name]
+            print(f"{scale:>8} {name:<8} {phase['time'] * 1000:12.1f} {phase['peak'] / 1024 / 1024:14.2f}")
+
+
+def compare(results, baseline, threshold, min_time):
+    """与基准结果对比，返回超过阈值的回退项列表
+
+    两次耗时都低于min_time秒的阶段只显示变化，不判定为回退（计时噪声过大）。
+    """
+    regressions = []
+    print(f"\n与基准 {baseline.get('revision') or ''} 对比（阈值 {threshold:.0%}）:")
+    print(f"{'规模':>8} {'阶段':<8} {'耗时变化':>10} {'内存变化':>10}")
+    for scale, phases in results.items():
+        base_phases = baseline['results'].get(scale)
+        if not base_phases:
+            continue
+        for name in PHASES:
+            if name not in base_phases:
+                continue
+            time_delta = phases[name]['time'] / base_phases[name]['time'] - 1 if base_phases[name]['time'] else 0
+            peak_delta = phases[name]['peak'] / base_phases[name]['peak'] - 1 if base_phases[name]['peak'] else 0
+            flag = ''
+            noisy = max(phases[name]['time'], base_phases[name]['time']) < min_time
+            if (time_delta > threshold and not noisy) or peak_delta > threshold:
+                flag = '  <-- 回退'
+                regressions.append((scale, name, time_delta, peak_delta))
+            print(f"{scale:>8} {name:<8} {time_delta:>+10.1%} {peak_delta:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='d2c热点路径基准测试')
+    parser.add_argument('--scales', type=int, nargs='+', default=[100, 1000, 5000], help='容器数量')
+    parser.add_argument('--repeat', type=int, default=3, help='计时重复次数，取最小值')
+    parser.add_argument('--save', metavar='FILE', help='把结果保存为JSON')
+    parser.add_argument('--compare', metavar='FILE', help='与之前保存的结果对比')
+    parser.add_argument('--threshold', type=float, default=0.10, help='判定为回退的相对变化，默认0.10')
+    parser.add_argument('--min-time', type=float, default=0.01, help='耗时低于该秒数的阶段不判定耗时回退，默认0.01')
+    args = parser.parse_args()
+
+    results = {}
+    for scale in args.scales:
+        print(f"测量 {scale} 个容器...", file=sys.stderr)
+        results[str(scale)] = bench_scale(scale, args.repeat)
+    print_results(results)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({
+                'revision': git_revision(),
+                'python': platform.python_version(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': results
+            }, f, indent=2)
+        print(f"\n结果已保存到 {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold, args.min_time):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
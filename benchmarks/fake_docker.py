@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模拟Docker Engine API的本地服务
+在Unix socket上提供 /containers/json、/containers/<id>/json、/networks、/networks/<id>
+几个d2c用到的只读接口，数据来自合成清单或保存的转储文件，每个请求可配置延迟和抖动。
+配合 benchmarks/bin/docker 命令行替身，d2c.main() 和 Web UI 可以在没有dockerd的机器上端到端压测。
+
+用法:
+    python benchmarks/fake_docker.py --socket /tmp/fake-docker.sock --containers 1000 --latency 0.005 --jitter 0.002
+    export DOCKER_HOST=unix:///tmp/fake-docker.sock
+    export PATH="$PWD/benchmarks/bin:$PATH"
+    docker ps -a --format '{{.ID}}'
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from synthetic import make_inventory, object_id
+
+API_VERSION = 'v1.43'
+SHIM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bin')
+
+
+def container_summary(container):
+    """/containers/json 列表中的单个容器"""
+    return {
+        'Id': container['Id'],
+        'Names': [container['Name']],
+        'Image': container['Config'].get('Image'),
+        'Created': container.get('Created', ''),
+        'State': container['State'].get('Status', 'running'),
+        'Status': 'Up' if container['State'].get('Running') else 'Exited',
+        'NetworkSettings': {'Networks': container['NetworkSettings'].get('Networks') or {}}
+    }
+
+
+class FakeDockerHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.delay()
+        with server.lock:
+            server.requests += 1
+        parsed = urlparse(self.path)
+        parts = [p for p in parsed.path.split('/') if p]
+        # 忽略版本前缀 /v1.43/...
+        if parts and parts[0].startswith('v1.'):
+            parts = parts[1:]
+        query = parse_qs(parsed.query)
+
+        if parts == ['_ping']:
+            return self.send_json('OK')
+        if parts == ['containers', 'json']:
+            show_all = query.get('all', ['0'])[0] in ('1', 'true')
+            items = [container_summary(c) for c in server.containers
+                     if show_all or c['State'].get('Running')]
+            return self.send_json(items)
+        if len(parts) == 3 and parts[0] == 'containers' and parts[2] == 'json':
+            container = server.find(server.containers, parts[1], 'Name')
+            if container is None:
+                return self.send_json({'message': f'No such container: {parts[1]}'}, 404)
+            return self.send_json(container)
+        if parts == ['networks']:
+            return self.send_json(server.networks)
+        if len(parts) == 2 and parts[0] == 'networks':
+            network = server.find(server.networks, parts[1], 'Name')
+            if network is None:
+                return self.send_json({'message': f'network {parts[1]} not found'}, 404)
+            return self.send_json(network)
+        self.send_json({'message': 'page not found'}, 404)
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Api-Version', API_VERSION[1:])
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeDockerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """在Unix socket上提供模拟的Engine API
+
+    Args:
+        socket_path: socket文件路径
+        containers: docker inspect格式的容器列表
+        networks: docker network inspect格式的网络列表
+        latency: 每个请求的基础延迟（秒）
+        jitter: 在基础延迟上随机增减的最大值（秒）
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, socket_path, containers, networks, latency=0.0, jitter=0.0, seed=None):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self.socket_path = socket_path
+        self.containers = containers
+        self.networks = networks
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._thread = None
+        super().__init__(socket_path, FakeDockerHandler)
+
+    def get_request(self):
+        # UnixStreamServer的客户端地址为空字符串，BaseHTTPRequestHandler需要一个元组
+        request, _ = super().get_request()
+        return request, ('fake-docker', 0)
+
+    def delay(self):
+        if self.latency or self.jitter:
+            with self.lock:
+                value = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+            if value > 0:
+                time.sleep(value)
+
+    @staticmethod
+    def find(items, key, name_field):
+        """按完整ID、ID前缀或名称查找"""
+        for item in items:
+            if item['Id'] == key or item.get(name_field, '').lstrip('/') == key.lstrip('/'):
+                return item
+        if len(key) >= 4:
+            matches = [item for item in items if item['Id'].startswith(key)]
+            if len(matches) == 1:
+                return matches[0]
+        return None
+
+    def start(self):
+        """在后台线程中运行，返回self"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def environ(self):
+        """让d2c子进程使用本服务和docker命令行替身所需的环境变量"""
+        return {
+            'DOCKER_HOST': f'unix://{self.socket_path}',
+            'PATH': SHIM_DIR + os.pathsep + os.environ.get('PATH', '')
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """通过Unix socket发送HTTP请求"""
+
+    def __init__(self, socket_path, timeout=30):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class FakeDockerClient:
+    """docker命令行替身使用的最小Engine API客户端（复用同一个连接）"""
+
+    def __init__(self, socket_path):
+        self.conn = UnixHTTPConnection(socket_path)
+
+    @classmethod
+    def from_env(cls):
+        host = os.environ.get('DOCKER_HOST', 'unix:///var/run/docker.sock')
+        if not host.startswith('unix://'):
+            raise ValueError(f'只支持unix socket: {host}')
+        return cls(host[len('unix://'):])
+
+    def get(self, path):
+        """返回(状态码, 解析后的JSON)"""
+        self.conn.request('GET', f'/{API_VERSION}{path}')
+        response = self.conn.getresponse()
+        return response.status, json.loads(response.read() or b'null')
+
+    def containers(self, all=False):
+        return self.get(f"/containers/json?all={1 if all else 0}")[1]
+
+    def inspect_container(self, key):
+        return self.get(f"/containers/{quote(key, safe='')}/json")
+
+    def networks(self):
+        return self.get('/networks')[1]
+
+    def inspect_network(self, key):
+        return self.get(f"/networks/{quote(key, safe='')}")
+
+
+def load_inventory(args):
+    """根据命令行参数加载转储文件或生成合成清单，返回(容器列表, 网络列表)"""
+    if args.dump:
+        from d2c import iter_json_objects
+        containers, networks = [], []
+        with open(args.dump, 'r', encoding='utf-8') as f:
+            for obj in iter_json_objects(f):
+                if 'State' in obj or 'Config' in obj:
+                    containers.append(obj)
+                elif 'Driver' in obj:
+                    networks.append(obj)
+        return containers, networks
+    containers, networks = make_inventory(args.containers, args.networks, full=True)
+    return containers, list(networks.values())
+
+
+def default_networks():
+    """docker默认存在的三个网络"""
+    return [
+        {'Name': name, 'Id': object_id('default-network', index), 'Driver': driver, 'Scope': 'local',
+         'Created': '2025-01-01T00:00:00Z', 'IPAM': {'Driver': 'default', 'Config': []}}
+        for index, (name, driver) in enumerate([('bridge', 'bridge'), ('host', 'host'), ('none', 'null')], start=1)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模拟Docker Engine API服务')
+    parser.add_argument('--socket', default='/tmp/fake-docker.sock', help='Unix socket路径')
+    parser.add_argument('--containers', type=int, default=200, help='合成清单的容器数量')
+    parser.add_argument('--networks', type=int, default=None, help='合成清单的网络数量')
+    parser.add_argument('--dump', help='使用保存的inspect转储文件代替合成清单')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延迟的随机抖动（秒）')
+    args = parser.parse_args()
+
+    containers, networks = load_inventory(args)
+    server = FakeDockerServer(args.socket, containers, default_networks() + networks, args.latency, args.jitter)
+    print(f"模拟Docker服务: unix://{args.socket}，{len(containers)} 个容器，{len(server.networks)} 个网络")
+    print(f"export DOCKER_HOST=unix://{args.socket}")
+    print(f'export PATH="{SHIM_DIR}:$PATH"')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    main()
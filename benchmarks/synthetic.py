@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成容器清单生成器
+生成与docker inspect结构一致的容器和网络信息，用于基准测试
+"""
+
+import argparse
+import hashlib
+import json
+import random
+
+
+def object_id(kind, index):
+    """生成与docker一样的64位十六进制ID（前12位互不相同，可作为短ID使用）"""
+    return hashlib.sha256(f'{kind}-{index}'.encode('utf-8')).hexdigest()
+
+
+def make_networks(network_count, macvlan_every=0):
+    """生成网络信息字典：网络名 -> {'Driver': ...}"""
+    networks = {}
+    for i in range(network_count):
+        driver = 'macvlan' if macvlan_every and i % macvlan_every == 0 else 'bridge'
+        networks[f'net{i}'] = {
+            'Id': object_id('network', i),
+            'Name': f'net{i}',
+            'Driver': driver,
+            'Scope': 'local',
+            'Created': '2025-01-01T00:00:00Z',
+            'IPAM': {'Driver': 'default', 'Config': [{'Subnet': f'10.{i // 256 % 256}.{i % 256}.0/24'}]}
+        }
+    return networks
+
+
+def make_container(index, network_name, env_count=20, port_count=2, link_to=None,
+                   port_range=0, static_ip=False, host_network=False):
+    """生成单个容器的inspect信息
+
+    Args:
+        port_range: 额外映射一段连续端口（如FTP被动端口）的数量，0表示不映射
+        static_ip: 是否在IPAMConfig中指定固定IP（macvlan网络常见）
+        host_network: 是否使用host网络模式
+    """
+    ports = {}
+    for p in range(port_count):
+        ports[f'{8000 + p}/tcp'] = [{'HostIp': '0.0.0.0', 'HostPort': str(10000 + index * port_count + p)}]
+    for p in range(port_range):
+        # 同时绑定IPv4和IPv6，与docker实际输出一致
+        ports[f'{30000 + p}/tcp'] = [
+            {'HostIp': '0.0.0.0', 'HostPort': str(30000 + p)},
+            {'HostIp': '::', 'HostPort': str(30000 + p)}
+        ]
+    address = f'10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}'
+    if host_network:
+        network_name = 'host'
+    container = {
+        'Id': object_id('container', index),
+        'Name': f'/app{index}_svc',
+        'Created': '2025-01-01T00:00:00Z',
+        'State': {'Status': 'running', 'Running': True},
+        'Config': {
+            'Image': f'registry.local/app{index % 50}:latest',
+            'Env': ['PATH=/usr/local/bin:/usr/bin'] + [f'VAR_{n}=value_{index}_{n}' for n in range(env_count)],
+            'Labels': {'com.centurylinklabs.watchtower.enable': 'true', 'org.opencontainers.image.version': '1.0'},
+            'Entrypoint': ['/entrypoint.sh'],
+            'Cmd': ['run', '--port', '8000'],
+            'Healthcheck': None
+        },
+        'HostConfig': {
+            'RestartPolicy': {'Name': 'unless-stopped'},
+            'NetworkMode': network_name,
+            'Links': [f'/app{link_to}_svc:/app{index}_svc/dep'] if link_to is not None else None,
+            'ExtraHosts': None,
+            'Privileged': False,
+            'Devices': None,
+            'CapAdd': None
+        },
+        'NetworkSettings': {
+            'Ports': ports,
+            'Networks': {
+                network_name: {
+                    'IPAMConfig': None,
+                    'IPAddress': address,
+                    'GlobalIPv6Address': '',
+                    'MacAddress': f'02:42:ac:{index // 65536 % 256:02x}:{index // 256 % 256:02x}:{index % 256:02x}'
+                }
+            }
+        },
+        'Mounts': [
+            {'Type': 'volume', 'Name': f'data{index}', 'Source': '', 'Destination': '/data', 'RW': True},
+            {'Type': 'bind', 'Source': f'/srv/app{index}/config', 'Destination': '/config', 'RW': False}
+        ]
+    }
+    if static_ip:
+        container['NetworkSettings']['Networks'][network_name]['IPAMConfig'] = {'IPv4Address': address}
+    if host_network:
+        container['NetworkSettings']['Ports'] = {}
+    return container
+
+
+def add_inspect_noise(container, index, label_count=30):
+    """补充真实docker inspect中存在但生成compose用不到的字段"""
+    container.update({
+        'Path': '/entrypoint.sh',
+        'Args': ['run', '--port', '8000'],
+        'Image': f'sha256:{index:064x}',
+        'ResolvConfPath': f'/var/lib/docker/containers/{container["Id"]}/resolv.conf',
+        'HostnamePath': f'/var/lib/docker/containers/{container["Id"]}/hostname',
+        'HostsPath': f'/var/lib/docker/containers/{container["Id"]}/hosts',
+        'LogPath': f'/var/lib/docker/containers/{container["Id"]}/{container["Id"]}-json.log',
+        'Driver': 'overlay2',
+        'Platform': 'linux',
+        'RestartCount': 0,
+        'GraphDriver': {
+            'Name': 'overlay2',
+            'Data': {
+                key: ':'.join(f'/var/lib/docker/overlay2/{index:x}{n:060x}/diff' for n in range(8))
+                for key in ('LowerDir', 'MergedDir', 'UpperDir', 'WorkDir')
+            }
+        }
+    })
+    container['State'].update({
+        'Paused': False, 'Restarting': False, 'OOMKilled': False, 'Dead': False,
+        'Pid': 1000 + index, 'ExitCode': 0, 'Error': '',
+        'StartedAt': '2025-01-01T00:00:00.000000000Z', 'FinishedAt': '0001-01-01T00:00:00Z'
+    })
+    container['Config'].update({
+        'Hostname': container['Id'][:12], 'Domainname': '', 'User': '', 'Tty': False,
+        'OpenStdin': False, 'StdinOnce': False, 'WorkingDir': '/app', 'OnBuild': None,
+        'ExposedPorts': {port: {} for port in container['NetworkSettings']['Ports']},
+        'Volumes': {'/data': {}}
+    })
+    container['Config']['Labels'].update({
+        f'org.opencontainers.image.annotation.{n}': f'annotation value {n} for container {index}'
+        for n in range(label_count)
+    })
+    container['HostConfig'].update({
+        'Binds': [f'/srv/app{index}/config:/config:ro'], 'ContainerIDFile': '',
+        'LogConfig': {'Type': 'json-file', 'Config': {}}, 'PortBindings': container['NetworkSettings']['Ports'],
+        'AutoRemove': False, 'VolumeDriver': '', 'VolumesFrom': None, 'CgroupnsMode': 'private',
+        'Dns': [], 'DnsOptions': [], 'DnsSearch': [], 'IpcMode': 'private', 'Cgroup': '', 'OomScoreAdj': 0,
+        'PidMode': '', 'PublishAllPorts': False, 'ReadonlyRootfs': False, 'SecurityOpt': None,
+        'UTSMode': '', 'UsernsMode': '', 'ShmSize': 67108864, 'Runtime': 'runc', 'Isolation': '',
+        'CpuShares': 0, 'Memory': 0, 'NanoCpus': 0, 'CgroupParent': '', 'BlkioWeight': 0,
+        'MaskedPaths': ['/proc/asound', '/proc/acpi', '/proc/kcore', '/proc/keys', '/proc/latency_stats',
+                        '/proc/timer_list', '/proc/timer_stats', '/proc/sched_debug', '/proc/scsi',
+                        '/sys/firmware', '/sys/devices/virtual/powercap'],
+        'ReadonlyPaths': ['/proc/bus', '/proc/fs', '/proc/irq', '/proc/sys', '/proc/sysrq-trigger']
+    })
+    container['NetworkSettings'].update({
+        'Bridge': '', 'SandboxID': f'{index:064x}', 'SandboxKey': f'/var/run/docker/netns/{index:012x}',
+        'HairpinMode': False, 'LinkLocalIPv6Address': '', 'LinkLocalIPv6PrefixLen': 0
+    })
+    for network_name, endpoint in container['NetworkSettings']['Networks'].items():
+        endpoint.update({
+            'Links': None, 'Aliases': [container['Id'][:12]], 'NetworkID': f'{index:064x}',
+            'EndpointID': f'{index + 1:064x}', 'Gateway': '10.0.0.1', 'IPPrefixLen': 16,
+            'IPv6Gateway': '', 'GlobalIPv6PrefixLen': 0, 'DriverOpts': None, 'DNSNames': [network_name]
+        })
+    for mount in container['Mounts']:
+        mount.update({'Driver': 'local' if mount['Type'] == 'volume' else '', 'Mode': '', 'Propagation': 'rprivate'})
+    return container
+
+
+def make_inventory(container_count, network_count=None, env_count=20, port_count=2,
+                   link_ratio=0.1, macvlan_every=10, seed=42, full=False,
+                   port_range_ratio=0.02, port_range=20, host_ratio=0.02):
+    """生成(容器列表, 网络字典)
+
+    Args:
+        container_count: 容器数量
+        network_count: 自定义网络数量，默认每5个容器一个网络
+        env_count: 每个容器的环境变量数量
+        port_count: 每个容器映射的端口数量
+        link_ratio: 使用link指向前一个容器的比例
+        macvlan_every: 每隔多少个网络生成一个macvlan网络，0表示不生成
+        seed: 随机种子，保证多次生成结果一致
+        full: 是否补充GraphDriver、完整State等生成compose用不到的inspect字段
+        port_range_ratio: 额外映射一段连续端口的容器比例
+        port_range: 连续端口段的长度
+        host_ratio: 使用host网络模式的容器比例
+    """
+    rng = random.Random(seed)
+    if network_count is None:
+        network_count = max(1, container_count // 5)
+    networks = make_networks(network_count, macvlan_every)
+    containers = []
+    for index in range(container_count):
+        network_name = f'net{rng.randrange(network_count)}'
+        link_to = index - 1 if index and rng.random() < link_ratio else None
+        container = make_container(
+            index, network_name, env_count, port_count, link_to,
+            port_range=port_range if rng.random() < port_range_ratio else 0,
+            static_ip=networks[network_name]['Driver'] == 'macvlan',
+            host_network=rng.random() < host_ratio
+        )
+        if full:
+            add_inspect_noise(container, index)
+        containers.append(container)
+    return containers, networks
+
+
+def write_dump(path, containers, networks):
+    """按NDJSON写出容器和网络，可直接用于d2c.py --from-dump"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for container in containers:
+            f.write(json.dumps(container) + '\n')
+        for network in networks.values():
+            f.write(json.dumps(network) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成容器清单转储文件')
+    parser.add_argument('containers', type=int, help='容器数量')
+    parser.add_argument('-o', '--output', required=True, help='输出的NDJSON文件')
+    parser.add_argument('--networks', type=int, default=None, help='自定义网络数量')
+    parser.add_argument('--env', type=int, default=20, help='每个容器的环境变量数量')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--full', action='store_true', help='包含生成compose用不到的inspect字段')
+    args = parser.parse_args()
+
+    containers, networks = make_inventory(args.containers, args.networks, env_count=args.env,
+                                          seed=args.seed, full=args.full)
+    write_dump(args.output, containers, networks)
+    print(f"已写入 {args.output}: {len(containers)} 个容器，{len(networks)} 个网络")
+
+
+if __name__ == '__main__':
+    main()
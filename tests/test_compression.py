@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for compression.py module
+"""
+
+import pytest
+import gzip
+import json
+import os
+import sys
+from unittest.mock import patch
+
+# Add the backend directory to the path so we can import the modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from flask import Flask, Response
+from compression import choose_encoding, compress_response, iter_json
+
+
+class TestChooseEncoding:
+    """Test Accept-Encoding negotiation"""
+
+    def test_gzip_and_quality(self):
+        """Test that gzip is chosen unless refused with q=0"""
+        assert choose_encoding('gzip, deflate') == 'gzip'
+        assert choose_encoding('gzip;q=0, deflate') is None
+        assert choose_encoding('') is None
+
+    def test_brotli_only_when_installed(self):
+        """Test that br is preferred only when the brotli module is importable"""
+        with patch('compression.brotli', None):
+            assert choose_encoding('br, gzip') == 'gzip'
+        with patch('compression.brotli', object()):
+            assert choose_encoding('br, gzip') == 'br'
+
+
+class TestCompressResponse:
+    """Test response compression"""
+
+    def setup_method(self):
+        self.app = Flask(__name__)
+
+    def test_buffered_json_is_gzipped_with_weak_etag(self):
+        """Test that a large JSON body is compressed and its ETag made weak"""
+        body = json.dumps({'items': ['x' * 10] * 500})
+        with self.app.test_request_context():
+            response = Response(body, mimetype='application/json')
+            response.set_etag('abc')
+            response = compress_response(response, 'gzip')
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.get_data()).decode() == body
+        assert response.get_etag() == ('abc', True)
+        assert 'Accept-Encoding' in response.vary
+
+    def test_small_and_binary_bodies_untouched(self):
+        """Test that tiny bodies and non-text types are sent as is"""
+        with self.app.test_request_context():
+            small = compress_response(Response('{}', mimetype='application/json'), 'gzip')
+            binary = compress_response(Response(b'\0' * 4096, mimetype='application/zip'), 'gzip')
+
+        assert 'Content-Encoding' not in small.headers
+        assert 'Content-Encoding' not in binary.headers
+
+    def test_streamed_body_is_compressed_chunk_by_chunk(self):
+        """Test that a generator body stays streamed and decompresses to the full payload"""
+        payload = {'folders': {str(i): {'name': str(i)} for i in range(2000)}}
+        with self.app.test_request_context():
+            response = Response(iter_json(payload, chunk_size=4096), mimetype='application/json')
+            response = compress_response(response, 'gzip')
+            assert response.is_streamed
+            data = b''.join(response.response)
+
+        assert json.loads(gzip.decompress(data)) == payload
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for container_model.py module
+"""
+
+import pytest
+import os
+import pickle
+import sys
+from unittest.mock import patch
+
+# Add the backend directory to the path so we can import the modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from container_model import ContainerRecord
+from d2c import convert_container_to_service, group_containers_by_network
+
+
+def make_inspect():
+    """A docker inspect result with fields the generator does not use"""
+    return {
+        'Id': 'a' * 64,
+        'Name': '/web',
+        'GraphDriver': {'Name': 'overlay2', 'Data': {'LowerDir': '/var/lib/docker/overlay2/x/diff'}},
+        'LogPath': '/var/lib/docker/containers/a/a-json.log',
+        'State': {'Status': 'running', 'Running': True, 'Pid': 1234, 'StartedAt': '2025-01-01'},
+        'Config': {
+            'Image': 'nginx:latest',
+            'Env': ['PATH=/usr/bin', 'MODE=prod'],
+            'Labels': {
+                'com.centurylinklabs.watchtower.enable': 'true',
+                'com.docker.compose.project': 'shop',
+                'org.opencontainers.image.source': 'https://example.com'
+            },
+            'Hostname': 'abc',
+            'ExposedPorts': {'80/tcp': {}}
+        },
+        'HostConfig': {
+            'RestartPolicy': {'Name': 'always'},
+            'NetworkMode': 'app_net',
+            'MaskedPaths': ['/proc/kcore'],
+            'Links': None
+        },
+        'NetworkSettings': {
+            'Ports': {'80/tcp': [{'HostIp': '0.0.0.0', 'HostPort': '8080'}]},
+            'SandboxKey': '/var/run/docker/netns/x',
+            'Networks': {'app_net': {'IPAddress': '172.18.0.2', 'Gateway': '172.18.0.1', 'Aliases': ['web']}}
+        },
+        'Mounts': [{'Type': 'bind', 'Source': '/srv', 'Destination': '/data', 'RW': True, 'Propagation': 'rprivate'}]
+    }
+
+
+class TestContainerRecord:
+    """Test the compact container record"""
+
+    def test_unused_fields_are_dropped(self):
+        """Test that only generator-relevant fields are kept"""
+        record = ContainerRecord.from_inspect(make_inspect())
+
+        assert not hasattr(record, '__dict__')
+        assert 'GraphDriver' not in record
+        assert record['State'] == {'Status': 'running', 'Running': True}
+        assert set(record['Config']['Labels']) == {'com.centurylinklabs.watchtower.enable', 'com.docker.compose.project'}
+        assert 'MaskedPaths' not in record['HostConfig']
+        assert record['NetworkSettings']['Networks']['app_net'] == {'IPAddress': '172.18.0.2'}
+        assert record['Mounts'] == [{'Type': 'bind', 'Source': '/srv', 'Destination': '/data', 'RW': True}]
+
+    def test_dict_style_access(self):
+        """Test the mapping interface used by the grouping and conversion code"""
+        record = ContainerRecord.from_inspect(make_inspect())
+
+        assert record['Name'] == '/web'
+        assert record.get('HostConfig', {}).get('NetworkMode') == 'app_net'
+        assert record.get('Missing', 'default') == 'default'
+        with pytest.raises(KeyError):
+            record['Missing']
+
+    def test_conversion_matches_raw_inspect(self):
+        """Test that conversion and grouping produce the same result for records and raw dicts"""
+        raw = make_inspect()
+        record = ContainerRecord.from_inspect(raw)
+
+        with patch('d2c.load_config', return_value={'NAS': 'debian', 'NETWORK': 'true'}):
+            assert convert_container_to_service(record) == convert_container_to_service(raw)
+        assert group_containers_by_network([record], {}) == group_containers_by_network([raw], {})
+
+    def test_pickle_roundtrip(self):
+        """Test that records can be sent to worker processes"""
+        record = ContainerRecord.from_inspect(make_inspect())
+
+        assert pickle.loads(pickle.dumps(record)) == record
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -8,6 +8,9 @@ import json
 import os
 import tempfile
 import shutil
+import io
+import re
+import time
 from unittest.mock import patch, mock_open, MagicMock
 import sys
 
@@ -18,7 +21,37 @@ from d2c import (
     load_config, 
     ensure_config_file, 
     group_containers_by_network,
-    convert_container_to_service
+    convert_container_to_service,
+    generate_compose_file,
+    new_manifest,
+    get_inventory_fingerprint,
+    get_containers,
+    INSPECT_TEMPLATE,
+    iter_json_objects,
+    load_dump,
+    run_from_dump,
+    container_service_hash,
+    render_compose_group,
+    get_worker_count,
+    create_staging_dir,
+    publish_snapshot,
+    update_latest_link,
+    run_command,
+    reset_command_stats,
+    group_containers,
+    get_networks,
+    generate_compose_for_selected_containers,
+    get_command_stats,
+    inspect_selected_containers,
+    is_valid_container_ref,
+    record_skipped,
+    CommandTimeoutError,
+    append_history,
+    read_last_history,
+    save_state,
+    load_state,
+    generate_snapshot,
+    main
 )
 
 
@@ -354,5 +387,822 @@ class TestConvertContainerToService:
             assert service['restart'] == 'on-failure:3'
 
 
+
+def make_container(container_id, name, network='app_net'):
+    """Build a minimal docker inspect dict for generation tests"""
+    return {
+        'Id': container_id,
+        'Name': f'/{name}',
+        'State': {'Running': True},
+        'Config': {'Image': 'nginx:latest', 'Env': []},
+        'HostConfig': {'RestartPolicy': {'Name': 'always'}, 'NetworkMode': network},
+        'NetworkSettings': {'Ports': {}, 'Networks': {network: {}}},
+        'Mounts': []
+    }
+
+
+def compose_labeled(container, project, service):
+    """Attach docker compose project/service labels to a test container"""
+    container['Config']['Labels'] = {
+        'com.docker.compose.project': project,
+        'com.docker.compose.service': service
+    }
+    return container
+
+
+class TestComposeProjectGrouping:
+    """Test grouping by com.docker.compose.project labels"""
+
+    CONFIG = {'NAS': 'debian', 'NETWORK': 'true', 'GROUP_BY': 'compose'}
+
+    def test_groups_by_project_label(self):
+        """Test that labeled containers are bucketed by project regardless of networks"""
+        containers = [
+            compose_labeled(make_container('a' * 64, 'blog-web-1', 'blog_default'), 'blog', 'web'),
+            compose_labeled(make_container('b' * 64, 'wiki-app-1', 'wiki_default'), 'wiki', 'app'),
+            compose_labeled(make_container('c' * 64, 'blog-db-1', 'host'), 'blog', 'db'),
+        ]
+
+        groups = group_containers(containers, {}, self.CONFIG)
+
+        assert groups == [['a' * 64, 'c' * 64], ['b' * 64]]
+
+    def test_unlabeled_containers_fall_back_to_network_grouping(self):
+        """Test that unlabeled containers are grouped by shared networks"""
+        containers = [
+            compose_labeled(make_container('a' * 64, 'blog-web-1', 'shared'), 'blog', 'web'),
+            make_container('b' * 64, 'x', 'shared'),
+            make_container('c' * 64, 'y', 'shared'),
+        ]
+
+        groups = group_containers(containers, {}, self.CONFIG)
+
+        assert groups == [['a' * 64], ['b' * 64, 'c' * 64]]
+
+    def test_network_mode_is_default(self):
+        """Test that labels are ignored unless GROUP_BY is compose"""
+        containers = [
+            compose_labeled(make_container('a' * 64, 'blog-web-1', 'net1'), 'blog', 'web'),
+            compose_labeled(make_container('b' * 64, 'blog-db-1', 'net2'), 'blog', 'db'),
+        ]
+
+        assert len(group_containers(containers, {}, {'NAS': 'debian', 'NETWORK': 'true'})) == 2
+
+    def test_render_uses_project_and_service_names(self):
+        """Test that a project group is written as <project>.yaml with the original service names"""
+        containers = [
+            compose_labeled(make_container('a' * 64, 'blog-web-1', 'blog_default'), 'blog', 'web'),
+            compose_labeled(make_container('c' * 64, 'blog-db-1', 'blog_default'), 'blog', 'db'),
+        ]
+
+        filename, _, compose, _ = render_compose_group(['a' * 64, 'c' * 64], containers, {}, self.CONFIG)
+
+        assert filename == 'blog.yaml'
+        assert list(compose['services']) == ['web', 'db']
+        assert compose['services']['web']['container_name'] == 'blog-web-1'
+
+    def test_project_label_cannot_escape_snapshot(self, tmp_path):
+        """Test that unsafe project labels are sanitized and colliding file names de-duplicated"""
+        containers = [
+            compose_labeled(make_container('a' * 64, 'evil-web-1', 'a_net'), '../evil', 'web'),
+            compose_labeled(make_container('c' * 64, 'other-web-1', 'c_net'), '/evil', 'web'),
+        ]
+        groups = group_containers(containers, {}, self.CONFIG)
+        staging = tmp_path / 'snap'
+
+        files, manifest, _ = generate_snapshot(str(staging), str(staging), containers, groups, {},
+                                               {**self.CONFIG, 'WORKERS': '1'}, {})
+
+        assert sorted(os.listdir(str(staging))) == ['_evil-2.yaml', '_evil.yaml']
+        assert sorted(entry['file'] for entry in manifest['files']) == ['_evil-2.yaml', '_evil.yaml']
+        assert sorted(os.listdir(str(tmp_path))) == ['snap']
+
+
+class TestManifest:
+    """Test per-snapshot manifest generation"""
+
+    def setup_method(self):
+        self.config_patch = patch('d2c.load_config', return_value={'NAS': 'debian', 'NETWORK': 'true'})
+        self.config_patch.start()
+
+    def teardown_method(self):
+        self.config_patch.stop()
+
+    def test_generate_compose_file_updates_manifest_on_disk(self, tmp_path):
+        """Test that a standalone call writes manifest.json next to the YAML"""
+        containers = [make_container('a' * 64, 'web'), make_container('b' * 64, 'db')]
+
+        file_path = generate_compose_file(['a' * 64, 'b' * 64], containers, networks={}, output_dir=str(tmp_path))
+
+        with open(tmp_path / 'manifest.json', encoding='utf-8') as f:
+            manifest = json.load(f)
+        with open(file_path, 'rb') as f:
+            data = f.read()
+
+        entry = manifest['files'][0]
+        assert entry['file'] == os.path.basename(file_path)
+        assert entry['size'] == len(data)
+        assert len(entry['sha256']) == 64
+        assert entry['services'] == ['web', 'db']
+        assert {c['name'] for c in entry['containers']} == {'web', 'db'}
+        assert entry['networks'] == ['app_net']
+
+    def test_generate_compose_file_appends_to_given_manifest(self, tmp_path):
+        """Test that a passed-in manifest is filled in without touching the disk"""
+        containers = [make_container('a' * 64, 'web')]
+        manifest = new_manifest()
+
+        generate_compose_file(['a' * 64], containers, networks={}, output_dir=str(tmp_path), manifest=manifest)
+
+        assert [entry['file'] for entry in manifest['files']] == ['web.yaml']
+        assert not (tmp_path / 'manifest.json').exists()
+
+    def test_manifest_records_search_fields(self, tmp_path):
+        """Test that each container entry carries the fields used by the search index"""
+        container = make_container('a' * 64, 'web')
+        container['Config']['Env'] = ['TZ=UTC', 'PATH=/usr/bin']
+        container['NetworkSettings']['Ports'] = {'443/tcp': [
+            {'HostIp': '', 'HostPort': '8443'}, {'HostIp': '', 'HostPort': '8444'}
+        ]}
+        container['Mounts'] = [{'Type': 'bind', 'Source': '/srv/www', 'Destination': '/usr/share/nginx', 'RW': True}]
+        manifest = new_manifest()
+
+        generate_compose_file(['a' * 64], [container], networks={}, output_dir=str(tmp_path), manifest=manifest)
+
+        entry = manifest['files'][0]['containers'][0]
+        assert entry['image'] == 'nginx:latest'
+        assert entry['ports'] == ['8443', '8444']
+        assert entry['volumes'] == ['/srv/www', '/usr/share/nginx']
+        assert entry['env'] == ['TZ']
+
+
+
+class TestIncrementalRegeneration:
+    """Test per-group reuse of the previous snapshot"""
+
+    CONFIG = {'NAS': 'debian', 'NETWORK': 'true', 'SKIP_UNCHANGED': 'false', 'WORKERS': '1'}
+
+    def run_main(self, containers, output_dir, state):
+        with patch('d2c.ensure_config_file'), \
+             patch('d2c.load_config', return_value=self.CONFIG), \
+             patch('d2c.load_state', return_value=state), \
+             patch('d2c.save_state') as mock_save_state, \
+             patch('d2c.append_history'), \
+             patch('d2c.get_containers', return_value=containers), \
+             patch('d2c.get_networks', return_value={}), \
+             patch('d2c.render_compose_group', wraps=render_compose_group) as mock_generate, \
+             patch.dict(os.environ, {'OUTPUT_DIR': str(output_dir), 'FORCE_RUN': 'false'}):
+            main()
+        with open(os.path.join(str(output_dir), 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        return manifest, mock_generate, mock_save_state.call_args[0][0]
+
+    def test_unchanged_groups_reuse_previous_files(self, tmp_path):
+        """Test that only the group whose container changed is rebuilt"""
+        containers = [make_container('a' * 64, 'web', 'web_net'), make_container('b' * 64, 'db', 'db_net')]
+        first, _, state = self.run_main(containers, tmp_path / 'first', {})
+        assert first['stats'] == {'groups_reused': 0, 'groups_rebuilt': 2}
+
+        containers[1]['Config']['Image'] = 'db:2'
+        second, mock_generate, _ = self.run_main(containers, tmp_path / 'second', state)
+
+        assert second['stats'] == {'groups_reused': 1, 'groups_rebuilt': 1}
+        assert mock_generate.call_count == 1
+        assert mock_generate.call_args[0][0] == ['b' * 64]
+        assert (tmp_path / 'second' / 'web.yaml').read_bytes() == (tmp_path / 'first' / 'web.yaml').read_bytes()
+        assert [entry['file'] for entry in second['files']] == [entry['file'] for entry in first['files']]
+
+    def test_corrupted_previous_file_is_rebuilt(self, tmp_path):
+        """Test that a previous file failing its checksum is regenerated"""
+        containers = [make_container('a' * 64, 'web', 'web_net')]
+        _, _, state = self.run_main(containers, tmp_path / 'first', {})
+        (tmp_path / 'first' / 'web.yaml').write_text('edited by hand\n')
+
+        second, _, _ = self.run_main(containers, tmp_path / 'second', state)
+
+        assert second['stats'] == {'groups_reused': 0, 'groups_rebuilt': 1}
+        assert 'services:' in (tmp_path / 'second' / 'web.yaml').read_text()
+
+    def test_network_mode_target_in_other_group(self, tmp_path):
+        """Test that container: network modes are written by name and a target rename rebuilds the group"""
+        vpn = make_container('b' * 64, 'vpn', 'vpn_net')
+        app = make_container('a' * 64, 'app', network=f"container:{'b' * 64}")
+        app['NetworkSettings']['Networks'] = {}
+        first, _, state = self.run_main([vpn, app], tmp_path / 'first', {})
+
+        assert len(first['files']) == 2
+        assert 'network_mode: container:vpn\n' in (tmp_path / 'first' / 'app.yaml').read_text()
+
+        vpn['Name'] = '/vpn2'
+        second, _, _ = self.run_main([vpn, app], tmp_path / 'second', state)
+
+        assert second['stats'] == {'groups_reused': 0, 'groups_rebuilt': 2}
+        assert 'network_mode: container:vpn2\n' in (tmp_path / 'second' / 'app.yaml').read_text()
+
+    def test_skipped_containers_do_not_save_fingerprint(self, tmp_path):
+        """Test that a run with skipped containers is not treated as unchanged next time"""
+        def containers():
+            record_skipped('container', 'c' * 64)
+            return [make_container('a' * 64, 'web', 'web_net')]
+
+        with patch('d2c.ensure_config_file'), \
+             patch('d2c.load_config', return_value={**self.CONFIG, 'SKIP_UNCHANGED': 'true'}), \
+             patch('d2c.load_state', return_value={}), \
+             patch('d2c.get_inventory_fingerprint', return_value='fp'), \
+             patch('d2c.save_state') as mock_save_state, \
+             patch('d2c.append_history'), \
+             patch('d2c.get_containers', side_effect=containers), \
+             patch('d2c.get_networks', return_value={}), \
+             patch.dict(os.environ, {'OUTPUT_DIR': str(tmp_path / 'out'), 'FORCE_RUN': 'false'}):
+            main()
+
+        assert mock_save_state.call_args[0][0]['fingerprint'] is None
+
+    def test_service_hash_ignores_runtime_fields(self):
+        """Test that fields not used for conversion do not change the hash"""
+        container = make_container('a' * 64, 'web')
+        before = container_service_hash(container)
+        container['State'] = {'Status': 'exited', 'StartedAt': '2025-01-02'}
+
+        assert container_service_hash(container) == before
+
+
+class TestParallelGeneration:
+    """Test the process-pool conversion/emission pipeline"""
+
+    def make_inventory(self):
+        containers = []
+        for i in range(12):
+            container = make_container(f'{i:064d}', f'app{i}_web', f'net{i % 5}')
+            container['Config']['Env'] = [f'KEY_{n}=value{n}' for n in range(i)]
+            container['NetworkSettings']['Ports'] = {'80/tcp': [{'HostIp': '0.0.0.0', 'HostPort': str(8000 + i)}]}
+            containers.append(container)
+        return containers
+
+    def run_main(self, output_dir, workers):
+        config = {'NAS': 'debian', 'NETWORK': 'true', 'SKIP_UNCHANGED': 'false', 'WORKERS': workers}
+        with patch('d2c.ensure_config_file'), \
+             patch('d2c.load_config', return_value=config), \
+             patch('d2c.load_state', return_value={}), \
+             patch('d2c.save_state'), \
+             patch('d2c.append_history'), \
+             patch('d2c.get_containers', return_value=self.make_inventory()), \
+             patch('d2c.get_networks', return_value={'net0': {'Driver': 'macvlan'}}), \
+             patch.dict(os.environ, {'OUTPUT_DIR': str(output_dir), 'FORCE_RUN': 'false'}):
+            main()
+        with open(os.path.join(str(output_dir), 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)['files']
+
+    def test_parallel_output_identical_to_serial(self, tmp_path):
+        """Test that files and manifest order do not depend on the worker count"""
+        serial = self.run_main(tmp_path / 'serial', '1')
+        parallel = self.run_main(tmp_path / 'parallel', '4')
+
+        assert serial == parallel
+        assert len(serial) == 5
+        for entry in serial:
+            assert (tmp_path / 'serial' / entry['file']).read_bytes() == (tmp_path / 'parallel' / entry['file']).read_bytes()
+
+    def test_worker_count_from_config(self):
+        """Test WORKERS parsing"""
+        with patch('os.cpu_count', return_value=8):
+            assert get_worker_count({'WORKERS': '3'}) == 3
+            assert get_worker_count({'WORKERS': 'auto'}) == 8
+            assert get_worker_count({'WORKERS': '0'}) == 8
+            assert get_worker_count({}) == 8
+
+
+class TestSnapshotPublication:
+    """Test staging-directory writes and atomic publication"""
+
+    def test_publish_replaces_empty_precreated_dir(self, tmp_path):
+        """Test that the staging directory is renamed over the scheduler's empty output dir"""
+        output_dir = tmp_path / '2025_01_02_10_00'
+        output_dir.mkdir()
+        staging = create_staging_dir(str(output_dir))
+        with open(os.path.join(staging, 'web.yaml'), 'w') as f:
+            f.write('services: {}\n')
+
+        publish_snapshot(staging, str(output_dir))
+
+        assert (output_dir / 'web.yaml').read_text() == 'services: {}\n'
+        assert not os.path.exists(staging)
+        assert os.listdir(str(tmp_path)) == ['2025_01_02_10_00']
+
+    def test_stale_staging_dirs_are_swept(self, tmp_path):
+        """Test that staging leftovers from killed runs are removed and recent ones kept"""
+        stale = tmp_path / '.tmp-2025_01_01_10_00-abc'
+        stale.mkdir()
+        (stale / 'web.yaml').write_text('partial\n')
+        os.symlink('2025_01_01_10_00', str(tmp_path / '.tmp-latest-123'))
+        recent = tmp_path / '.tmp-2025_01_02_09_59-def'
+        recent.mkdir()
+        old = time.time() - 2 * 3600
+        os.utime(str(stale), (old, old))
+        os.utime(str(tmp_path / '.tmp-latest-123'), (old, old), follow_symlinks=False)
+
+        staging = create_staging_dir(str(tmp_path / '2025_01_02_10_00'))
+
+        assert sorted(os.listdir(str(tmp_path))) == sorted([recent.name, os.path.basename(staging)])
+
+    def test_publish_into_non_empty_dir(self, tmp_path):
+        """Test that files are replaced one by one when the target already has content"""
+        output_dir = tmp_path / 'snap'
+        output_dir.mkdir()
+        (output_dir / 'web.yaml').write_text('old\n')
+        (output_dir / 'custom.yaml').write_text('kept\n')
+        staging = create_staging_dir(str(output_dir))
+        with open(os.path.join(staging, 'web.yaml'), 'w') as f:
+            f.write('new\n')
+
+        publish_snapshot(staging, str(output_dir))
+
+        assert (output_dir / 'web.yaml').read_text() == 'new\n'
+        assert (output_dir / 'custom.yaml').read_text() == 'kept\n'
+        assert not os.path.exists(staging)
+
+    def test_latest_link_points_to_newest_snapshot(self, tmp_path):
+        """Test that the latest link is a relative symlink replaced atomically"""
+        for name in ('2025_01_01_10_00', '2025_01_02_10_00'):
+            (tmp_path / name).mkdir()
+            update_latest_link(str(tmp_path / name))
+
+        assert os.readlink(str(tmp_path / 'latest')) == '2025_01_02_10_00'
+        assert sorted(os.listdir(str(tmp_path))) == ['2025_01_01_10_00', '2025_01_02_10_00', 'latest']
+
+    def test_main_cleans_staging_on_failure(self, tmp_path):
+        """Test that a failed run leaves no partial snapshot behind"""
+        output_dir = tmp_path / 'snap'
+        config = {'NAS': 'debian', 'NETWORK': 'true', 'SKIP_UNCHANGED': 'false', 'WORKERS': '1'}
+        with patch('d2c.ensure_config_file'), \
+             patch('d2c.load_config', return_value=config), \
+             patch('d2c.load_state', return_value={}), \
+             patch('d2c.get_containers', return_value=[make_container('a' * 64, 'web')]), \
+             patch('d2c.get_networks', return_value={}), \
+             patch('d2c.render_compose_group', side_effect=RuntimeError('boom')), \
+             patch.dict(os.environ, {'OUTPUT_DIR': str(output_dir), 'FORCE_RUN': 'false'}):
+            with pytest.raises(RuntimeError):
+                main()
+
+        assert os.listdir(str(tmp_path)) == []
+
+    def test_main_publishes_snapshot_and_latest(self, tmp_path):
+        """Test that a successful run publishes the snapshot and then the latest link"""
+        output_dir = tmp_path / '2025_01_02_10_00'
+        output_dir.mkdir()
+        config = {'NAS': 'debian', 'NETWORK': 'true', 'SKIP_UNCHANGED': 'false', 'WORKERS': '1'}
+        with patch('d2c.ensure_config_file'), \
+             patch('d2c.load_config', return_value=config), \
+             patch('d2c.load_state', return_value={}), \
+             patch('d2c.save_state'), \
+             patch('d2c.append_history'), \
+             patch('d2c.get_containers', return_value=[make_container('a' * 64, 'web')]), \
+             patch('d2c.get_networks', return_value={}), \
+             patch.dict(os.environ, {'OUTPUT_DIR': str(output_dir), 'FORCE_RUN': 'false'}):
+            main()
+
+        assert sorted(os.listdir(str(output_dir))) == ['manifest.json', 'web.yaml']
+        assert os.readlink(str(tmp_path / 'latest')) == '2025_01_02_10_00'
+
+
+class TestProjectedInspect:
+    """Test field-projected container collection"""
+
+    def projected_line(self, container_id, name):
+        container = make_container(container_id, name)
+        return json.dumps(container)
+
+    def test_template_renders_valid_json(self):
+        """Test that the --format template is a JSON object once actions are filled in"""
+        rendered = re.sub(r'\{\{json [^}]+\}\}', 'null', INSPECT_TEMPLATE)
+        data = json.loads(rendered)
+
+        assert set(data) == {'Id', 'Name', 'State', 'Config', 'HostConfig', 'NetworkSettings', 'Mounts'}
+
+    def test_single_batched_call(self):
+        """Test that all containers are inspected in one projected call"""
+        output = '\n'.join(self.projected_line(f'{i:064d}', f'c{i}') for i in range(3)) + '\n'
+        with patch('d2c.run_command', side_effect=['1\n2\n3\n', output]) as mock_run:
+            containers = get_containers()
+
+        assert [c['Name'] for c in containers] == ['/c0', '/c1', '/c2']
+        assert mock_run.call_count == 2
+        command = mock_run.call_args_list[1][0][0]
+        assert command.startswith("docker inspect --format '") and command.endswith(' 1 2 3')
+
+    def test_batches_large_inventories(self):
+        """Test that the container list is split into bounded batches"""
+        ids = [str(i) for i in range(250)]
+        with patch('d2c.run_command', side_effect=['\n'.join(ids), '', '', '']) as mock_run:
+            get_containers()
+
+        assert mock_run.call_count == 4
+
+    def test_falls_back_to_full_inspect(self):
+        """Test that an unparsable projected output falls back to per-container inspect"""
+        full = json.dumps([make_container('a' * 64, 'web')])
+        with patch('d2c.run_command', side_effect=['a\n', 'template parsing error', full]) as mock_run:
+            containers = get_containers()
+
+        assert [c['Name'] for c in containers] == ['/web']
+        assert mock_run.call_args_list[2][0][0] == 'docker inspect a'
+
+    def test_failed_batch_isolates_bad_container(self):
+        """Test that a failed batch is retried per container and only the bad one is skipped"""
+        reset_command_stats()
+        line_a = self.projected_line('a' * 64, 'web') + '\n'
+        line_c = self.projected_line('c' * 64, 'db') + '\n'
+        with patch('d2c.run_command', side_effect=['a\nb\nc\n', None, line_a, None, line_c]) as mock_run:
+            containers = get_containers()
+
+        assert [c['Name'] for c in containers] == ['/web', '/db']
+        assert mock_run.call_count == 5
+        assert get_command_stats()['skipped'] == ['container:b']
+
+    def test_timeout_skips_per_container_fallback(self):
+        """Test that a timed-out batch is not retried per container or with full inspect"""
+        reset_command_stats()
+        with patch('d2c.run_command', side_effect=['a\nb\nc\n', CommandTimeoutError('docker inspect')]) as mock_run:
+            containers = get_containers()
+
+        assert containers == []
+        assert mock_run.call_count == 2
+        assert get_command_stats()['skipped'] == ['container:a', 'container:b', 'container:c']
+
+
+class TestRunCommand:
+    """Test per-call timeouts, retries and command statistics"""
+
+    def setup_method(self):
+        reset_command_stats()
+
+    def test_success_is_counted(self):
+        """Test that a successful command returns its output and is counted once"""
+        assert run_command('echo ok') == 'ok\n'
+
+        stats = get_command_stats()
+        assert stats['calls'] == 1
+        assert stats['failures'] == 0
+        assert stats['retries'] == 0
+
+    def test_timeout_kills_and_retries(self):
+        """Test that a hung command is killed at its deadline and retried with backoff"""
+        with patch('d2c.COMMAND_BACKOFF', 0):
+            assert run_command('sleep 5', timeout=0.2, retries=1) is None
+
+        stats = get_command_stats()
+        assert stats['calls'] == 2
+        assert stats['timeouts'] == 2
+        assert stats['retries'] == 1
+        assert stats['failures'] == 1
+        assert stats['max_time'] < 5
+
+    def test_transient_failure_recovers(self, tmp_path):
+        """Test that a command failing once succeeds on retry"""
+        marker = tmp_path / 'marker'
+        command = f"if [ -e {marker} ]; then echo ok; else touch {marker}; exit 1; fi"
+        with patch('d2c.COMMAND_BACKOFF', 0):
+            assert run_command(command, retries=2) == 'ok\n'
+
+        stats = get_command_stats()
+        assert stats['calls'] == 2
+        assert stats['failures'] == 0
+
+    def test_timeout_can_raise(self):
+        """Test that raise_on_timeout distinguishes timeouts from other failures"""
+        with patch('d2c.COMMAND_BACKOFF', 0):
+            with pytest.raises(CommandTimeoutError):
+                run_command('sleep 5', timeout=0.2, retries=0, raise_on_timeout=True)
+            assert run_command('exit 1', retries=0, raise_on_timeout=True) is None
+
+    def test_stats_not_recorded_outside_a_run(self):
+        """Test that long-running importers such as the web UI do not accumulate statistics"""
+        reset_command_stats(record=False)
+        try:
+            run_command('exit 1', retries=0)
+            record_skipped('container', 'a')
+
+            stats = get_command_stats()
+            assert stats['calls'] == 0
+            assert stats['failures'] == 0
+            assert stats['skipped'] == []
+        finally:
+            reset_command_stats()
+
+    def test_missing_object_is_not_retried(self):
+        """Test that 'No such object' errors are returned without retrying"""
+        assert run_command("echo 'Error: No such object: x' >&2; exit 1", retries=3) is None
+
+        stats = get_command_stats()
+        assert stats['calls'] == 1
+        assert stats['retries'] == 0
+        assert stats['failures'] == 1
+
+
+class TestSelectionInspect:
+    """Test targeted inspect for selected containers"""
+
+    CONFIG = {'NAS': 'debian', 'NETWORK': 'true'}
+
+    def projected(self, *containers):
+        return ''.join(json.dumps(c) + '\n' for c in containers)
+
+    def test_only_selected_containers_are_inspected(self):
+        """Test that a selection is inspected in one call without listing the host"""
+        web = make_container('a' * 64, 'web')
+        with patch('d2c.run_command', return_value=self.projected(web)) as mock_run, \
+             patch('d2c.get_networks', return_value={}), \
+             patch('d2c.load_config', return_value=self.CONFIG):
+            compose = generate_compose_for_selected_containers(['a' * 12])
+
+        assert list(compose['services']) == ['web']
+        assert mock_run.call_count == 1
+        command = mock_run.call_args[0][0]
+        assert command.startswith("docker inspect --format '") and command.endswith(' ' + 'a' * 12)
+
+    def test_network_mode_target_is_resolved(self):
+        """Test that a container: network mode target is inspected and written by name"""
+        vpn = make_container('b' * 64, 'vpn')
+        app = make_container('a' * 64, 'app', network=f"container:{'b' * 64}")
+        app['NetworkSettings']['Networks'] = {}
+        with patch('d2c.run_command', side_effect=[self.projected(app), self.projected(vpn)]) as mock_run, \
+             patch('d2c.get_networks', return_value={}), \
+             patch('d2c.load_config', return_value=self.CONFIG):
+            compose = generate_compose_for_selected_containers(['a' * 12])
+
+        assert compose['services']['app']['network_mode'] == 'container:vpn'
+        assert mock_run.call_count == 2
+        assert mock_run.call_args_list[1][0][0].endswith(' ' + 'b' * 64)
+
+    def test_invalid_ids_never_reach_the_shell(self, tmp_path):
+        """Test that IDs containing shell metacharacters are dropped before any docker call"""
+        marker = tmp_path / 'pwned'
+        with patch('d2c.run_command') as mock_run:
+            selected, referenced = inspect_selected_containers([f"abc; touch {marker} #", "$(id)", "a b"])
+
+        assert selected == [] and referenced == []
+        mock_run.assert_not_called()
+        assert not marker.exists()
+
+    def test_valid_container_refs(self):
+        """Test the accepted ID and name formats"""
+        assert is_valid_container_ref('a' * 64)
+        assert is_valid_container_ref('my-app_1.web')
+        assert not is_valid_container_ref('-rm')
+        assert not is_valid_container_ref("web'")
+        assert not is_valid_container_ref(None)
+
+
+class TestNetworkCache:
+    """Test the cross-run network cache in STATE_DIR"""
+
+    LS_OUTPUT = 'n1|2025-01-01 00:00:00 +0000 UTC\nn2|2025-01-02 00:00:00 +0000 UTC\n'
+    INSPECT_OUTPUT = json.dumps([
+        {'Id': 'n1', 'Name': 'app_net', 'Driver': 'bridge'},
+        {'Id': 'n2', 'Name': 'lan', 'Driver': 'macvlan'}
+    ])
+
+    def test_unchanged_list_skips_inspect(self, tmp_path):
+        """Test that the second call only lists networks and reuses the cache"""
+        with patch('d2c.STATE_DIR', str(tmp_path)), \
+             patch('d2c.run_command', side_effect=[self.LS_OUTPUT, self.INSPECT_OUTPUT, self.LS_OUTPUT]) as mock_run:
+            first = get_networks()
+            second = get_networks()
+
+        assert set(first) == {'app_net', 'lan'}
+        assert second == first
+        assert mock_run.call_count == 3
+        assert mock_run.call_args_list[1][0][0] == 'docker network inspect n1 n2'
+        # Written through a uniquely named temp file that does not linger
+        assert os.listdir(str(tmp_path)) == ['networks.json']
+
+    def test_changed_creation_time_invalidates(self, tmp_path):
+        """Test that a recreated network (same ID list, new Created) is inspected again"""
+        changed = self.LS_OUTPUT.replace('2025-01-02', '2025-02-02')
+        with patch('d2c.STATE_DIR', str(tmp_path)), \
+             patch('d2c.run_command', side_effect=[self.LS_OUTPUT, self.INSPECT_OUTPUT, changed, self.INSPECT_OUTPUT]) as mock_run:
+            get_networks()
+            get_networks()
+
+        assert mock_run.call_count == 4
+
+    def test_failed_network_is_skipped_and_not_cached(self, tmp_path):
+        """Test that a failed batch falls back to per-network inspect and skips the bad one"""
+        single = json.dumps([{'Id': 'n1', 'Name': 'app_net', 'Driver': 'bridge'}])
+        with patch('d2c.STATE_DIR', str(tmp_path)), \
+             patch('d2c.run_command', side_effect=[self.LS_OUTPUT, None, single, None]):
+            networks = get_networks()
+
+        assert list(networks) == ['app_net']
+        assert not (tmp_path / 'networks.json').exists()
+
+
+class TestOfflineDump:
+    """Test generation from saved docker inspect dumps"""
+
+    NETWORK = {'Name': 'mv', 'Id': 'n1', 'Driver': 'macvlan', 'Scope': 'local', 'IPAM': {}}
+
+    def test_iter_json_objects_formats(self):
+        """Test concatenated arrays and NDJSON with a tiny read size"""
+        arrays = json.dumps([{'a': 1}, {'b': 2}], indent=4) + '\n' + json.dumps([{'c': 3}])
+        ndjson = '{"a": 1}\n{"b": "x]y,"}\n\n'
+
+        assert list(iter_json_objects(io.StringIO(arrays), chunk_size=7)) == [{'a': 1}, {'b': 2}, {'c': 3}]
+        assert list(iter_json_objects(io.StringIO(ndjson), chunk_size=5)) == [{'a': 1}, {'b': 'x]y,'}]
+
+    def test_iter_json_objects_truncated(self):
+        """Test that a truncated dump raises instead of silently dropping data"""
+        with pytest.raises(ValueError):
+            list(iter_json_objects(io.StringIO('[{"a": 1}, {"b": '), chunk_size=4))
+
+    def test_load_dump_separates_containers_and_networks(self, tmp_path):
+        """Test that container and network inspect output can share one file"""
+        dump = tmp_path / 'host.json'
+        dump.write_text(json.dumps([make_container('a' * 64, 'web', 'mv')]) + json.dumps([self.NETWORK]))
+
+        containers, networks = load_dump(str(dump))
+
+        assert [c['Name'] for c in containers] == ['/web']
+        assert networks['mv']['Driver'] == 'macvlan'
+
+    def test_run_from_dump_directory(self, tmp_path):
+        """Test that every dump in a directory gets its own snapshot"""
+        dumps = tmp_path / 'dumps'
+        dumps.mkdir()
+        (dumps / 'host1.ndjson').write_text(
+            json.dumps(make_container('a' * 64, 'web')) + '\n' + json.dumps(make_container('b' * 64, 'db')) + '\n'
+        )
+        (dumps / 'host2.json').write_text(json.dumps([make_container('c' * 64, 'cache', 'other')]))
+        (dumps / 'notes.txt').write_text('ignored')
+        output = tmp_path / 'out'
+
+        with patch('d2c.load_config', return_value={'NAS': 'debian', 'NETWORK': 'true'}):
+            results = run_from_dump(str(dumps), str(output), workers=2)
+
+        assert [count for _, _, count in results] == [1, 1]
+        assert sorted(os.listdir(str(output))) == ['host1', 'host2']
+        with open(output / 'host1' / 'manifest.json', encoding='utf-8') as f:
+            manifest = json.load(f)
+        assert manifest['source'] == str(dumps / 'host1.ndjson')
+        assert manifest['files'][0]['services'] == ['web', 'db']
+
+    def test_dumps_with_same_stem_get_separate_dirs(self, tmp_path):
+        """Test that a.json and a.ndjson do not write into the same output directory"""
+        dumps = tmp_path / 'dumps'
+        dumps.mkdir()
+        (dumps / 'a.json').write_text(json.dumps([make_container('a' * 64, 'web')]))
+        (dumps / 'a.ndjson').write_text(json.dumps(make_container('b' * 64, 'db', 'other')) + '\n')
+        (dumps / 'b.json').write_text(json.dumps([make_container('c' * 64, 'cache', 'third')]))
+        output = tmp_path / 'out'
+
+        with patch('d2c.load_config', return_value={'NAS': 'debian', 'NETWORK': 'true'}):
+            run_from_dump(str(dumps), str(output), workers=1)
+
+        assert sorted(os.listdir(str(output))) == ['a.json', 'a.ndjson', 'b']
+        for name in ('a.json', 'a.ndjson'):
+            with open(output / name / 'manifest.json', encoding='utf-8') as f:
+                assert json.load(f)['source'] == str(dumps / name)
+
+
+class TestInventoryFingerprint:
+    """Test the skip-if-unchanged pre-check"""
+
+    CONFIG = {'NAS': 'debian', 'NETWORK': 'true', 'SKIP_UNCHANGED': 'true'}
+
+    def fingerprint(self, containers_output, networks_output='n1|app_net|bridge|2025\n'):
+        with patch('d2c.run_command', side_effect=[containers_output, networks_output]):
+            return get_inventory_fingerprint(self.CONFIG)
+
+    def test_fingerprint_ignores_listing_order(self):
+        """Test that the fingerprint does not depend on docker ps ordering"""
+        first = self.fingerprint('a|web|2025|running|app_net\nb|db|2025|running|app_net\n')
+        second = self.fingerprint('b|db|2025|running|app_net\na|web|2025|running|app_net\n')
+
+        assert first == second
+
+    def test_fingerprint_changes_with_state(self):
+        """Test that a container state change produces a new fingerprint"""
+        running = self.fingerprint('a|web|2025|running|app_net\n')
+        exited = self.fingerprint('a|web|2025|exited|app_net\n')
+
+        assert running != exited
+
+    def test_fingerprint_none_when_listing_fails(self):
+        """Test that a failed listing disables the pre-check"""
+        with patch('d2c.run_command', return_value=None):
+            assert get_inventory_fingerprint(self.CONFIG) is None
+
+    def test_main_skips_when_fingerprint_matches(self, tmp_path):
+        """Test that an unchanged inventory ends the run before inspect and writes"""
+        previous = tmp_path / 'previous'
+        previous.mkdir()
+        output_dir = tmp_path / 'current'
+        output_dir.mkdir()
+
+        with patch('d2c.ensure_config_file'), \
+             patch('d2c.load_config', return_value=self.CONFIG), \
+             patch('d2c.get_inventory_fingerprint', return_value='abc'), \
+             patch('d2c.load_state', return_value={'fingerprint': 'abc', 'output_dir': str(previous)}), \
+             patch('d2c.append_history') as mock_history, \
+             patch('d2c.get_containers') as mock_get_containers, \
+             patch.dict(os.environ, {'OUTPUT_DIR': str(output_dir), 'FORCE_RUN': 'false'}):
+            main()
+
+        mock_get_containers.assert_not_called()
+        assert mock_history.call_args[0][0]['status'] == 'unchanged'
+        # The empty pre-created output directory is removed
+        assert not output_dir.exists()
+
+    def test_main_force_run_ignores_fingerprint(self, tmp_path):
+        """Test that FORCE_RUN bypasses the pre-check"""
+        previous = tmp_path / 'previous'
+        previous.mkdir()
+
+        with patch('d2c.ensure_config_file'), \
+             patch('d2c.load_config', return_value=self.CONFIG), \
+             patch('d2c.get_inventory_fingerprint', return_value='abc'), \
+             patch('d2c.load_state', return_value={'fingerprint': 'abc', 'output_dir': str(previous)}), \
+             patch('d2c.get_containers', return_value=[]) as mock_get_containers, \
+             patch.dict(os.environ, {'OUTPUT_DIR': str(tmp_path / 'current'), 'FORCE_RUN': 'true'}):
+            main()
+
+        mock_get_containers.assert_called_once()
+
+
+
+    def test_concurrent_save_state(self, tmp_path):
+        """Test that concurrent writers never publish a truncated state file or leave temp files"""
+        import threading
+        state = {'fingerprint': 'f' * 64, 'output_dir': '/app/compose/' + 'x' * 4096}
+        with patch('d2c.STATE_DIR', str(tmp_path)):
+            threads = [threading.Thread(target=lambda: [save_state(state) for _ in range(20)]) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert load_state() == state
+        assert os.listdir(str(tmp_path)) == ['state.json']
+
+class TestRunHistory:
+    """Test the bounded history.jsonl run log"""
+
+    def test_history_is_capped(self, tmp_path):
+        """Test that the file is trimmed to the most recent records once it exceeds its size limit"""
+        history = tmp_path / 'logs' / 'history.jsonl'
+        with patch('d2c.HISTORY_FILE', str(history)), \
+             patch('d2c.HISTORY_MAX_RECORDS', 5), \
+             patch('d2c.HISTORY_MAX_BYTES', 2000):
+            for i in range(100):
+                append_history({'status': 'unchanged', 'run': i})
+                assert history.stat().st_size <= 2000
+
+        records = [json.loads(line) for line in history.read_text().splitlines()]
+        # The file grows again between trims, but stays under the limit and keeps the newest contiguous runs
+        assert len(records) < 100
+        assert records[-1]['run'] == 99
+        assert [r['run'] for r in records] == list(range(100 - len(records), 100))
+        assert os.listdir(history.parent) == ['history.jsonl']
+
+    def test_read_last_history(self, tmp_path):
+        """Test that only the newest complete record is returned"""
+        history = tmp_path / 'history.jsonl'
+        with patch('d2c.HISTORY_FILE', str(history)):
+            assert read_last_history() is None
+
+            append_history({'status': 'changed'})
+            append_history({'status': 'unchanged'})
+            with open(history, 'a') as f:
+                f.write('{"truncated')
+
+            assert read_last_history()['status'] == 'unchanged'
+
+class TestFakeDockerEndToEnd:
+    """Test collection through the fake Engine API server and docker CLI shim"""
+
+    @pytest.fixture
+    def fake_docker(self, tmp_path):
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+        from fake_docker import FakeDockerServer, default_networks
+        from synthetic import make_inventory
+
+        containers, networks = make_inventory(3, network_count=1, full=True)
+        server = FakeDockerServer(str(tmp_path / 'docker.sock'), containers,
+                                  default_networks() + list(networks.values()))
+        with server, patch.dict(os.environ, server.environ()), patch('d2c.STATE_DIR', str(tmp_path / 'data')):
+            yield server, containers, networks
+
+    def test_get_containers_through_shim(self, fake_docker):
+        """Test that the projected inspect path round-trips through the shim"""
+        from d2c import get_networks
+        server, containers, networks = fake_docker
+
+        records = get_containers()
+        assert [r['Id'] for r in records] == [c['Id'] for c in containers]
+        assert records[0]['Config']['Image'] == containers[0]['Config']['Image']
+        assert set(networks) <= set(get_networks())
+        assert server.requests > 0
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file
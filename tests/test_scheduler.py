@@ -156,5 +156,84 @@ class TestD2CSchedulerIntegration:
             assert scheduler.cron_utils.debug is True
 
 
+class TestD2CSchedulerStatus:
+    """Test the status record published by the scheduler"""
+    
+    def make_scheduler(self, tmp_path):
+        with patch('scheduler.D2CScheduler.setup_signal_handlers'):
+            return D2CScheduler('/test/config.json', status_file=str(tmp_path / 'status.json'))
+    
+    def read(self, tmp_path):
+        with open(tmp_path / 'status.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def test_update_status_writes_heartbeat(self, tmp_path):
+        """Test that updates are written with the PID and a heartbeat"""
+        scheduler = self.make_scheduler(tmp_path)
+        
+        scheduler.update_status(state='waiting', cron='*/10 * * * * *', next_run='2025-01-01T00:00:10')
+        status = self.read(tmp_path)
+        
+        assert status['pid'] == os.getpid()
+        assert status['state'] == 'waiting'
+        assert status['cron'] == '*/10 * * * * *'
+        assert status['next_run'] == '2025-01-01T00:00:10'
+        assert status['heartbeat'] > 0
+    
+    def test_run_d2c_task_records_last_run(self, tmp_path):
+        """Test that task results are recorded in last_run"""
+        scheduler = self.make_scheduler(tmp_path)
+        date_result = MagicMock(stdout='2025_01_01_00_00\n')
+        task_result = MagicMock(returncode=1, stdout='', stderr='docker not available')
+        
+        with patch('subprocess.run', side_effect=[date_result, task_result]):
+            scheduler.run_d2c_task()
+        status = self.read(tmp_path)
+        
+        assert status['state'] == 'waiting'
+        assert status['last_run']['success'] is False
+        assert status['last_run']['message'] == 'docker not available'
+        assert status['last_run']['finished_at'] is not None
+    
+    def test_run_d2c_task_records_unchanged_skip(self, tmp_path):
+        """Test that a run skipped by d2c.py is recorded as unchanged"""
+        scheduler = self.make_scheduler(tmp_path)
+        date_result = MagicMock(stdout='2025_01_01_00_00\n')
+        task_result = MagicMock(returncode=0, stdout='', stderr='')
+        record = {'time': '2999-01-01T00:00:00+00:00', 'status': 'unchanged', 'output_dir': '/app/compose/previous'}
+        
+        with patch('subprocess.run', side_effect=[date_result, task_result]), \
+             patch('scheduler.read_last_history', return_value=record):
+            scheduler.run_d2c_task()
+        last_run = self.read(tmp_path)['last_run']
+        
+        assert last_run['success'] is True
+        assert last_run['status'] == 'unchanged'
+        assert last_run['output_dir'] == '/app/compose/previous'
+    
+    def test_stale_history_record_is_ignored(self, tmp_path):
+        """Test that a history record from an earlier run does not describe this one"""
+        scheduler = self.make_scheduler(tmp_path)
+        date_result = MagicMock(stdout='2025_01_01_00_00\n')
+        task_result = MagicMock(returncode=0, stdout='', stderr='')
+        record = {'time': '2000-01-01T00:00:00+00:00', 'status': 'unchanged'}
+        
+        with patch('subprocess.run', side_effect=[date_result, task_result]), \
+             patch('scheduler.read_last_history', return_value=record):
+            scheduler.run_d2c_task()
+        
+        assert self.read(tmp_path)['last_run']['status'] == 'changed'
+    
+    def test_signal_stops_heartbeat(self, tmp_path):
+        """Test that a signal also wakes the heartbeat thread"""
+        scheduler = self.make_scheduler(tmp_path)
+        thread = scheduler.start_heartbeat()
+        
+        scheduler.signal_handler(signal.SIGTERM, None)
+        thread.join(timeout=2)
+        
+        assert not thread.is_alive()
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file
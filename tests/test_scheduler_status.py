@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for scheduler_status.py module
+"""
+
+import pytest
+import json
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add the backend directory to the path so we can import the modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from scheduler_status import write_status, read_status, pid_alive, system_cron_running, STALE_AFTER
+
+
+class TestSchedulerStatus:
+    """Test the scheduler status file and staleness detection"""
+
+    def test_write_and_read_live_status(self, tmp_path):
+        """Test an atomic write followed by a read of a live scheduler"""
+        path = str(tmp_path / 'status.json')
+
+        write_status({'pid': os.getpid(), 'state': 'waiting', 'heartbeat': time.time(),
+                      'next_run': '2025-01-01T02:00:00'}, path)
+        status = read_status(path)
+
+        assert status['alive'] is True
+        assert status['stale'] is False
+        assert status['next_run'] == '2025-01-01T02:00:00'
+        assert os.listdir(tmp_path) == ['status.json']
+
+    def test_stale_heartbeat(self, tmp_path):
+        """Test that an old heartbeat is reported as not alive even if the PID exists"""
+        path = str(tmp_path / 'status.json')
+        write_status({'pid': os.getpid(), 'state': 'waiting', 'heartbeat': time.time() - STALE_AFTER - 1}, path)
+
+        status = read_status(path)
+
+        assert status['stale'] is True
+        assert status['alive'] is False
+
+    def test_dead_pid_and_stopped_state(self, tmp_path):
+        """Test that a missing process or a stopped state is not alive"""
+        path = str(tmp_path / 'status.json')
+
+        write_status({'pid': os.getpid(), 'state': 'stopped', 'heartbeat': time.time()}, path)
+        assert read_status(path)['alive'] is False
+
+        write_status({'pid': 12345, 'state': 'waiting', 'heartbeat': time.time()}, path)
+        with patch('os.kill', side_effect=ProcessLookupError):
+            assert read_status(path)['alive'] is False
+
+    def test_missing_or_corrupt_file(self, tmp_path):
+        """Test that unreadable status files return None"""
+        path = tmp_path / 'status.json'
+
+        assert read_status(str(path)) is None
+
+        path.write_text('{not json')
+        assert read_status(str(path)) is None
+
+    def test_pid_alive(self):
+        """Test PID checks for invalid, current and foreign processes"""
+        assert pid_alive(None) is False
+        assert pid_alive(0) is False
+        assert pid_alive(os.getpid()) is True
+        with patch('os.kill', side_effect=PermissionError):
+            assert pid_alive(1) is True
+
+    def test_system_cron_requires_task_file(self):
+        """Test that the cron daemon alone does not count without the d2c task file"""
+        with patch('scheduler_status.os.path.exists', return_value=False), \
+             patch('scheduler_status.cron_daemon_running', return_value=True):
+            assert system_cron_running() is False
+
+        with patch('scheduler_status.os.path.exists', return_value=True), \
+             patch('scheduler_status.cron_daemon_running', return_value=True):
+            assert system_cron_running() is True
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
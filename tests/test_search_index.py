@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for search_index.py module
+"""
+
+import pytest
+import json
+import os
+import sys
+from unittest.mock import patch
+
+# Add the backend directory to the path so we can import the modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from snapshot_index import SnapshotIndex
+from search_index import SearchIndex
+
+
+def write_snapshot(root, name, containers, filename='app.yaml'):
+    """Write a snapshot folder with one YAML file and a manifest listing the containers"""
+    folder = root / name
+    folder.mkdir()
+    (folder / filename).write_text('services: {}\n', encoding='utf-8')
+    manifest = {'version': 1, 'files': [{'file': filename, 'containers': containers}]}
+    (folder / 'manifest.json').write_text(json.dumps(manifest), encoding='utf-8')
+
+
+def container(name, image='nginx:1.25', ports=(), volumes=(), networks=(), env=()):
+    return {'id': name * 4, 'name': name, 'service': name, 'image': image, 'ports': list(ports),
+            'volumes': list(volumes), 'networks': list(networks), 'env': list(env)}
+
+
+class TestSearchIndex:
+    """Test the inverted index over snapshot manifests"""
+
+    def make_index(self, tmp_path):
+        snapshots = SnapshotIndex(str(tmp_path), min_refresh_interval=0)
+        return snapshots, SearchIndex(snapshots)
+
+    def test_search_fields(self, tmp_path):
+        """Test matching by image, exact host port, volume and env key"""
+        write_snapshot(tmp_path, '2025_01_01_00_00', [
+            container('web', image='nginx:1.25', ports=['8443'], volumes=['/srv/www', '/usr/share/nginx'], env=['TZ']),
+            container('db', image='postgres:16', ports=['5432'], networks=['backend'], env=['POSTGRES_PASSWORD'])
+        ])
+        _, index = self.make_index(tmp_path)
+
+        results, total = index.search('postgres', field='image')
+        assert total == 1
+        assert results[0] == {'snapshot': '2025_01_01_00_00', 'file': 'app.yaml', 'container': 'db',
+                              'field': 'image', 'value': 'postgres:16'}
+
+        assert [r['container'] for r in index.search('8443', field='port')[0]] == ['web']
+        assert index.search('844', field='port')[1] == 0
+        assert [r['container'] for r in index.search('/srv', field='volume')[0]] == ['web']
+        assert [r['container'] for r in index.search('postgres_pass')[0]] == ['db']
+
+    def test_results_newest_first_and_limited(self, tmp_path):
+        """Test that hits are ordered by snapshot name descending and limited"""
+        for name in ('2025_01_01_00_00', '2025_01_02_00_00', '2025_01_03_00_00'):
+            write_snapshot(tmp_path, name, [container('web')])
+        _, index = self.make_index(tmp_path)
+
+        results, total = index.search('nginx', field='image', limit=2)
+
+        assert total == 3
+        assert [r['snapshot'] for r in results] == ['2025_01_03_00_00', '2025_01_02_00_00']
+
+    def test_incremental_update(self, tmp_path):
+        """Test that only new or changed snapshots are read and deleted ones are dropped"""
+        write_snapshot(tmp_path, '2025_01_01_00_00', [container('web')])
+        snapshots, index = self.make_index(tmp_path)
+        assert index.update() == 1
+
+        write_snapshot(tmp_path, '2025_01_02_00_00', [container('cache', image='redis:7')])
+        with patch.object(snapshots, 'manifest', wraps=snapshots.manifest) as mock_manifest:
+            assert index.update() == 1
+        mock_manifest.assert_called_once_with('2025_01_02_00_00')
+        assert index.search('redis')[1] == 1
+
+        (tmp_path / '2025_01_02_00_00' / 'app.yaml').unlink()
+        (tmp_path / '2025_01_02_00_00' / 'manifest.json').unlink()
+        index.update()
+        assert index.search('redis')[1] == 0
+        assert index.search('nginx')[1] == 1
+        assert index.update() == 0
+
+    def test_snapshot_without_manifest(self, tmp_path):
+        """Test that folders without a manifest are indexed as empty instead of parsing YAML"""
+        (tmp_path / '2025_01_01_00_00').mkdir()
+        (tmp_path / '2025_01_01_00_00' / 'web.yaml').write_text('services:\n  web:\n    image: nginx\n')
+        _, index = self.make_index(tmp_path)
+
+        assert index.search('nginx') == ([], 0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for snapshot_archive.py module
+"""
+
+import pytest
+import io
+import os
+import sys
+import tarfile
+import zipfile
+
+# Add the backend directory to the path so we can import the modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from snapshot_archive import iter_zip, iter_tar_gz, READ_SIZE
+
+
+def make_files(tmp_path):
+    web = tmp_path / 'web.yaml'
+    web.write_text('services:\n  web:\n    image: nginx\n')
+    big = tmp_path / 'big.yaml'
+    big.write_bytes(os.urandom(READ_SIZE * 3))
+    return [('snap/web.yaml', str(web)), ('snap/big.yaml', str(big))]
+
+
+class TestSnapshotArchive:
+    """Test streamed ZIP and tar.gz generation"""
+
+    def test_zip_roundtrip(self, tmp_path):
+        """Test that the streamed ZIP opens and contains every file intact"""
+        files = make_files(tmp_path)
+
+        chunks = list(iter_zip(files))
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+
+        assert archive.namelist() == ['snap/web.yaml', 'snap/big.yaml']
+        for arcname, path in files:
+            with open(path, 'rb') as f:
+                assert archive.read(arcname) == f.read()
+        assert archive.testzip() is None
+
+    def test_zip_is_produced_in_bounded_chunks(self, tmp_path):
+        """Test that a large file is emitted over several chunks rather than one buffer"""
+        files = make_files(tmp_path)
+
+        chunks = list(iter_zip(files))
+
+        assert len(chunks) > 3
+        assert max(len(chunk) for chunk in chunks) < READ_SIZE * 2
+
+    def test_tar_gz_roundtrip(self, tmp_path):
+        """Test that the streamed tar.gz extracts to the original files"""
+        files = make_files(tmp_path)
+
+        data = b''.join(iter_tar_gz(files))
+        with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as archive:
+            assert archive.getnames() == ['snap/web.yaml', 'snap/big.yaml']
+            for arcname, path in files:
+                with open(path, 'rb') as f:
+                    assert archive.extractfile(arcname).read() == f.read()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for snapshot_diff.py module
+"""
+
+import pytest
+import hashlib
+import os
+import sys
+from unittest.mock import patch
+
+# Add the backend directory to the path so we can import the modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import yaml
+from snapshot_diff import YamlCache, diff_snapshots, diff_values
+
+
+def write_compose(folder, filename, services, networks=None):
+    """Write a compose file and return its manifest entry"""
+    folder.mkdir(exist_ok=True)
+    compose = {'version': '3.8', 'services': services}
+    if networks:
+        compose['networks'] = networks
+    data = yaml.dump(compose, sort_keys=False).encode('utf-8')
+    (folder / filename).write_bytes(data)
+    return {'file': filename, 'sha256': hashlib.sha256(data).hexdigest(), 'networks': sorted(networks or {})}
+
+
+class TestDiffValues:
+    """Test field-level comparison"""
+
+    def test_nested_changes(self):
+        """Test that dicts are compared key by key and lists as a whole"""
+        old = {'image': 'nginx:1.24', 'ports': ['80:80'], 'environment': {'TZ': 'UTC', 'A': '1'}}
+        new = {'image': 'nginx:1.25', 'ports': ['80:80'], 'environment': {'TZ': 'UTC', 'B': '2'}}
+
+        assert diff_values(old, new) == [
+            {'field': 'image', 'from': 'nginx:1.24', 'to': 'nginx:1.25'},
+            {'field': 'environment.A', 'from': '1', 'to': None},
+            {'field': 'environment.B', 'from': None, 'to': '2'},
+        ]
+
+
+class TestDiffSnapshots:
+    """Test structural snapshot diffs"""
+
+    def make_snapshots(self, tmp_path):
+        old, new = tmp_path / 'old', tmp_path / 'new'
+        web = {'container_name': 'web', 'image': 'nginx:1.24'}
+        db = {'container_name': 'db', 'image': 'postgres:16'}
+        old_manifest = {'files': [
+            write_compose(old, 'web.yaml', {'web': web}),
+            write_compose(old, 'db.yaml', {'db': db}, {'backend': {}}),
+            write_compose(old, 'cache.yaml', {'cache': {'image': 'redis:7'}}),
+        ]}
+        new_manifest = {'files': [
+            write_compose(new, 'web.yaml', {'web': {**web, 'image': 'nginx:1.25'}}),
+            write_compose(new, 'db.yaml', {'db': db}, {'backend': {}}),
+            write_compose(new, 'queue.yaml', {'queue': {'image': 'rabbitmq:3'}}),
+        ]}
+        return old_manifest, new_manifest
+
+    def test_service_and_file_changes(self, tmp_path):
+        """Test added/removed/changed services and files"""
+        old_manifest, new_manifest = self.make_snapshots(tmp_path)
+
+        result = diff_snapshots(str(tmp_path), 'old', 'new', old_manifest, new_manifest)
+
+        assert result['files'] == {'added': ['queue.yaml'], 'removed': ['cache.yaml'],
+                                   'changed': ['web.yaml'], 'unchanged': 1}
+        assert result['services']['added'] == [{'name': 'queue', 'file': 'queue.yaml'}]
+        assert result['services']['removed'] == [{'name': 'cache', 'file': 'cache.yaml'}]
+        assert result['services']['changed'] == [{
+            'name': 'web', 'from_file': 'web.yaml', 'to_file': 'web.yaml',
+            'changes': [{'field': 'image', 'from': 'nginx:1.24', 'to': 'nginx:1.25'}]
+        }]
+        assert result['networks'] == {'added': [], 'removed': [], 'changed': []}
+
+    def test_identical_files_are_not_parsed(self, tmp_path):
+        """Test that files with the same sha256 on both sides are skipped"""
+        old_manifest, new_manifest = self.make_snapshots(tmp_path)
+        cache = YamlCache()
+
+        with patch.object(cache, 'load', wraps=cache.load) as mock_load:
+            diff_snapshots(str(tmp_path), 'old', 'new', old_manifest, new_manifest, cache)
+
+        loaded = {os.path.relpath(call[0][0], str(tmp_path)) for call in mock_load.call_args_list}
+        assert os.path.join('old', 'db.yaml') not in loaded
+        assert os.path.join('new', 'db.yaml') not in loaded
+
+    def test_without_manifests(self, tmp_path):
+        """Test that content hashes are computed when snapshots have no manifest"""
+        self.make_snapshots(tmp_path)
+
+        result = diff_snapshots(str(tmp_path), 'old', 'new')
+
+        assert result['files']['unchanged'] == 1
+        assert [s['name'] for s in result['services']['changed']] == ['web']
+
+
+class TestYamlCache:
+    """Test the mtime-keyed parsed YAML cache"""
+
+    def test_hit_miss_and_eviction(self, tmp_path):
+        """Test reuse, reparse on change and LRU eviction"""
+        paths = []
+        for name in ('a', 'b', 'c'):
+            path = tmp_path / f'{name}.yaml'
+            path.write_text(f'name: {name}\n')
+            paths.append(str(path))
+        cache = YamlCache(maxsize=2)
+
+        assert cache.load(paths[0]) == {'name': 'a'}
+        assert cache.load(paths[0]) == {'name': 'a'}
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        with open(paths[0], 'w') as f:
+            f.write('name: changed\n')
+        os.utime(paths[0], ns=(1, 1))
+        assert cache.load(paths[0]) == {'name': 'changed'}
+
+        cache.load(paths[1])
+        cache.load(paths[2])
+        assert paths[0] not in cache._items
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Tests for snapshot_index.py module
+"""
+
+import pytest
+import json
+import os
+import sys
+from unittest.mock import patch
+
+# Add the backend directory to the path so we can import the modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from snapshot_index import SnapshotIndex, scan_yaml_files, resolve_latest
+
+
+def write_file(path, content='services: {}\n'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+class TestSnapshotIndex:
+    """Test compose directory index"""
+
+    def test_listing_structure(self, tmp_path):
+        """Test listing matches the /api/files structure"""
+        write_file(str(tmp_path / 'root.yaml'))
+        write_file(str(tmp_path / '2025_01_03_16_42' / 'app.yaml'))
+        write_file(str(tmp_path / '2025_01_03_16_42' / 'notes.txt'))
+        os.makedirs(str(tmp_path / 'empty'))
+
+        index = SnapshotIndex(str(tmp_path))
+        data, etag = index.listing()
+
+        assert [f['name'] for f in data['root']] == ['root.yaml']
+        assert list(data['folders']) == ['2025_01_03_16_42']
+        folder = data['folders']['2025_01_03_16_42']
+        assert folder['type'] == 'folder'
+        assert [f['name'] for f in folder['files']] == ['app.yaml']
+        assert etag
+
+    def test_missing_directory(self, tmp_path):
+        """Test listing of a compose directory that does not exist"""
+        index = SnapshotIndex(str(tmp_path / 'missing'))
+        data, etag = index.listing()
+
+        assert data == {'root': [], 'folders': {}}
+
+    def test_unchanged_folders_are_not_rescanned(self, tmp_path):
+        """Test that folders with an unchanged mtime are served from the cache"""
+        write_file(str(tmp_path / 'a' / 'one.yaml'))
+        index = SnapshotIndex(str(tmp_path), min_refresh_interval=0)
+        _, first_etag = index.listing()
+
+        with patch('snapshot_index.scan_yaml_files') as mock_scan:
+            _, second_etag = index.listing()
+            mock_scan.assert_not_called()
+
+        assert first_etag == second_etag
+
+    def test_new_snapshot_changes_etag(self, tmp_path):
+        """Test that a new snapshot folder is picked up and changes the ETag"""
+        write_file(str(tmp_path / 'a' / 'one.yaml'))
+        index = SnapshotIndex(str(tmp_path), min_refresh_interval=0)
+        _, first_etag = index.listing()
+
+        write_file(str(tmp_path / 'b' / 'two.yaml'))
+        data, second_etag = index.listing()
+
+        assert set(data['folders']) == {'a', 'b'}
+        assert first_etag != second_etag
+
+    def test_invalidate_rescans_folder(self, tmp_path):
+        """Test that invalidate picks up in-place file rewrites"""
+        path = str(tmp_path / 'a' / 'one.yaml')
+        write_file(path)
+        index = SnapshotIndex(str(tmp_path))
+        _, first_etag = index.listing()
+
+        write_file(path, 'services:\n  web: {}\n')
+        index.invalidate(path)
+        data, second_etag = index.listing()
+
+        assert data['folders']['a']['files'][0]['size'] == os.path.getsize(path)
+        assert first_etag != second_etag
+
+    def test_scan_yaml_files_sorted_by_mtime(self, tmp_path):
+        """Test that files are returned newest first"""
+        older = str(tmp_path / 'older.yaml')
+        newer = str(tmp_path / 'newer.yml')
+        write_file(older)
+        write_file(newer)
+        os.utime(older, (1000, 1000))
+        os.utime(newer, (2000, 2000))
+
+        files = scan_yaml_files(str(tmp_path))
+
+        assert [f['name'] for f in files] == ['newer.yml', 'older.yaml']
+
+
+class TestSnapshotIndexPaging:
+    """Test paginated and date-hierarchy snapshot browsing"""
+
+    def make_index(self, tmp_path, names):
+        for name in names:
+            write_file(str(tmp_path / name / 'app.yaml'))
+        return SnapshotIndex(str(tmp_path))
+
+    def test_page_newest_first_with_cursor(self, tmp_path):
+        """Test folders are paged newest first and the cursor continues the listing"""
+        names = [f'2025_01_0{day}_10_00' for day in range(1, 6)]
+        index = self.make_index(tmp_path, names)
+
+        first, _ = index.page(limit=2)
+        assert [f['name'] for f in first['folders']] == ['2025_01_05_10_00', '2025_01_04_10_00']
+        assert first['total'] == 5
+        assert first['folders'][0]['file_count'] == 1
+        assert 'files' not in first['folders'][0]
+
+        second, _ = index.page(limit=2, cursor=first['next_cursor'])
+        assert [f['name'] for f in second['folders']] == ['2025_01_03_10_00', '2025_01_02_10_00']
+
+        last, _ = index.page(limit=2, cursor=second['next_cursor'])
+        assert [f['name'] for f in last['folders']] == ['2025_01_01_10_00']
+        assert last['next_cursor'] is None
+
+    def test_page_with_prefix(self, tmp_path):
+        """Test listing only the folders of one day"""
+        index = self.make_index(tmp_path, ['2025_01_01_10_00', '2025_01_02_09_00', '2025_01_02_10_00'])
+
+        data, _ = index.page(prefix='2025_01_02')
+
+        assert [f['name'] for f in data['folders']] == ['2025_01_02_10_00', '2025_01_02_09_00']
+        assert data['total'] == 2
+        assert 'root' not in data
+
+    def test_folder_files(self, tmp_path):
+        """Test loading the files of a single folder"""
+        index = self.make_index(tmp_path, ['2025_01_01_10_00'])
+
+        folder, _ = index.folder('2025_01_01_10_00')
+        missing, _ = index.folder('2024_01_01_10_00')
+
+        assert [f['name'] for f in folder['files']] == ['app.yaml']
+        assert missing is None
+
+    def test_date_tree(self, tmp_path):
+        """Test year -> month -> day aggregation"""
+        index = self.make_index(tmp_path, [
+            '2024_12_31_23_59', '2025_01_01_10_00', '2025_01_01_11_00', '2025_02_01_10_00', 'custom'
+        ])
+
+        years, _ = index.date_tree()
+        months, _ = index.date_tree(year='2025')
+        days, _ = index.date_tree(year='2025', month='01')
+
+        assert years == [{'key': '2025', 'count': 3}, {'key': '2024', 'count': 1}]
+        assert months == [{'key': '02', 'count': 1}, {'key': '01', 'count': 2}]
+        assert days == [{'key': '01', 'count': 2}]
+
+
+
+class TestSnapshotManifest:
+    """Test manifest-backed lookups"""
+
+    def write_manifest(self, folder, files):
+        os.makedirs(folder, exist_ok=True)
+        for entry in files:
+            write_file(os.path.join(folder, entry['file']))
+        with open(os.path.join(folder, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'generated_at': '2025-01-02T10:00:00+08:00', 'files': files}, f)
+
+    def test_find_container_uses_latest_manifest(self, tmp_path):
+        """Test container lookup against the newest snapshot with a manifest"""
+        self.write_manifest(str(tmp_path / '2025_01_01_10_00'), [
+            {'file': 'old.yaml', 'containers': [{'name': 'web', 'id': 'a'}]}
+        ])
+        self.write_manifest(str(tmp_path / '2025_01_02_10_00'), [
+            {'file': 'web-group.yaml', 'containers': [{'name': 'web', 'id': 'a'}, {'name': 'db', 'id': 'b'}]}
+        ])
+        # Newer folder without a manifest is skipped
+        write_file(str(tmp_path / '2025_01_03_10_00' / 'custom.yaml'))
+        index = SnapshotIndex(str(tmp_path))
+
+        assert index.find_container('db') == str(tmp_path / '2025_01_02_10_00' / 'web-group.yaml')
+        assert index.find_container('missing') is None
+
+    def test_find_container_follows_latest_link(self, tmp_path):
+        """Test that the latest link is preferred over folder-name ordering"""
+        self.write_manifest(str(tmp_path / '2025_01_01_10_00'), [
+            {'file': 'web.yaml', 'containers': [{'name': 'web', 'id': 'a'}]}
+        ])
+        self.write_manifest(str(tmp_path / 'zz_manual'), [
+            {'file': 'other.yaml', 'containers': [{'name': 'web', 'id': 'a'}]}
+        ])
+        os.symlink('2025_01_01_10_00', str(tmp_path / 'latest'))
+        index = SnapshotIndex(str(tmp_path))
+
+        with patch.object(index, 'refresh') as mock_refresh:
+            assert index.find_container('web') == str(tmp_path / '2025_01_01_10_00' / 'web.yaml')
+            mock_refresh.assert_not_called()
+        assert index.latest() == '2025_01_01_10_00'
+
+    def test_staging_dirs_and_latest_link_not_listed(self, tmp_path):
+        """Test that in-progress staging dirs and the latest link are hidden"""
+        write_file(str(tmp_path / '2025_01_01_10_00' / 'app.yaml'))
+        write_file(str(tmp_path / '.tmp-2025_01_02_10_00-abc' / 'partial.yaml'))
+        os.symlink('2025_01_01_10_00', str(tmp_path / 'latest'))
+        index = SnapshotIndex(str(tmp_path))
+
+        data, _ = index.listing()
+
+        assert list(data['folders']) == ['2025_01_01_10_00']
+        assert resolve_latest(str(tmp_path)) == '2025_01_01_10_00'
+
+    def test_manifest_cached_until_folder_changes(self, tmp_path):
+        """Test that manifests are read once per folder mtime"""
+        self.write_manifest(str(tmp_path / 'snap'), [{'file': 'a.yaml', 'containers': []}])
+        index = SnapshotIndex(str(tmp_path))
+
+        first = index.manifest('snap')
+        with patch('snapshot_index.read_manifest') as mock_read:
+            second = index.manifest('snap')
+            mock_read.assert_not_called()
+
+        assert first is second
+        assert first['generated_at'] == '2025-01-02T10:00:00+08:00'
+
+    def test_manifest_cache_is_bounded_and_pruned(self, tmp_path):
+        """Test LRU eviction of manifests and pruning of deleted snapshots"""
+        import shutil
+        for i in range(4):
+            self.write_manifest(str(tmp_path / f'snap{i}'), [{'file': 'a.yaml', 'containers': []}])
+            write_file(str(tmp_path / f'snap{i}' / 'a.yaml'))
+        index = SnapshotIndex(str(tmp_path))
+
+        with patch('snapshot_index.MANIFEST_CACHE_SIZE', 2):
+            for i in range(4):
+                index.manifest(f'snap{i}')
+            index.manifest('snap2')
+            index.manifest('snap0')
+
+        assert list(index._manifests) == ['snap2', 'snap0']
+
+        shutil.rmtree(str(tmp_path / 'snap2'))
+        index.refresh(force=True)
+
+        assert list(index._manifests) == ['snap0']
+
+    def test_content_hash_cached_until_file_changes(self, tmp_path):
+        """Test that file hashes are reused while mtime and size are unchanged"""
+        import hashlib
+        path = tmp_path / 'web.yaml'
+        path.write_text('services: {}\n')
+        index = SnapshotIndex(str(tmp_path))
+
+        first = index.content_hash(str(path))
+        with patch('builtins.open', side_effect=AssertionError('file re-read')):
+            assert index.content_hash(str(path)) == first
+
+        path.write_text('services:\n  web: {}\n')
+        assert first == hashlib.sha256(b'services: {}\n').hexdigest()
+        assert index.content_hash(str(path)) == hashlib.sha256(b'services:\n  web: {}\n').hexdigest()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for static_assets.py module
+"""
+
+import pytest
+import gzip
+import json
+import os
+import sys
+
+# Add the backend directory to the path so we can import the modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from static_assets import minify_js, minify_css, build, fingerprint_name, AssetManifest
+
+
+class TestMinify:
+    """Test the conservative JS and CSS minifiers"""
+
+    def test_js_strips_comments_and_indentation(self):
+        """Test that comments and indentation are removed but newlines survive"""
+        source = "/**\n * doc\n */\nfunction a() {\n    // comment\n    return 1; // trailing\n}\n"
+
+        assert minify_js(source) == "function a() {\nreturn 1;\n}\n"
+
+    def test_js_keeps_literals_verbatim(self):
+        """Test that strings, template literals and regexes are never rewritten"""
+        source = (
+            "const url = 'http://example.com'; // c\n"
+            "const html = `\n    <div>${items.map(i => `<b>${i}</b>`).join('')}</div> // not a comment\n`;\n"
+            "const re = /\\/\\/[a-z/]+/g;\n"
+            "const half = total / 2 / count;\n"
+        )
+
+        result = minify_js(source)
+
+        assert "'http://example.com'" in result
+        assert "`\n    <div>${items.map(i => `<b>${i}</b>`).join('')}</div> // not a comment\n`" in result
+        assert "/\\/\\/[a-z/]+/g" in result
+        assert "total / 2 / count" in result
+
+    def test_css(self):
+        """Test comment and whitespace removal without touching strings"""
+        source = "/* header */\n.a  .b {\n    content: '  x  ';\n    color: red;\n}\n"
+
+        assert minify_css(source) == ".a .b{content: '  x  ';color: red}"
+
+
+class TestBuild:
+    """Test fingerprinted, precompressed builds"""
+
+    def make_static(self, tmp_path):
+        static = tmp_path / 'static'
+        (static / 'css').mkdir(parents=True)
+        (static / 'js').mkdir()
+        (static / 'fonts').mkdir()
+        (static / 'fonts' / 'icons.woff2').write_bytes(b'\x00font')
+        (static / 'css' / 'style.css').write_text(
+            "@font-face { src: url('../fonts/icons.woff2?v=1') }\n" + ".x { color: red; }\n" * 200)
+        (static / 'js' / 'app.js').write_text("// app\nconsole.log('hi');\n" * 100)
+        return static
+
+    def test_build_writes_manifest_and_hashed_files(self, tmp_path):
+        """Test hashed output names, CSS url rewriting and .gz variants"""
+        static = self.make_static(tmp_path)
+
+        manifest = build(str(static))
+
+        dist = static / 'dist'
+        assert json.loads((dist / 'manifest.json').read_text()) == manifest
+        font = manifest['fonts/icons.woff2']
+        assert font == fingerprint_name('fonts/icons.woff2', b'\x00font')
+        css = (dist / manifest['css/style.css']).read_text()
+        assert f"url('../{font}?v=1')" in css
+        assert gzip.decompress((dist / (manifest['css/style.css'] + '.gz')).read_bytes()).decode() == css
+        assert gzip.decompress((dist / (manifest['js/app.js'] + '.gz')).read_bytes()) == \
+            (dist / manifest['js/app.js']).read_bytes()
+        # woff2已经压缩过，不生成预压缩版本
+        assert not (dist / (font + '.gz')).exists()
+
+    def test_rebuild_replaces_stale_output(self, tmp_path):
+        """Test that changing a source produces a new hash and drops the old file"""
+        static = self.make_static(tmp_path)
+        old = build(str(static))['js/app.js']
+
+        (static / 'js' / 'app.js').write_text("console.log('changed');\n")
+        new = build(str(static))['js/app.js']
+
+        assert new != old
+        assert (static / 'dist' / new).exists()
+        assert not (static / 'dist' / old).exists()
+
+    def test_asset_manifest_reloads(self, tmp_path):
+        """Test lookups before and after a build"""
+        static = self.make_static(tmp_path)
+        assets = AssetManifest(str(static))
+
+        assert assets.lookup('js/app.js') is None
+
+        manifest = build(str(static))
+
+        assert assets.lookup('js/app.js') == manifest['js/app.js']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -14,7 +14,7 @@ import pytz
 # Add the backend directory to the path so we can import the modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
-from web_ui import get_timezone_from_config, get_localized_timestamp, ensure_compose_files_exist
+from web_ui import app, get_timezone_from_config, get_localized_timestamp, ensure_compose_files_exist
 
 
 class TestWebUIUtilities:
@@ -111,5 +111,408 @@ class TestWebUIConfiguration:
                 mock_subprocess.assert_called_once()
 
 
+class TestComposeFileEndpoint:
+    """Test /api/compose-file/<container_id>"""
+
+    def test_inspects_only_requested_container(self, tmp_path):
+        """Test that one container is inspected and its Name is used to find the file"""
+        compose_file = tmp_path / 'web.yaml'
+        compose_file.write_text('services: {}\n', encoding='utf-8')
+        container = {'Id': 'a' * 64, 'Name': '/web'}
+
+        with patch('web_ui.inspect_containers', return_value=[container]) as mock_inspect, \
+             patch('web_ui.find_compose_file_for_container', return_value=str(compose_file)) as mock_find:
+            response = app.test_client().get('/api/compose-file/' + 'a' * 12)
+
+        assert response.status_code == 200
+        assert response.get_json()['data']['filename'] == 'web.yaml'
+        mock_inspect.assert_called_once_with(['a' * 12])
+        mock_find.assert_called_once_with('web')
+
+    def test_unknown_container(self):
+        """Test that an unknown ID returns 404"""
+        with patch('web_ui.inspect_containers', return_value=[]):
+            response = app.test_client().get('/api/compose-file/deadbeef')
+
+        assert response.status_code == 404
+
+    def test_invalid_container_id_is_rejected(self):
+        """Test that IDs with shell metacharacters return 400 without inspecting"""
+        with patch('web_ui.inspect_containers') as mock_inspect:
+            response = app.test_client().get('/api/compose-file/abc;touch%20x')
+
+        assert response.status_code == 400
+        mock_inspect.assert_not_called()
+
+    def test_compose_rejects_invalid_container_ids(self):
+        """Test that /api/compose validates every ID before generating"""
+        with patch('web_ui.generate_compose_for_selected_containers') as mock_generate:
+            response = app.test_client().post('/api/compose', json={'container_ids': ['a' * 12, 'x; rm -rf /']})
+
+        assert response.status_code == 400
+        mock_generate.assert_not_called()
+
+
+class TestSearchEndpoint:
+    """Test /api/search"""
+
+    def test_search_returns_index_results(self):
+        """Test that query parameters are passed to the search index"""
+        hit = {'snapshot': '2025_01_01_00_00', 'file': 'web.yaml', 'container': 'web', 'field': 'port', 'value': '8443'}
+        with patch('web_ui.search_index.search', return_value=([hit], 1)) as mock_search:
+            response = app.test_client().get('/api/search?q=8443&field=port&limit=5')
+
+        assert response.status_code == 200
+        assert response.get_json()['data'] == {'results': [hit], 'total': 1}
+        mock_search.assert_called_once_with('8443', field='port', limit=5)
+
+    def test_rejects_unknown_field(self):
+        """Test that an unsupported field is a 400"""
+        response = app.test_client().get('/api/search?q=x&field=labels')
+
+        assert response.status_code == 400
+
+
+class TestDiffEndpoint:
+    """Test /api/diff"""
+
+    def test_missing_snapshot(self):
+        """Test that an unknown snapshot is a 404"""
+        with patch('web_ui.snapshot_index.folder', return_value=(None, 'etag')):
+            response = app.test_client().get('/api/diff?from=a&to=b')
+
+        assert response.status_code == 404
+
+    def test_diff_uses_manifests_and_cache(self):
+        """Test that both manifests and the shared YAML cache are passed to the diff"""
+        folder = {'name': 'x', 'files': []}
+        with patch('web_ui.snapshot_index.folder', return_value=(folder, 'etag')), \
+             patch('web_ui.snapshot_index.manifest', side_effect=lambda name: {'name': name}), \
+             patch('web_ui.diff_snapshots', return_value={'services': {}}) as mock_diff:
+            response = app.test_client().get('/api/diff?from=a&to=b')
+
+        assert response.status_code == 200
+        args = mock_diff.call_args[0]
+        assert args[1:5] == ('a', 'b', {'name': 'a'}, {'name': 'b'})
+        assert args[5] is __import__('web_ui').yaml_cache
+
+
+class TestCompressedResponses:
+    """Test gzip negotiation, streamed listings and YAML-only compose output"""
+
+    def test_files_listing_streamed_and_gzipped(self):
+        """Test that /api/files is streamed, gzipped on request and still answers 304"""
+        import gzip
+        listing = {'root': [], 'folders': {f'2025_01_01_00_{i:02d}': {'name': str(i), 'files': []} for i in range(60)}}
+        client = app.test_client()
+        with patch('web_ui.snapshot_index.listing', return_value=(listing, 'v1')):
+            response = client.get('/api/files', headers={'Accept-Encoding': 'gzip'})
+            assert response.headers['Content-Encoding'] == 'gzip'
+            assert json.loads(gzip.decompress(response.get_data()))['data'] == listing
+
+            cached = client.get('/api/files', headers={'If-None-Match': response.headers['ETag']})
+            assert cached.status_code == 304
+
+    def test_compose_yaml_only(self):
+        """Test that format=yaml returns the YAML text without the JSON wrapper"""
+        compose = {'version': '3.8', 'services': {'web': {'image': 'nginx'}}}
+        with patch('web_ui.generate_compose_for_selected_containers', return_value=compose):
+            response = app.test_client().post('/api/compose', json={'container_ids': ['a'], 'format': 'yaml'})
+
+        assert response.mimetype == 'application/x-yaml'
+        assert response.get_data(as_text=True).startswith("version: '3.8'")
+
+
+class TestSnapshotPagingEndpoint:
+    """Test /api/snapshots and /api/snapshots/tree parameter handling"""
+
+    def test_page_etag_includes_parameters(self):
+        """Test that valid parameters are passed through and revalidate with 304"""
+        client = app.test_client()
+        with patch('web_ui.snapshot_index.page', return_value=({'folders': []}, 'etag')) as mock_page:
+            response = client.get('/api/snapshots?limit=10&cursor=2025_01_02_10_00&prefix=2025_01')
+            cached = client.get('/api/snapshots?limit=10&cursor=2025_01_02_10_00&prefix=2025_01',
+                                headers={'If-None-Match': response.headers['ETag']})
+
+        assert response.status_code == 200
+        assert cached.status_code == 304
+        mock_page.assert_called_with(limit=10, cursor='2025_01_02_10_00', prefix='2025_01')
+
+    @pytest.mark.parametrize('query', ['cursor=a%22b', 'prefix=x%20y', 'cursor=a/b'])
+    def test_invalid_page_parameters(self, query):
+        """Test that quotes and other characters outside folder names return 400"""
+        with patch('web_ui.snapshot_index.page') as mock_page:
+            response = app.test_client().get('/api/snapshots?' + query)
+
+        assert response.status_code == 400
+        mock_page.assert_not_called()
+
+    def test_invalid_tree_parameters(self):
+        """Test that the date tree rejects quoted year/month values"""
+        with patch('web_ui.snapshot_index.date_tree') as mock_tree:
+            response = app.test_client().get('/api/snapshots/tree?year=2025%22')
+
+        assert response.status_code == 400
+        mock_tree.assert_not_called()
+
+
+class TestSnapshotArchiveEndpoint:
+    """Test /api/snapshots/<name>/archive"""
+
+    def folder(self, tmp_path):
+        snapshot = tmp_path / '2025_01_01_00_00'
+        snapshot.mkdir()
+        for name in ('web.yaml', 'db.yaml'):
+            (snapshot / name).write_text(f'# {name}\n')
+        (snapshot / 'manifest.json').write_text('{}')
+        files = [{'name': n, 'path': str(snapshot / n)} for n in ('web.yaml', 'db.yaml')]
+        return {'name': snapshot.name, 'path': str(snapshot), 'files': files}
+
+    def test_full_snapshot_zip(self, tmp_path):
+        """Test that all files and the manifest are streamed as a ZIP"""
+        import io
+        import zipfile
+        with patch('web_ui.snapshot_index.folder', return_value=(self.folder(tmp_path), 'etag')):
+            response = app.test_client().get('/api/snapshots/2025_01_01_00_00/archive')
+
+        assert response.mimetype == 'application/zip'
+        assert 'filename="2025_01_01_00_00.zip"' in response.headers['Content-Disposition']
+        names = zipfile.ZipFile(io.BytesIO(response.get_data())).namelist()
+        assert names == ['2025_01_01_00_00/db.yaml', '2025_01_01_00_00/manifest.json', '2025_01_01_00_00/web.yaml']
+
+    def test_selected_files_tar_gz(self, tmp_path):
+        """Test a POSTed file selection as tar.gz"""
+        import io
+        import tarfile
+        with patch('web_ui.snapshot_index.folder', return_value=(self.folder(tmp_path), 'etag')):
+            response = app.test_client().post('/api/snapshots/2025_01_01_00_00/archive',
+                                              json={'format': 'tar.gz', 'files': ['web.yaml']})
+
+        with tarfile.open(fileobj=io.BytesIO(response.get_data()), mode='r:gz') as archive:
+            assert archive.getnames() == ['2025_01_01_00_00/web.yaml']
+
+    def test_rejects_files_outside_snapshot(self, tmp_path):
+        """Test that names not listed in the snapshot are refused"""
+        with patch('web_ui.snapshot_index.folder', return_value=(self.folder(tmp_path), 'etag')):
+            response = app.test_client().get('/api/snapshots/2025_01_01_00_00/archive?files=../../etc/passwd')
+
+        assert response.status_code == 404
+
+
+class TestFileContentRevalidation:
+    """Test ETag revalidation of compose file content"""
+
+    def request_compose_file(self, compose_file, headers=None):
+        container = {'Id': 'abc123def456', 'Name': '/web'}
+        with patch('web_ui.inspect_containers', return_value=[container]), \
+             patch('web_ui.find_compose_file_for_container', return_value=str(compose_file)):
+            return app.test_client().get('/api/compose-file/abc123def456', headers=headers or {})
+
+    def test_not_modified_skips_reading_the_file(self, tmp_path):
+        """Test that a matching If-None-Match returns 304 without opening the file"""
+        compose_file = tmp_path / 'web.yaml'
+        compose_file.write_text('services:\n  web:\n    image: nginx\n')
+
+        first = self.request_compose_file(compose_file)
+        etag = first.headers['ETag']
+        with patch('web_ui.open', side_effect=AssertionError('file re-read'), create=True):
+            second = self.request_compose_file(compose_file, {'If-None-Match': etag})
+
+        assert first.status_code == 200
+        assert first.get_json()['data']['content'] == 'services:\n  web:\n    image: nginx\n'
+        assert first.headers['Cache-Control'] == 'no-cache'
+        assert not etag.startswith('W/')
+        assert second.status_code == 304
+        assert second.get_data() == b''
+
+    def test_changed_file_gets_new_etag(self, tmp_path):
+        """Test that rewriting the file invalidates the cached ETag"""
+        compose_file = tmp_path / 'web.yaml'
+        compose_file.write_text('services: {}\n')
+        etag = self.request_compose_file(compose_file).headers['ETag']
+
+        compose_file.write_text('services:\n  web: {}\n')
+        response = self.request_compose_file(compose_file, {'If-None-Match': etag})
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        assert response.get_json()['data']['content'] == 'services:\n  web: {}\n'
+
+    def test_get_rejects_paths_outside_compose_dir(self):
+        """Test that GET /api/file-content keeps the compose directory restriction"""
+        response = app.test_client().get('/api/file-content?path=/etc/hostname')
+
+        assert response.status_code in (403, 404)
+        assert response.get_json()['success'] is False
+
+
+class TestBootstrapEndpoint:
+    """Test /api/bootstrap aggregation"""
+
+    def test_sections_are_fetched_concurrently(self):
+        """Test that containers, snapshots and scheduler status run in parallel and share the settings read"""
+        import threading
+        barrier = threading.Barrier(3, timeout=5)
+        settings = {'GROUP_BY': 'compose', 'CRON': 'once'}
+
+        def containers(config):
+            barrier.wait()
+            assert config is settings
+            return [{'id': 'group_0'}]
+
+        def page(limit):
+            barrier.wait()
+            return {'folders': [], 'root': [], 'limit': limit}, 'etag'
+
+        def scheduler():
+            barrier.wait()
+            return {'running': False}
+
+        with patch('web_ui.get_settings', return_value=settings) as mock_settings, \
+             patch('web_ui.get_container_groups', side_effect=containers), \
+             patch('web_ui.snapshot_index.page', side_effect=page), \
+             patch('web_ui.get_scheduler_status', side_effect=scheduler):
+            response = app.test_client().get('/api/bootstrap?limit=20')
+
+        result = response.get_json()
+        assert result['success'] is True
+        assert result['errors'] == {}
+        assert result['data'] == {
+            'settings': settings,
+            'containers': [{'id': 'group_0'}],
+            'snapshots': {'folders': [], 'root': [], 'limit': 20},
+            'scheduler': {'running': False}
+        }
+        mock_settings.assert_called_once()
+
+    def test_failed_section_does_not_fail_the_response(self):
+        """Test that a failing section is reported in errors and the others are still returned"""
+        with patch('web_ui.get_settings', return_value={}), \
+             patch('web_ui.get_container_groups', return_value=[]), \
+             patch('web_ui.snapshot_index.page', return_value=({'folders': []}, 'etag')), \
+             patch('web_ui.get_scheduler_status', side_effect=RuntimeError('status failed')):
+            result = app.test_client().get('/api/bootstrap').get_json()
+
+        assert result['success'] is True
+        assert result['data']['scheduler'] is None
+        assert result['errors'] == {'scheduler': 'status failed'}
+        assert result['data']['snapshots'] == {'folders': []}
+
+
+class TestSchedulerStatusEndpoint:
+    """Test /api/scheduler/status backed by the scheduler status file"""
+
+    def test_live_python_scheduler(self):
+        """Test that a fresh status file is reported without running scheduler_manager.sh"""
+        record = {'pid': 42, 'state': 'waiting', 'next_run': '2025-01-01T00:00:10', 'alive': True,
+                  'last_run': {'finished_at': '2025-01-01T00:00:00'}}
+
+        with patch('web_ui.read_status', return_value=record), \
+             patch('web_ui.system_cron_running', return_value=False), \
+             patch('web_ui.snapshot_index.latest_manifest', return_value=(None, None)), \
+             patch('web_ui.snapshot_index.latest', return_value=None), \
+             patch('subprocess.run') as mock_subprocess:
+            result = app.test_client().get('/api/scheduler/status').get_json()
+
+        status = result['status']
+        assert status['running'] is True
+        assert status['scheduler_type'] == 'python'
+        assert status['next_run'] == '2025-01-01T00:00:10'
+        assert status['last_run'] == '2025-01-01T00:00:00'
+        mock_subprocess.assert_not_called()
+
+    def test_stale_status_and_system_cron(self):
+        """Test that a stale Python scheduler is ignored and system cron is detected"""
+        record = {'pid': 42, 'state': 'waiting', 'next_run': '2025-01-01T00:00:10', 'alive': False}
+
+        with patch('web_ui.read_status', return_value=record), \
+             patch('web_ui.system_cron_running', return_value=True), \
+             patch('web_ui.read_last_history', return_value=None), \
+             patch('web_ui.snapshot_index.latest_manifest', return_value=(None, {'generated_at': '2025-01-02T00:00:00'})):
+            status = app.test_client().get('/api/scheduler/status').get_json()['status']
+
+        assert status['running'] is True
+        assert status['scheduler_type'] == 'system_cron'
+        assert status['next_run'] is None
+        assert status['last_run'] == '2025-01-02T00:00:00'
+
+    def test_newer_unchanged_run_wins_over_old_snapshot(self):
+        """Test that a recent skipped run is reported instead of the last changed snapshot"""
+        record = {'pid': 42, 'state': 'waiting', 'alive': True,
+                  'last_run': {'finished_at': '2025-01-05T10:00:00+08:00', 'status': 'unchanged'}}
+
+        with patch('web_ui.read_status', return_value=record), \
+             patch('web_ui.system_cron_running', return_value=False), \
+             patch('web_ui.read_last_history', return_value={'time': '2025-01-05T09:59:00+08:00', 'status': 'unchanged'}), \
+             patch('web_ui.snapshot_index.latest_manifest', return_value=(None, {'generated_at': '2025-01-01T00:00:00+08:00'})):
+            status = app.test_client().get('/api/scheduler/status').get_json()['status']
+
+        assert status['last_run'] == '2025-01-05T10:00:00+08:00'
+        assert status['last_run_status'] == 'unchanged'
+
+    def test_nothing_running(self):
+        """Test the stopped state when there is no status file and no system cron"""
+        with patch('web_ui.read_status', return_value=None), \
+             patch('web_ui.system_cron_running', return_value=False), \
+             patch('web_ui.snapshot_index.latest_manifest', return_value=(None, None)), \
+             patch('web_ui.snapshot_index.latest', return_value=None):
+            status = app.test_client().get('/api/scheduler/status').get_json()['status']
+
+        assert status['running'] is False
+        assert status['scheduler_type'] == 'none'
+        assert status['scheduler'] is None
+
+
+class TestStaticAssets:
+    """Test fingerprinted asset URLs and /assets caching"""
+
+    def built(self, tmp_path):
+        from static_assets import AssetManifest, build
+        static = tmp_path / 'static'
+        (static / 'js').mkdir(parents=True)
+        (static / 'js' / 'app.js').write_text("console.log('d2c');\n" * 200)
+        manifest = build(str(static))
+        return AssetManifest(str(static)), manifest['js/app.js']
+
+    def test_precompressed_immutable_asset(self, tmp_path):
+        """Test that the .gz variant is sent as-is with immutable caching"""
+        import gzip
+        assets, hashed = self.built(tmp_path)
+        with patch('web_ui.asset_manifest', assets):
+            response = app.test_client().get(f'/assets/{hashed}', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.mimetype in ('text/javascript', 'application/javascript')
+        assert 'immutable' in response.headers['Cache-Control']
+        assert 'max-age=31536000' in response.headers['Cache-Control']
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert gzip.decompress(response.get_data()).startswith(b"console.log('d2c');")
+
+    def test_identity_and_missing_assets(self, tmp_path):
+        """Test the uncompressed fallback and 404s for unknown or escaping paths"""
+        assets, hashed = self.built(tmp_path)
+        with patch('web_ui.asset_manifest', assets):
+            client = app.test_client()
+            plain = client.get(f'/assets/{hashed}')
+            missing = client.get('/assets/js/app.0000000000.js')
+            escaping = client.get('/assets/../../web_ui.py')
+
+        assert 'Content-Encoding' not in plain.headers
+        assert plain.get_data().startswith(b"console.log('d2c');")
+        assert missing.status_code == 404
+        assert escaping.status_code == 404
+
+    def test_asset_url_fallbacks(self, tmp_path):
+        """Test hashed URLs, the unbuilt static URL and the CDN fallback for missing vendor files"""
+        from web_ui import asset_url
+        assets, hashed = self.built(tmp_path)
+        with app.test_request_context():
+            with patch('web_ui.asset_manifest', assets):
+                assert asset_url('js/app.js') == f'/assets/{hashed}'
+                assert asset_url('vendor/bootstrap/css/bootstrap.min.css', cdn='https://cdn/b.css') == 'https://cdn/b.css'
+            with patch.object(assets, 'lookup', return_value=None), patch('web_ui.asset_manifest', assets):
+                assert asset_url('js/app.js') == '/static/js/app.js'
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file